@@ -11,9 +11,11 @@
 __author__ = 'Steve Foley'
 __license__ = 'Apache 2.0'
 
+from collections import deque
+
 from mi.core.log import get_logger ; log = get_logger()
 
-from mi.core.exceptions import SampleException
+from mi.core.exceptions import SampleException, NotImplementedException
 
 class Chunker(object):
     """
@@ -473,4 +475,440 @@ class BinaryChunker(Chunker):
     def __init__(self, data_sieve_fn):
         Chunker.__init__(self, data_sieve_fn)
         self.buffer = []
-    
\ No newline at end of file
+
+
+class IncrementalSieve(object):
+    """
+    Base class for sieves that can pick up scanning where their last scan
+    left off instead of scanning the whole unprocessed buffer again every
+    time a chunk is added. An incremental sieve can also be called like a
+    plain sieve function, so it works with any chunker, but the OffsetChunker
+    will only hand it the bytes from the last resume index onwards.
+    """
+    # number of bytes before the new data needs_scan() has to see
+    context_size = 0
+
+    def __call__(self, raw_data):
+        (return_list, resume_index) = self.sieve_incremental(raw_data, 0)
+        return return_list
+
+    def needs_scan(self, new_data):
+        """
+        Check if the bytes added since the last scan can complete a data block,
+        the OffsetChunker skips the scan, and keeps its resume index, if not
+        @param new_data The bytes added since the last scan, preceded by up to
+            context_size bytes from before them
+        @retval False if no new data block can be found in the buffer
+        """
+        return True
+
+    def sieve_incremental(self, raw_data, new_data_index):
+        """
+        Scan the raw data for data blocks
+        @param raw_data The raw data to search, starting at the resume index
+            returned by the last scan (or the end of the last data block, if
+            that is later)
+        @param new_data_index The index in raw_data where the bytes added since
+            the last scan start
+        @retval A tuple of (return_list, resume_index). return_list is a list
+            of (start_index, end_index) tuples as a plain sieve function would
+            return them. resume_index is the index in raw_data before which no
+            other data block can start, however much data gets appended.
+        """
+        raise NotImplementedException("sieve_incremental() not overridden!")
+
+
+class RegexSieve(IncrementalSieve):
+    """
+    Incremental version of Chunker.regex_sieve_function. On its own a regex
+    gives no hint about where a match could still start once more data comes
+    in, so a scan normally resumes at the end of the last match. Two optional
+    hints narrow the scan down further:
+    max_match_length - the longest a match (including any lookahead) can be,
+        bounds how far back the next scan has to start
+    end_marker - a string every match ends with and no match contains
+        elsewhere, such as a newline for line based records. Only data up to
+        the last marker is scanned, and nothing is scanned if no marker has
+        come in since the last scan. As no match can span a marker, the next
+        scan resumes after the last marker whether or not anything matched,
+        so data which matches none of the regexes is only scanned once. Do not
+        give an end marker for regexes which can match across one.
+    """
+    def __init__(self, regex_list, max_match_length=None, end_marker=None):
+        """
+        @param regex_list a list of pre-compiled regexes that will identify some
+            flavor of a pattern in the raw data for matching
+        @param max_match_length The maximum length of a match, None if unbounded
+        @param end_marker The string all matches end with, None if there is none
+        """
+        self.regex_list = regex_list
+        self.max_match_length = max_match_length
+        self.end_marker = end_marker
+        if end_marker is not None:
+            # a marker can straddle the start of the new data
+            self.context_size = len(end_marker) - 1
+
+    def needs_scan(self, new_data):
+        return self.end_marker is None or self.end_marker in new_data
+
+    def sieve_incremental(self, raw_data, new_data_index):
+        end_index = len(raw_data)
+
+        if self.end_marker is not None:
+            marker_index = raw_data.rfind(self.end_marker,
+                                          max(new_data_index - len(self.end_marker) + 1, 0))
+            if marker_index < 0:
+                # no match can end in the new data
+                return [], 0
+            end_index = marker_index + len(self.end_marker)
+
+        return_list = []
+        resume_index = end_index
+
+        for matcher in self.regex_list:
+            last_end = 0
+            for match in matcher.finditer(raw_data, 0, end_index):
+                return_list.append((match.start(), match.end()))
+                last_end = match.end()
+
+            if self.end_marker is not None:
+                # no match spans the last marker, so none can start before it
+                continue
+            if self.max_match_length is not None:
+                last_end = max(last_end, end_index - self.max_match_length + 1)
+            resume_index = min(resume_index, last_end)
+
+        return return_list, resume_index
+
+
+class OffsetChunker(Chunker):
+    """
+    A version of the string chunker that keeps a read cursor into a growable
+    byte buffer instead of slicing the buffer every time a chunk is pulled
+    out of it. Chunk indices are kept in deques in absolute stream
+    coordinates, so pulling a chunk only moves the cursor and pops from the
+    front of the deques. The consumed front of the buffer is only compacted
+    away now and then, which keeps draining a large buffer linear in its size.
+    Indices handed back to the caller are relative to the start of the
+    unconsumed buffer, exactly as they are with the StringChunker.
+
+    If the sieve is an IncrementalSieve, only the data from its last resume
+    index onwards is sieved when a chunk is added.
+    """
+    # minimum number of consumed bytes before the buffer is compacted
+    COMPACT_SIZE = 65536
+
+    def __init__(self, data_sieve_fn):
+        self.sieve = data_sieve_fn
+
+        self.raw_chunk_list = deque()
+        self.data_chunk_list = deque()
+        self.nondata_chunk_list = deque()
+
+        self._data = bytearray()
+        # absolute stream offset of the first byte held in self._data
+        self._data_offset = 0
+        # absolute stream offset of the first unconsumed byte
+        self._base = 0
+        # absolute stream offset the next incremental sieve scan starts at
+        self._resume_index = 0
+
+    @property
+    def buffer(self):
+        """
+        The unconsumed contents of the buffer as a string
+        """
+        return self._slice(self._base, self._end())
+
+    def _end(self):
+        """
+        @retval The absolute stream offset one past the last buffered byte
+        """
+        return self._data_offset + len(self._data)
+
+    def _slice(self, start, end):
+        """
+        Copy a section of the buffer out as a string
+        @param start The absolute stream offset of the first byte
+        @param end The absolute stream offset one past the last byte
+        @retval A string with the bytes between start and end
+        """
+        return memoryview(self._data)[start - self._data_offset:end - self._data_offset].tobytes()
+
+    def _timestamp_at(self, index):
+        """
+        Look up the timestamp of the raw chunk that holds an absolute index.
+        New data is found near the end of the buffer, so search from the end.
+        @param index The absolute stream offset to look up
+        @retval The timestamp of the first raw chunk ending after index,
+            None if there is no such raw chunk
+        """
+        timestamp = None
+        for (raw_s, raw_e, raw_t) in reversed(self.raw_chunk_list):
+            if index >= raw_e:
+                break
+            timestamp = raw_t
+        return timestamp
+
+    def add_timestamps(self, start_end_list):
+        """
+        Add timestamps to a list of (start, end) tuples in absolute stream
+        coordinates, based on the values in the raw block list. Tuples that
+        already have a timestamp are passed through.
+
+        @param start_end_list The list of (start, end) tuples
+        @retval The list of (start, end, timestamp) tuples
+        """
+        result_list = []
+
+        for item in start_end_list:
+            if len(item) == 3:
+                result_list.append(item)
+                continue
+            elif len(item) != 2:
+                raise SampleException("Invalid pair encountered!")
+
+            (s, e) = item
+            timestamp = self._timestamp_at(s)
+            if timestamp is not None:
+                result_list.append((s, e, timestamp))
+
+        return result_list
+
+    def add_chunk(self, raw_data, timestamp):
+        """
+        Adds a chunk of data to the end of the buffer, includes the new indices
+        in the raw_chunk_list.
+
+        @param raw_data The raw data string to add
+        @param timestamp The time (in NTP4 float format) that the data was
+            collected at the port agent
+        """
+        assert isinstance(timestamp, float)
+        start_index = self._end()
+
+        if self.data_chunk_list:
+            last_data_index = self.data_chunk_list[-1][1]
+        else:
+            last_data_index = self._base
+
+        self._data.extend(raw_data)
+        self.raw_chunk_list.append((start_index, self._end(), timestamp))
+
+        # find data
+        result = self._generate_data_lists(timestamp, start_index=last_data_index,
+                                           new_data_index=start_index)
+
+        for (s, e, t) in result['data_chunk_list']:
+            self.data_chunk_list.append((s, e, t))
+
+            # remove first fragment part from non-data list if we completed a fragment
+            for item in self.nondata_chunk_list:
+                if item[0] == s:
+                    self.nondata_chunk_list.remove(item)
+                    break
+
+        # splice non-data blocks in, combining with other blocks as needed
+        new_nondata_list = result['non_data_chunk_list']
+        if new_nondata_list:
+            (first_new_s, first_new_e, first_new_t) = new_nondata_list[0]
+
+            if not self.nondata_chunk_list:
+                self.nondata_chunk_list = deque(new_nondata_list)
+                return
+
+            merged_list = deque()
+            for (s, e, t) in self.nondata_chunk_list:
+                if e >= first_new_s:
+                    merged_list.append((s, first_new_e, t))
+                    new_nondata_list.pop(0)  # already used it
+                    break
+                merged_list.append((s, e, t))
+            # all done merging, so add the rest of what is left
+            merged_list.extend(new_nondata_list)
+
+            self.nondata_chunk_list = merged_list
+
+    def _generate_data_lists(self, timestamp, start_index=0, new_data_index=None):
+        """
+        From some starting place in the buffer, go through and find the blocks
+        of data and non-data.
+
+        @param timestamp The timestamp to use for a non-data chunk that is being
+            entered for the first time
+        @param start_index The absolute stream offset to start generating
+            lists from
+        @param new_data_index The absolute stream offset where the data added
+            since the last scan starts, defaults to start_index
+        @retval A dict with keys "data_chunk_list" and "non_data_chunk_list",
+            indices are absolute stream offsets
+        """
+        return_list = {'data_chunk_list': [], 'non_data_chunk_list': []}
+
+        if isinstance(self.sieve, IncrementalSieve):
+            # nothing can start between the end of the last data block and the
+            # resume index, so only sieve from there on
+            scan_index = max(start_index, self._resume_index)
+            if new_data_index is None:
+                new_data_index = start_index
+            context_index = max(new_data_index - self.sieve.context_size, scan_index)
+            if self.sieve.needs_scan(self._slice(context_index, self._end())):
+                (result, resume_index) = self.sieve.sieve_incremental(
+                    self._slice(scan_index, self._end()), max(new_data_index - scan_index, 0))
+                self._resume_index = scan_index + resume_index
+            else:
+                # leave the data since the resume index for a later scan
+                result = []
+        else:
+            scan_index = start_index
+            result = self.sieve(self._slice(start_index, self._end()))
+
+        # assert no overlap!
+        if self.overlaps(result):
+            raise SampleException("Overlapping blocks in sieve list: %s" % result)
+        # sort to protect us from some sloppy sieve code
+        result.sort()
+
+        return_list['data_chunk_list'] = self.add_timestamps(
+            [(s + scan_index, e + scan_index) for (s, e) in result])
+
+        if not result:
+            return_list['non_data_chunk_list'].append((start_index, self._end(), timestamp))
+            return return_list
+
+        non_data_list = []
+        previous_end = start_index
+        for (s, e) in result:
+            s += scan_index
+            e += scan_index
+            if s > previous_end:
+                non_data_list.append((previous_end, s))
+            previous_end = e
+
+        return_list['non_data_chunk_list'] = self.add_timestamps(non_data_list)
+        return return_list
+
+    def _clean_chunk_list(self, chunk_list, end_index):
+        """
+        Drop the entries of a chunk list that end at or before an absolute
+        index, and trim an entry that straddles it. The list is sorted, so
+        only the front of the deque is touched.
+
+        @param chunk_list A deque of (start, end, time) tuples
+        @param end_index The absolute end index of what is being removed
+        @retval The cleaned deque
+        """
+        while chunk_list and chunk_list[0][1] <= end_index:
+            chunk_list.popleft()
+        if chunk_list and chunk_list[0][0] < end_index:
+            (s, e, t) = chunk_list.popleft()
+            chunk_list.appendleft((end_index, e, t))
+        return chunk_list
+
+    def _consume(self, end_index):
+        """
+        Move the read cursor up to an absolute index, dropping everything
+        that comes before it
+        @param end_index The absolute end index of what is being removed
+        """
+        self._base = end_index
+        self._clean_chunk_list(self.raw_chunk_list, end_index)
+        self._clean_chunk_list(self.data_chunk_list, end_index)
+        self._clean_chunk_list(self.nondata_chunk_list, end_index)
+        self._clean_buffer(end_index)
+
+    def _clean_buffer(self, end_index):
+        """
+        Compact the consumed front of the buffer away once it is big enough
+        to be worth copying the rest of the buffer down
+        @param end_index The absolute index that has been consumed up to
+        """
+        consumed = end_index - self._data_offset
+        if consumed <= 0:
+            return
+        if consumed == len(self._data):
+            self._data = bytearray()
+        elif consumed >= self.COMPACT_SIZE and consumed * 2 >= len(self._data):
+            del self._data[:consumed]
+        else:
+            return
+        self._data_offset = end_index
+
+    def _get_next_with_index(self, chunk_list, clean):
+        """
+        Get the next chunk from one of the chunk lists
+        @param chunk_list The deque to take the chunk from
+        @param clean Remove the buffer contents before and including this chunk
+        @retval A tuple of (timestamp, chunk, start_index, end_index) with
+            indices relative to the unconsumed buffer, (None, None, None, None)
+            if the list is empty
+        """
+        if not chunk_list:
+            return (None, None, None, None)
+
+        (next_start, next_end, timestamp) = chunk_list[0]
+        next_block = self._slice(next_start, next_end)
+        base = self._base
+
+        if clean:
+            self._consume(next_end)
+
+        return (timestamp, next_block, next_start - base, next_end - base)
+
+    def get_next_data_with_index(self, clean=True):
+        """
+        Get the next chunk of data from the buffer. By default, it clears all
+        that comes before it.
+
+        @param clean If set to false, do not clear the buffer when fetching the
+            data, but simply return the data block and make no further changes.
+        @return A tuple of (timestamp, data_chunk, start_index, end_index), or
+            (None, None, None, None) if there is no data
+        """
+        return self._get_next_with_index(self.data_chunk_list, clean)
+
+    def get_next_non_data_with_index(self, clean=True):
+        """
+        Get the next chunk of non-data from the buffer. By default, it clears
+        all that comes before it.
+
+        @param clean Remove the buffer contents before and including this data
+        @return A tuple of (timestamp, non_data_chunk, start_index, end_index),
+            or (None, None, None, None) if there is no non-data
+        """
+        return self._get_next_with_index(self.nondata_chunk_list, clean)
+
+    def get_next_raw(self, clean=True):
+        """
+        Get the next chunk of raw characters from the buffer. By default, it
+        clears all that comes before it. A data chunk that is only partly
+        consumed is moved over to the non-data list.
+
+        @param clean Remove the buffer contents before and including this data
+        @return A tuple of (timestamp, raw_chunk), (None, None) if empty list
+        """
+        if not self.raw_chunk_list:
+            return (None, None)
+
+        (next_start, next_end, next_time) = self.raw_chunk_list[0]
+        next_block = self._slice(next_start, next_end)
+
+        if clean:
+            while self.data_chunk_list and self.data_chunk_list[0][0] < next_end:
+                (s, e, t) = self.data_chunk_list.popleft()
+                if e > next_end:
+                    self.nondata_chunk_list.appendleft((s, e, t))
+            self._consume(next_end)
+
+        return (next_time, next_block)
+
+    def clean_all_chunks(self):
+        """
+        Clean all data out of the buffer and the non_data, raw, and data lists
+        """
+        self.raw_chunk_list.clear()
+        self.data_chunk_list.clear()
+        self.nondata_chunk_list.clear()
+        self._base = self._end()
+        self._resume_index = self._base
+        self._clean_buffer(self._base)
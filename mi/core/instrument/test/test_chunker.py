@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.instrument.test.test_chunker
+@file mi/core/instrument/test/test_chunker.py
+@brief Test code for the chunker buffers
+"""
+
+__license__ = 'Apache 2.0'
+
+import re
+from functools import partial
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from mi.core.unit_test import MiUnitTest
+from mi.core.instrument.chunker import StringChunker, OffsetChunker, RegexSieve
+
+SAMPLE_REGEX = re.compile(r'S[0-9]{3}E')
+LINE_REGEX = re.compile(r'.*\n')
+SAMPLE_LINE_REGEX = re.compile(r'S[0-9]{3}E\n')
+
+SAMPLE_1 = 'S123E'
+SAMPLE_2 = 'S456E'
+SAMPLE_3 = 'S789E'
+
+
+@attr('UNIT', group='mi')
+class OffsetChunkerUnitTestCase(MiUnitTest):
+    """
+    Check that the offset chunker behaves exactly like the string chunker
+    """
+
+    def setUp(self):
+        sieve = partial(StringChunker.regex_sieve_function, regex_list=[SAMPLE_REGEX])
+        self.string_chunker = StringChunker(sieve)
+        self.offset_chunker = OffsetChunker(sieve)
+
+    def add_chunk(self, data, timestamp):
+        self.string_chunker.add_chunk(data, timestamp)
+        self.offset_chunker.add_chunk(data, timestamp)
+
+    def assert_next_data(self, clean=True):
+        result = self.offset_chunker.get_next_data_with_index(clean)
+        self.assertEqual(result, self.string_chunker.get_next_data_with_index(clean))
+        self.assertEqual(self.offset_chunker.buffer, self.string_chunker.buffer)
+        return result
+
+    def assert_next_non_data(self, clean=True):
+        result = self.offset_chunker.get_next_non_data_with_index(clean)
+        self.assertEqual(result, self.string_chunker.get_next_non_data_with_index(clean))
+        self.assertEqual(self.offset_chunker.buffer, self.string_chunker.buffer)
+        return result
+
+    def test_many_samples(self):
+        """
+        Add several samples at once and pull them out one at a time
+        """
+        self.add_chunk(SAMPLE_1 + SAMPLE_2 + SAMPLE_3, 10.0)
+
+        self.assertEqual(self.assert_next_data(clean=False), (10.0, SAMPLE_1, 0, 5))
+        self.assertEqual(self.assert_next_data(), (10.0, SAMPLE_1, 0, 5))
+        self.assertEqual(self.assert_next_data(), (10.0, SAMPLE_2, 0, 5))
+        self.assertEqual(self.assert_next_data(), (10.0, SAMPLE_3, 0, 5))
+        self.assertEqual(self.assert_next_data(), (None, None, None, None))
+
+    def test_fragments_and_non_data(self):
+        """
+        Join fragments across chunks with non-data in between samples
+        """
+        self.add_chunk('xx' + SAMPLE_1[:2], 10.0)
+        self.add_chunk(SAMPLE_1[2:] + 'yyy' + SAMPLE_2[:3], 11.0)
+        self.add_chunk(SAMPLE_2[3:] + 'z', 12.0)
+        self.add_chunk(SAMPLE_3, 13.0)
+
+        self.assert_next_non_data(clean=False)
+        self.assertEqual(self.assert_next_data(), (10.0, SAMPLE_1, 2, 7))
+        self.assertEqual(self.assert_next_non_data(), (11.0, 'yyy', 0, 3))
+        self.assertEqual(self.assert_next_data(), (11.0, SAMPLE_2, 0, 5))
+        self.assertEqual(self.assert_next_non_data(), (12.0, 'z', 0, 1))
+        self.assertEqual(self.assert_next_data(), (13.0, SAMPLE_3, 0, 5))
+        self.assertEqual(self.assert_next_non_data(), (None, None, None, None))
+
+    def test_compaction(self):
+        """
+        Drain a large buffer with compaction and check offsets stay in step
+        """
+        self.offset_chunker.COMPACT_SIZE = 16
+        self.add_chunk(('x' + SAMPLE_1) * 200, 10.0)
+
+        for i in range(200):
+            self.assertEqual(self.assert_next_non_data(), (10.0, 'x', 0, 1))
+            self.assertEqual(self.assert_next_data(), (10.0, SAMPLE_1, 0, 5))
+
+        self.assertEqual(self.offset_chunker.buffer, '')
+
+    def test_clean_all_chunks(self):
+        """
+        Clean out everything and keep adding data afterwards
+        """
+        self.add_chunk(SAMPLE_1 + 'x' + SAMPLE_2[:2], 10.0)
+        self.string_chunker.clean_all_chunks()
+        self.offset_chunker.clean_all_chunks()
+        self.assertEqual(self.offset_chunker.buffer, '')
+
+        self.add_chunk(SAMPLE_3, 11.0)
+        self.assertEqual(self.assert_next_data(), (11.0, SAMPLE_3, 0, 5))
+
+
+@attr('UNIT', group='mi')
+class RegexSieveUnitTestCase(MiUnitTest):
+    """
+    Check that the incremental regex sieve finds the same chunks as the plain
+    regex sieve function
+    """
+
+    def assert_same_chunks(self, regex, sieve, data_list):
+        """
+        Add the data to a string chunker with the plain sieve and an offset chunker
+        with the incremental sieve, and check they return the same chunks
+        """
+        string_chunker = StringChunker(partial(StringChunker.regex_sieve_function, regex_list=[regex]))
+        offset_chunker = OffsetChunker(sieve)
+
+        for data in data_list:
+            string_chunker.add_chunk(data, 10.0)
+            offset_chunker.add_chunk(data, 10.0)
+
+        chunks = []
+        while True:
+            non_data = offset_chunker.get_next_non_data_with_index(clean=False)
+            self.assertEqual(non_data, string_chunker.get_next_non_data_with_index(clean=False))
+            data = offset_chunker.get_next_data_with_index()
+            self.assertEqual(data, string_chunker.get_next_data_with_index())
+            if data[1] is None:
+                break
+            chunks.append(data[1])
+
+        return chunks
+
+    def test_end_marker(self):
+        """
+        Sieve lines split over many chunks
+        """
+        data = 'line one\n' + 'x' * 100 + '\nline three\npartial'
+        data_list = [data[i:i + 7] for i in range(0, len(data), 7)]
+
+        chunks = self.assert_same_chunks(LINE_REGEX, RegexSieve([LINE_REGEX], end_marker='\n'), data_list)
+        self.assertEqual(chunks, ['line one\n', 'x' * 100 + '\n', 'line three\n'])
+
+    def test_max_match_length(self):
+        """
+        Sieve samples split over chunks with non-data in between
+        """
+        data = 'xx' + SAMPLE_1 + 'y' * 50 + SAMPLE_2 + SAMPLE_3 + 'zS1'
+        data_list = [data[i:i + 3] for i in range(0, len(data), 3)]
+
+        chunks = self.assert_same_chunks(SAMPLE_REGEX, RegexSieve([SAMPLE_REGEX], max_match_length=5), data_list)
+        self.assertEqual(chunks, [SAMPLE_1, SAMPLE_2, SAMPLE_3])
+
+    def test_no_match_returns_resume_index(self):
+        """
+        A scan without an end marker in the new data finds nothing and keeps its place
+        """
+        sieve = RegexSieve([LINE_REGEX], end_marker='\n')
+        self.assertEqual(sieve.sieve_incremental('abc\ndef', 4), ([], 0))
+        self.assertEqual(sieve.sieve_incremental('abc\ndef\n', 4), ([(0, 4), (4, 8)], 8))
+        self.assertEqual(sieve('abc\ndef\n'), [(0, 4), (4, 8)])
+
+    def test_end_marker_non_matching_lines(self):
+        """
+        Lines which do not match are scanned once, the next scan resumes after the last marker
+        """
+        sieve = RegexSieve([SAMPLE_LINE_REGEX], end_marker='\n')
+        self.assertEqual(sieve.sieve_incremental('junk\nS123E\nmore junk\nS4', 12), ([(5, 11)], 21))
+        self.assertFalse(sieve.needs_scan('more'))
+        self.assertTrue(sieve.needs_scan('e\n'))
+
+        data = 'junk\n' * 20 + 'S123E\n' + 'more junk\n' * 20 + 'S456E\nS7'
+        data_list = [data[i:i + 4] for i in range(0, len(data), 4)]
+        chunks = self.assert_same_chunks(SAMPLE_LINE_REGEX, RegexSieve([SAMPLE_LINE_REGEX], end_marker='\n'),
+                                         data_list)
+        self.assertEqual(chunks, ['S123E\n', 'S456E\n'])
+
+    def test_end_marker_long_run(self):
+        """
+        A long run without the end marker is only sieved once the marker comes in
+        """
+        scanned = []
+
+        class RecordingSieve(RegexSieve):
+            def sieve_incremental(self, raw_data, new_data_index):
+                scanned.append(len(raw_data))
+                return RegexSieve.sieve_incremental(self, raw_data, new_data_index)
+
+        chunker = OffsetChunker(RecordingSieve([LINE_REGEX], end_marker='\n'))
+        for _ in range(100):
+            chunker.add_chunk('x' * 10, 10.0)
+        chunker.add_chunk('\nyy', 10.0)
+
+        self.assertEqual(scanned, [1003])
+        self.assertEqual(chunker.get_next_data(), (10.0, 'x' * 1000 + '\n'))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.test.test_timestamp
+@file mi/core/test/test_timestamp.py
+@brief Test code for the timestamp conversions
+"""
+
+__license__ = 'Apache 2.0'
+
+import calendar
+from datetime import datetime
+
+import ntplib
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from mi.core.unit_test import MiUnitTest
+from mi.core.timestamp import DCL_CONTROLLER_TIMESTAMP_FORMAT, ZULU_TIMESTAMP_FORMAT, FILENAME_TIMESTAMP_FORMAT, \
+    day_start, timestamp_format, formatted_timestamp_to_unix_time, formatted_timestamp_to_ntp_time, \
+    formatted_timestamps_to_ntp_time
+
+
+def strptime_unix_time(timestamp_str, format_str):
+    dt = datetime.strptime(timestamp_str, format_str)
+    return calendar.timegm(dt.timetuple()) + (dt.microsecond / 1000000.0)
+
+
+@attr('UNIT', group='mi')
+class TimestampUnitTestCase(MiUnitTest):
+    """
+    Check that the timestamps are converted exactly as with strptime
+    """
+
+    def assert_strptime(self, timestamp_str, format_str):
+        try:
+            expected = strptime_unix_time(timestamp_str, format_str)
+        except ValueError:
+            self.assertRaises(ValueError, formatted_timestamp_to_unix_time, timestamp_str, format_str)
+        else:
+            self.assertEqual(formatted_timestamp_to_unix_time(timestamp_str, format_str), expected)
+
+    def test_fixed_formats(self):
+        """
+        The fixed formats are converted without strptime
+        """
+        for format_str in (DCL_CONTROLLER_TIMESTAMP_FORMAT, ZULU_TIMESTAMP_FORMAT, FILENAME_TIMESTAMP_FORMAT,
+                           "%Y%m%d %H%M%S", "%y%m%d%H%M", "%Y/%m/%d %H"):
+            self.assertIsNotNone(timestamp_format(format_str).matcher)
+        self.assertIsNone(timestamp_format("%d %b %Y").matcher)
+
+        self.assertEqual(formatted_timestamp_to_unix_time('2014/08/17 00:57:10.648', DCL_CONTROLLER_TIMESTAMP_FORMAT),
+                         1408237030.648)
+        self.assertEqual(formatted_timestamp_to_ntp_time('2000-01-01T00:00:00.00Z', ZULU_TIMESTAMP_FORMAT),
+                         float(ntplib.system_to_ntp_time(946684800)))
+
+        for timestamp_str in ('2014/08/17 00:57:10.648', '2014/08/17 00:57:10.6', '2016/02/29 23:59:59.999999',
+                              '1969/12/31 23:59:59.5', '2014/8/17 00:57:10.648', '2014/08/17  00:57:10.648',
+                              '2015/02/29 00:57:10.648', '2014/13/17 00:57:10.648', '2014/08/17 24:57:10.648',
+                              '2014/08/17 00:57:60.648', '2014/08/17 00:57:10.', '2014/08/17 00:57:10.648\n',
+                              '0000/08/17 00:57:10.648', 'junk'):
+            self.assert_strptime(timestamp_str, DCL_CONTROLLER_TIMESTAMP_FORMAT)
+
+        for timestamp_str, format_str in (('20140817005710', FILENAME_TIMESTAMP_FORMAT), ('1408170057', '%y%m%d%H%M'),
+                                          ('6908170057', '%y%m%d%H%M'), ('2014/08/17 05', '%Y/%m/%d %H'),
+                                          ('17 Aug 2014', '%d %b %Y'), ('20140817 005710', '%Y%m%d %H%M%S')):
+            self.assert_strptime(timestamp_str, format_str)
+
+    def test_day_start(self):
+        """
+        The start of a day is counted from the first of the month as calendar.timegm does
+        """
+        self.assertEqual(day_start(2014, 8, 17), (calendar.timegm((2014, 8, 17, 0, 0, 0)), True))
+        self.assertEqual(day_start(2014, 8, 17), (calendar.timegm((2014, 8, 17, 0, 0, 0)), True))
+        self.assertEqual(day_start(2015, 2, 30), (calendar.timegm((2015, 2, 30, 0, 0, 0)), False))
+        self.assertRaises(ValueError, day_start, 2014, 13, 1)
+
+    def test_vectorized(self):
+        """
+        Arrays of timestamps are converted to the same NTP times as one at a time
+        """
+        timestamps = ['2014/08/17 00:57:10.648', '2016/02/29 23:59:59.999', '1900/03/01 00:00:00.001',
+                      '2014/8/17 00:57:10.648', '2014/08/17 00:57:10.6']
+        ntp_times = formatted_timestamps_to_ntp_time(timestamps, DCL_CONTROLLER_TIMESTAMP_FORMAT)
+        self.assertEqual(ntp_times.tolist(), [formatted_timestamp_to_ntp_time(timestamp_str,
+                                                                              DCL_CONTROLLER_TIMESTAMP_FORMAT)
+                                              for timestamp_str in timestamps])
+
+        timestamps = ['20140817005710', '19991231235959', '20000229000000']
+        self.assertEqual(formatted_timestamps_to_ntp_time(timestamps, FILENAME_TIMESTAMP_FORMAT).tolist(),
+                         [float(ntplib.system_to_ntp_time(strptime_unix_time(timestamp_str,
+                                                                             FILENAME_TIMESTAMP_FORMAT)))
+                          for timestamp_str in timestamps])
+
+        self.assertEqual(len(formatted_timestamps_to_ntp_time([], FILENAME_TIMESTAMP_FORMAT)), 0)
+        self.assertRaises(ValueError, formatted_timestamps_to_ntp_time, ['20140817005710', '20150229000000'],
+                          FILENAME_TIMESTAMP_FORMAT)
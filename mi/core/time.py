@@ -12,8 +12,6 @@ from __future__ import absolute_import
 __author__ = 'Bill French'
 __license__ = 'Apache 2.0'
 
-import calendar
-from datetime import datetime
 import ntplib
 import time
 import re
@@ -21,9 +19,11 @@ import re
 from mi.core.log import get_logger
 log = get_logger()
 
+from mi.core.timestamp import ZULU_TIMESTAMP_FORMAT, formatted_timestamp_to_unix_time
+
 DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?Z?$'
 DATE_MATCHER = re.compile(DATE_PATTERN)
-DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+DATE_FORMAT = ZULU_TIMESTAMP_FORMAT
 
 
 def string_to_ntp_date_time(datestr):
@@ -54,9 +54,7 @@ def string_to_ntp_date_time(datestr):
         if datestr[-1:] != 'Z':
             datestr += 'Z'
 
-        dt = datetime.strptime(datestr, DATE_FORMAT)
-
-        unix_timestamp = calendar.timegm(dt.timetuple()) + (dt.microsecond / 1000000.0)
+        unix_timestamp = formatted_timestamp_to_unix_time(datestr, DATE_FORMAT)
 
         # convert to ntp (seconds since gmt jan 1 1900)
         timestamp = ntplib.system_to_ntp_time(unix_timestamp)
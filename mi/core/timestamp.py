@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.timestamp
+@file mi/core/timestamp.py
+@brief Conversion of fixed format timestamp strings to unix and NTP times
+
+Release notes:
+
+The timestamps of a file are in one of a few fixed formats, the DCL controller
+timestamp (2014/08/17 00:57:10.648), the zulu ISO8601 timestamp
+(2014-08-17T00:57:10.648Z) or digits in a file name (20140817005710). A format made
+of fixed width fields (%Y %y %m %d %H %M %S and %f) is matched with a regex built
+from it and the seconds of the day are added to the start of the day, which is
+cached for the last days seen, as the records of a file are mostly of the same day.
+Whole arrays of timestamps are converted with numpy. A timestamp not fitting the
+fixed widths, or any other format, is parsed with datetime.strptime, so the results
+and errors are those of strptime.
+"""
+
+__license__ = 'Apache 2.0'
+
+import calendar
+from collections import OrderedDict
+from datetime import date, datetime
+import re
+
+import ntplib
+import numpy as np
+
+from mi.core.log import get_logger
+log = get_logger()
+
+# Example: 2014/08/17 00:57:10.648
+DCL_CONTROLLER_TIMESTAMP_FORMAT = "%Y/%m/%d %H:%M:%S.%f"
+
+# Example: 2014-08-17T00:57:10.648Z
+ZULU_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Example: 20140817005710
+FILENAME_TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+SECONDS_PER_DAY = 86400
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# number of days whose start is cached
+DAY_CACHE_SIZE = 64
+
+# the width of each directive of a fixed format, %f is from 1 to 6 digits
+DIRECTIVE_WIDTHS = {'Y': 4, 'y': 2, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2, 'f': None}
+
+# the fields of a timestamp, in the order of the time tuple, with their values when left out of the format
+FIELDS = ('Y', 'm', 'd', 'H', 'M', 'S')
+FIELD_DEFAULTS = ('1900', '01', '01', '00', '00', '00')
+
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+_day_cache = OrderedDict()
+_last_day = [None, None]
+
+
+def day_start(year, month, day):
+    """
+    Get the start of a day, counted as calendar.timegm does from the first of the month,
+    so a day past the end of the month is in the next month.  The days last seen are cached.
+    @param year The year
+    @param month The month, 1 to 12
+    @param day The day of the month
+    @retval (seconds from the unix epoch to the start of the day, True if the day is in the month)
+    @throws ValueError if the year or month is out of range
+    """
+    key = (year, month, day)
+    if key == _last_day[0]:
+        return _last_day[1]
+
+    try:
+        start = _day_cache.pop(key)
+    except KeyError:
+        days = date(year, month, 1).toordinal() - UNIX_EPOCH_ORDINAL + day - 1
+        start = (days * SECONDS_PER_DAY, 1 <= day <= calendar.monthrange(year, month)[1])
+        if len(_day_cache) >= DAY_CACHE_SIZE:
+            _day_cache.popitem(last=False)
+
+    _day_cache[key] = start
+    _last_day[:] = key, start
+    return start
+
+
+class TimestampFormat(object):
+    """
+    A strptime format, converted without strptime when made of fixed width fields.
+    """
+
+    def __init__(self, format_str):
+        """
+        @param format_str The strptime format
+        """
+        self.format_str = format_str
+
+        # the directives and literals of the format, None if it is not a fixed format
+        self.layout = []
+        for literal, directive in re.findall(r'([^%]*)(?:%(.)|\Z)', format_str, re.DOTALL):
+            self.layout.extend(literal)
+            if directive == '%':
+                self.layout.append('%')
+            elif directive:
+                self.layout.append('%' + directive)
+
+        directives = [item for item in self.layout if len(item) == 2]
+        if not re.match(r'(?:[^%]|%.)*\Z', format_str, re.DOTALL) or len(set(directives)) != len(directives) or \
+                any(item[1] not in DIRECTIVE_WIDTHS for item in directives) or \
+                ('%Y' in directives and '%y' in directives):
+            self.layout = None
+
+        self.matcher = None
+        if self.layout is not None:
+            self.matcher = re.compile(''.join(
+                re.escape(item) if len(item) == 1 else
+                r'(\d{1,6})' if item == '%f' else
+                r'(\d{%d})' % DIRECTIVE_WIDTHS[item[1]] for item in self.layout) + r'\Z')
+
+            # index of each field in the groups of a match followed by the defaults
+            self._fields = [directives.index('%' + field) if '%' + field in directives else
+                            len(directives) + index for index, field in enumerate(FIELDS)]
+            if '%y' in directives:
+                self._fields[0] = directives.index('%y')
+            self._short_year = '%y' in directives
+            self._fraction = directives.index('%f') if '%f' in directives else None
+
+    def strptime_unix_time(self, timestamp_str):
+        """
+        Convert a timestamp with datetime.strptime
+        @param timestamp_str The timestamp
+        @retval Unix time in seconds and microseconds precision
+        @throws ValueError if the timestamp does not match the format
+        """
+        dt = datetime.strptime(timestamp_str, self.format_str)
+
+        return calendar.timegm(dt.timetuple()) + (dt.microsecond / 1000000.0)
+
+    def unix_time(self, timestamp_str):
+        """
+        Convert a timestamp
+        @param timestamp_str The timestamp
+        @retval Unix time in seconds and microseconds precision
+        @throws ValueError if the timestamp does not match the format
+        """
+        match = self.matcher.match(timestamp_str) if self.matcher is not None else None
+        if match is None:
+            return self.strptime_unix_time(timestamp_str)
+
+        groups = match.groups() + FIELD_DEFAULTS
+        year, month, day, hour, minute, second = [int(groups[index]) for index in self._fields]
+        if self._short_year:
+            year += 2000 if year <= 68 else 1900
+
+        try:
+            start, in_month = day_start(year, month, day)
+        except ValueError:
+            in_month = False
+        if not in_month or hour > 23 or minute > 59 or second > 59:
+            return self.strptime_unix_time(timestamp_str)
+
+        microsecond = 0
+        if self._fraction is not None:
+            fraction = groups[self._fraction]
+            microsecond = int(fraction) * 10 ** (6 - len(fraction))
+
+        return start + hour * 3600 + minute * 60 + second + (microsecond / 1000000.0)
+
+    def unix_times(self, timestamp_strs):
+        """
+        Convert an array of timestamps with numpy, those not fitting the fixed widths one at a time
+        @param timestamp_strs Sequence or array of timestamps
+        @retval Array of the unix times in seconds and microseconds precision
+        @throws ValueError if a timestamp does not match the format
+        """
+        timestamps = np.asarray(timestamp_strs, dtype=np.str_).reshape(-1)
+        unix_times = np.zeros(len(timestamps))
+        if len(timestamps) == 0:
+            return unix_times
+
+        width = timestamps.dtype.itemsize
+        fits = np.zeros(len(timestamps), dtype=bool)
+        if self.layout is not None:
+            fixed_width = sum(1 if len(item) == 1 else DIRECTIVE_WIDTHS[item[1]] or 0 for item in self.layout)
+            fraction_width = width - fixed_width if '%f' in self.layout else 0
+            if fixed_width + fraction_width == width and (1 <= fraction_width <= 6 or '%f' not in self.layout):
+                fits = self._convert_fixed(timestamps, fraction_width, unix_times)
+
+        for index in np.flatnonzero(~fits):
+            unix_times[index] = self.unix_time(timestamps[index])
+
+        return unix_times
+
+    def _convert_fixed(self, timestamps, fraction_width, unix_times):
+        """
+        Convert the timestamps which fit the fixed widths
+        @param timestamps Array of timestamps of the fixed width
+        @param fraction_width Number of digits of the fraction of a second
+        @param unix_times Array set to the unix times of the timestamps which fit
+        @retval Boolean array of the timestamps which fit
+        """
+        chars = timestamps.view(np.uint8).reshape(len(timestamps), -1).astype(np.int64)
+        fits = np.ones(len(timestamps), dtype=bool)
+
+        values = {}
+        position = 0
+        for item in self.layout:
+            if len(item) == 1:
+                fits &= chars[:, position] == ord(item)
+                position += 1
+                continue
+
+            item_width = fraction_width if item == '%f' else DIRECTIVE_WIDTHS[item[1]]
+            digits = chars[:, position:position + item_width] - ord('0')
+            fits &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+            values[item[1]] = digits.dot(10 ** np.arange(item_width - 1, -1, -1, dtype=np.int64))
+            position += item_width
+
+        year, month, day, hour, minute, second = [values.get(field, int(default))
+                                                  for field, default in zip(FIELDS, FIELD_DEFAULTS)]
+        if 'y' in values:
+            year = np.where(values['y'] <= 68, 2000, 1900) + values['y']
+
+        year, month, day = np.broadcast_arrays(year, month, day)
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_days = DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+        fits &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days) & \
+            (hour <= 23) & (minute <= 59) & (second <= 59)
+
+        # days from the unix epoch of the civil date, with years starting in March
+        march_year = year - (month <= 2)
+        era = march_year // 400
+        year_of_era = march_year - era * 400
+        day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        days = era * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year - 719468
+
+        microsecond = values['f'] * 10 ** (6 - fraction_width) if 'f' in values else 0
+        unix_times[fits] = ((days * SECONDS_PER_DAY + hour * 3600 + minute * 60 + second) +
+                            (microsecond / 1000000.0) * np.ones(len(timestamps)))[fits]
+        return fits
+
+
+_formats = {}
+
+
+def timestamp_format(format_str):
+    """
+    Get the converter of a strptime format, which is built once
+    @param format_str The strptime format
+    @retval The TimestampFormat
+    """
+    try:
+        return _formats[format_str]
+    except KeyError:
+        return _formats.setdefault(format_str, TimestampFormat(format_str))
+
+
+def formatted_timestamp_to_unix_time(timestamp_str, format_str):
+    """
+    Convert a timestamp string to unix time
+    @param timestamp_str The timestamp
+    @param format_str The strptime format of the timestamp
+    @retval Unix time in seconds and microseconds precision
+    @throws ValueError if the timestamp does not match the format
+    """
+    return timestamp_format(format_str).unix_time(timestamp_str)
+
+
+def formatted_timestamp_to_ntp_time(timestamp_str, format_str):
+    """
+    Convert a timestamp string to NTP time
+    @param timestamp_str The timestamp
+    @param format_str The strptime format of the timestamp
+    @retval NTP time (float64) in seconds and microseconds precision
+    @throws ValueError if the timestamp does not match the format
+    """
+    return float(ntplib.system_to_ntp_time(timestamp_format(format_str).unix_time(timestamp_str)))
+
+
+def formatted_timestamps_to_ntp_time(timestamp_strs, format_str):
+    """
+    Convert an array of timestamp strings to NTP times
+    @param timestamp_strs Sequence or array of timestamps
+    @param format_str The strptime format of the timestamps
+    @retval Array of the NTP times (float64) in seconds and microseconds precision
+    @throws ValueError if a timestamp does not match the format
+    """
+    return ntplib.system_to_ntp_time(timestamp_format(format_str).unix_times(timestamp_strs))
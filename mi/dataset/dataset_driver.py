@@ -1,6 +1,7 @@
 __author__ = 'wordenm'
 
 import os
+from itertools import groupby
 
 from mi.logging import config
 from mi.core.log import get_logger
@@ -8,6 +9,13 @@ log = get_logger()
 
 from mi.core.exceptions import NotImplementedException
 
+# number of particles requested from the parser at a time, and passed to the particle data handler
+# at once if it can take more than one sample per call
+DEFAULT_BATCH_SIZE = 1
+# batch size for drivers of high rate streams, where the per call overhead of the particle data handler
+# dominates
+HIGH_RATE_BATCH_SIZE = 1000
+
 class ParticleDataHandler(object):
     """
     This class is a stub class.  The real class is a Java class.
@@ -26,6 +34,13 @@ class ParticleDataHandler(object):
         else:
             self._samples[sample_type].append(sample)
 
+    def addParticleSamples(self, sample_type, samples):
+        log.debug("Sample type: %s, %d samples", sample_type, len(samples))
+        if sample_type not in self._samples.keys():
+            self._samples[sample_type] = list(samples)
+        else:
+            self._samples[sample_type].extend(samples)
+
     def setParticleDataCaptureFailure(self):
         log.debug("Particle data capture failed")
         self._failure = True
@@ -39,26 +54,47 @@ class DataSetDriver(object):
     which is called directly from uFrame
     """
 
-    def __init__(self, parser, particleDataHdlrObj):
+    def __init__(self, parser, particleDataHdlrObj, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        @param parser The parser to get records from
+        @param particleDataHdlrObj The particle data handler to pass the particles to
+        @param batch_size The number of records to request from the parser at a time
+        """
 
         self._parser = parser
         self._particleDataHdlrObj = particleDataHdlrObj
+        self._batch_size = batch_size
 
     def processFileStream(self):
         """
         Method to extract records from a parser's get_records method
-        and pass them to the Java particleDataHdlrObj passed in from uFrame
+        and pass them to the Java particleDataHdlrObj passed in from uFrame.
+        If the particleDataHdlrObj has an addParticleSamples method, each run of
+        records of the same type in a batch is passed to it in one call.
         """
+        add_particle_samples = getattr(self._particleDataHdlrObj, 'addParticleSamples', None)
+
         while True:
             try:
-                records = self._parser.get_records(1)
+                records = self._parser.get_records(self._batch_size)
 
                 if len(records) == 0:
                     log.debug("Done retrieving records.")
                     break
 
-                for record in records:
-                    self._particleDataHdlrObj.addParticleSample(record.type(), record.generate())
+                if add_particle_samples is None:
+                    for record in records:
+                        self._particleDataHdlrObj.addParticleSample(record.type(), record.generate())
+                else:
+                    for sample_type, group in groupby(records, lambda record: record.type()):
+                        samples = []
+                        try:
+                            for record in group:
+                                samples.append(record.generate())
+                        finally:
+                            # deliver the samples generated before a failure, as one at a time would
+                            if samples:
+                                add_particle_samples(sample_type, samples)
             except Exception as e:
                 log.error(e)
                 self._particleDataHdlrObj.setParticleDataCaptureFailure()
@@ -71,13 +107,13 @@ class SimpleDatasetDriver(DataSetDriver):
     the _build_parser method
     """
 
-    def __init__(self, basePythonCodePath, stream_handle, particleDataHdlrObj):
+    def __init__(self, basePythonCodePath, stream_handle, particleDataHdlrObj, batch_size=DEFAULT_BATCH_SIZE):
 
         #configure the mi logger
         config.add_configuration(os.path.join(basePythonCodePath, 'res', 'config', 'mi-logging.yml'))
         parser = self._build_parser(stream_handle)
 
-        super(SimpleDatasetDriver, self).__init__(parser, particleDataHdlrObj)
+        super(SimpleDatasetDriver, self).__init__(parser, particleDataHdlrObj, batch_size)
 
     def _build_parser(self, stream_handle):
         """
@@ -13,10 +13,12 @@ __license__ = 'Apache 2.0'
 
 import time
 import ntplib
+from collections import deque
+from itertools import islice
 
 from mi.core.log import get_logger
 log = get_logger()
-from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.chunker import OffsetChunker
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.exceptions import RecoverableSampleException, SampleEncodingException
 from mi.core.exceptions import NotImplementedException, UnexpectedDataException
@@ -43,6 +45,9 @@ class DataSetDriverConfigKeys(BaseEnum):
 class Parser(object):
     """ abstract class to show API needed for plugin poller objects """
 
+    # exception raised after some of the particles of a request were parsed, raised on the next request
+    _pending_exception = None
+
     def __init__(self, config, stream_handle, state, sieve_fn,
                  state_callback, publish_callback, exception_callback=None):
         """
@@ -62,7 +67,7 @@ class Parser(object):
            ultimately from the agent) where we send our error events to
            be published into ION
         """
-        self._chunker = StringChunker(sieve_fn)
+        self._chunker = OffsetChunker(sieve_fn)
         self._stream_handle = stream_handle
         self._state = state
         self._state_callback = state_callback
@@ -178,17 +183,29 @@ class BufferLoadingParser(Parser):
         """
         Go ahead and execute the data parsing loop up to a point. This involves
         getting data from the file, stuffing it in to the chunker, then parsing
-        it and publishing.
+        it and publishing. If loading fails with particles in the buffer, those
+        particles are returned and the exception is raised on the next call.
         @param num_records The number of records to gather
         @retval Return the list of particles requested, [] if none available
         """
         if num_records <= 0:
             return []
+
+        if self._pending_exception is not None:
+            exception, self._pending_exception = self._pending_exception, None
+            raise exception
+
         try:
-            while len(self._record_buffer) < num_records:
-                self._load_particle_buffer()        
-        except EOFError:
-            self._process_end_of_file()
+            try:
+                while len(self._record_buffer) < num_records:
+                    self._load_particle_buffer()
+            except EOFError:
+                self._process_end_of_file()
+        except Exception as e:
+            if not self._record_buffer:
+                raise
+            # hand out the particles loaded before the failure, the exception is raised on the next call
+            self._pending_exception = e
         return self._yank_particles(num_records)
 
     def _process_end_of_file(self):
@@ -292,6 +309,8 @@ class SimpleParser(Parser):
         self._record_buffer = []
         # a flag indicating if the file has been parsed or not
         self._file_parsed = False
+        # the iter_records generator particles are taken from
+        self._record_iterator = None
 
         super(SimpleParser, self).__init__(config,
                                            stream_handle,
@@ -303,26 +322,51 @@ class SimpleParser(Parser):
 
     def parse_file(self):
         """
-        This method must be overridden.  This method should open and read the file and parser the data within, and at
-        the end of this method self._record_buffer will be filled with all the particles in the file.
+        This method must be overridden, unless iter_records is.  This method should open and read the file and
+        parser the data within, and at the end of this method self._record_buffer will be filled with all the
+        particles in the file.
         """
         raise NotImplementedException("parse_file() not overridden!")
 
+    def iter_records(self):
+        """
+        Generator yielding the particles in the file one at a time.  By default this parses the whole file with
+        parse_file and hands out the particles from the record buffer.  Parsers can override this method instead of
+        parse_file to yield each particle as soon as it is parsed, so only the particles that have been requested
+        and not yet returned are held in memory.
+        """
+        if self._file_parsed is False:
+            self.parse_file()
+            self._file_parsed = True
+
+        self._record_buffer = deque(self._record_buffer)
+        while self._record_buffer:
+            yield self._record_buffer.popleft()
+
     def get_records(self, number_requested=1):
         """
-        Initiate parsing the file if it has not been done already, and pop particles off the record buffer to
-        return as many as requested if they are available in the buffer.
+        Initiate parsing the file if it has not been done already, and take particles from iter_records to
+        return as many as requested if they are available.  If parsing fails after some particles were taken,
+        those particles are returned and the exception is raised on the next call.
         @param number_requested the number of records requested to be returned
         @return an array of particles, with a length of the number requested or less
         """
-        particles_to_return = []
+        if number_requested <= 0:
+            return []
 
-        if number_requested > 0:
-            if self._file_parsed is False:
-                self.parse_file()
-                self._file_parsed = True
+        if self._pending_exception is not None:
+            exception, self._pending_exception = self._pending_exception, None
+            raise exception
 
-        while len(particles_to_return) < number_requested and len(self._record_buffer) > 0:
-            particles_to_return.append(self._record_buffer.pop(0))
+        if self._record_iterator is None:
+            self._record_iterator = self.iter_records()
 
-        return particles_to_return
+        particles = []
+        try:
+            for particle in islice(self._record_iterator, number_requested):
+                particles.append(particle)
+        except Exception as e:
+            if not particles:
+                raise
+            self._pending_exception = e
+        return particles
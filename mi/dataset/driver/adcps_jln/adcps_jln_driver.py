@@ -5,10 +5,11 @@
 # Copyright 2014 Raytheon Co.
 ##
 
+import multiprocessing
 import os
 
 from mi.core.log import get_logger
-from mi.dataset.dataset_driver import DataSetDriver
+from mi.dataset.dataset_driver import DataSetDriver, HIGH_RATE_BATCH_SIZE
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.parser.adcp_pd0 import AdcpPd0Parser
 from mi.core.versioning import version
@@ -37,9 +38,10 @@ def parse(basePythonCodePath, sourceFilePath, particleDataHdlrObj):
         particleDataHdlrObj.setParticleDataCaptureFailure()
 
     with open(sourceFilePath, 'rb') as file_handle:
-        parser = AdcpPd0Parser(config, file_handle, exception_callback)
+        # recovered files hold many ensembles, decode them on all the cores
+        parser = AdcpPd0Parser(config, file_handle, exception_callback, workers=multiprocessing.cpu_count())
 
-        driver = DataSetDriver(parser, particleDataHdlrObj)
+        driver = DataSetDriver(parser, particleDataHdlrObj, HIGH_RATE_BATCH_SIZE)
         driver.processFileStream()
 
     return particleDataHdlrObj
@@ -9,7 +9,7 @@ __author__ = "Jeff Roy"
 from mi.core.log import get_logger
 log = get_logger()
 
-from mi.dataset.dataset_driver import DataSetDriver
+from mi.dataset.dataset_driver import DataSetDriver, HIGH_RATE_BATCH_SIZE
 from mi.dataset.parser.adcp_pd0 import AdcpPd0Parser
 
 
@@ -30,7 +30,7 @@ class AdcpaDriver:
 
             parser = AdcpPd0Parser(self._parser_config, file_handle, exception_callback)
 
-            driver = DataSetDriver(parser, self._particleDataHdlrObj)
+            driver = DataSetDriver(parser, self._particleDataHdlrObj, HIGH_RATE_BATCH_SIZE)
 
             driver.processFileStream()
 
@@ -6,23 +6,25 @@
 __author__= "ehahn"
 
 from mi.core.log import get_logger
-from mi.dataset.dataset_driver import DataSetDriver
+from mi.dataset.dataset_driver import DataSetDriver, HIGH_RATE_BATCH_SIZE
 from mi.dataset.parser.glider import GliderEngineeringParser
 
 
 class GliderEngineeringDriver:
 
-    def __init__(self, sourceFilePath, particleDataHdlrObj, parser_config):
+    def __init__(self, sourceFilePath, particleDataHdlrObj, parser_config, columnar=True):
         """
         Initialize glider engineering driver
         @param sourceFilePath - source file from Java
         @param particleDataHdlrObj - particle data handler object from Java
         @param parser_config - parser configuration dictionary
+        @param columnar - True to parse the data rows in columnar mode
         """
 
         self._source_file_path = sourceFilePath
         self._particle_data_hdlr_obj = particleDataHdlrObj
         self._parser_config = parser_config
+        self._columnar = columnar
 
     def process(self):
         """
@@ -40,10 +42,11 @@ class GliderEngineeringDriver:
             # able to pass arguments
             parser = GliderEngineeringParser(self._parser_config,
                                              file_handle,
-                                             exception_callback)
+                                             exception_callback,
+                                             columnar=self._columnar)
 
             # instantiate the driver
-            driver = DataSetDriver(parser, self._particle_data_hdlr_obj)
+            driver = DataSetDriver(parser, self._particle_data_hdlr_obj, HIGH_RATE_BATCH_SIZE)
             # start the driver processing the file
             driver.processFileStream()
 
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+import glob
+import json
+import os
+import unittest
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.dataset_driver import ParticleDataHandler
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.driver.moas.gl.engineering.driver_common import GliderEngineeringDriver
+from mi.dataset.parser.glider import EngineeringClassKey
+
+RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver', 'moas', 'gl', 'engineering',
+                             'resource')
+
+
+class DriverTest(unittest.TestCase):
+
+    parser_config = {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+        DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+            EngineeringClassKey.METADATA: 'EngineeringMetadataDataParticle',
+            EngineeringClassKey.DATA: 'EngineeringTelemeteredDataParticle',
+            EngineeringClassKey.SCIENCE: 'EngineeringScienceTelemeteredDataParticle'
+        }
+    }
+
+    @staticmethod
+    def samples(source_file_path, columnar):
+        """
+        Run the driver and get the values of the samples of each stream with the type of each value
+        """
+        particle_data_hdlr_obj = GliderEngineeringDriver(source_file_path, ParticleDataHandler(),
+                                                         DriverTest.parser_config, columnar).process()
+
+        samples = {}
+        for sample_type, stream_samples in particle_data_hdlr_obj._samples.iteritems():
+            samples[sample_type] = [[(value['value_id'], value['value'], type(value['value']))
+                                     for value in json.loads(sample)['values']]
+                                    for sample in stream_samples]
+        return samples, particle_data_hdlr_obj._failure
+
+    def test_columnar(self):
+        """
+        The columnar mode publishes the same values, of the same types, as parsing each row into a dictionary
+        """
+        for source_file_path in sorted(glob.glob(os.path.join(RESOURCE_PATH, '*.mrg'))):
+            log.debug("FILE: %s", source_file_path)
+            self.assertEqual(self.samples(source_file_path, True), self.samples(source_file_path, False))
+
+
+if __name__ == '__main__':
+    test = DriverTest('test_columnar')
+    test.test_columnar()
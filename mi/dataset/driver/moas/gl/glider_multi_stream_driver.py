@@ -0,0 +1,108 @@
+##
+# OOIPLACEHOLDER
+#
+##
+
+import os
+
+from mi.logging import config
+
+from mi.core.log import get_logger
+from mi.dataset.dataset_driver import DataSetDriver, HIGH_RATE_BATCH_SIZE
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser.glider import GliderMultiStreamParser
+
+from mi.core.versioning import version
+
+log = get_logger()
+
+
+class GliderStreamRouter(object):
+    """
+    Particle data handler passing each sample on to the particle data handler for the
+    stream of the sample
+    """
+
+    def __init__(self, handlers):
+        """
+        @param handlers - dictionary of particle data handler objects keyed by stream name
+        """
+        self._handlers = handlers
+
+    def addParticleSample(self, sample_type, sample):
+        self._handlers[sample_type].addParticleSample(sample_type, sample)
+
+    def addParticleSamples(self, sample_type, samples):
+        handler = self._handlers[sample_type]
+        add_particle_samples = getattr(handler, 'addParticleSamples', None)
+        if add_particle_samples is None:
+            for sample in samples:
+                handler.addParticleSample(sample_type, sample)
+        else:
+            add_particle_samples(sample_type, samples)
+
+    def setParticleDataCaptureFailure(self):
+        for handler in set(self._handlers.itervalues()):
+            handler.setParticleDataCaptureFailure()
+
+
+class GliderMultiStreamDriver:
+
+    def __init__(self, sourceFilePath, particleDataHdlrObjs):
+        """
+        Initialize glider multiple stream driver
+        @param sourceFilePath - source file from Java
+        @param particleDataHdlrObjs - dictionary of particle data handler objects keyed by the name of the
+            glider particle class to fill the handler with, one handler may be used for several classes
+        """
+
+        self._source_file_path = sourceFilePath
+        self._particle_data_hdlr_objs = particleDataHdlrObjs
+
+    def process(self):
+        """
+        Process a file by opening the file and instantiating a parser and driver, the file is only parsed
+        once for all the particle classes
+        """
+        parser_config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+            DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: dict((class_name, class_name) for class_name
+                                                                in self._particle_data_hdlr_objs)
+        }
+
+        with open(self._source_file_path, "rb") as file_handle:
+
+            def exception_callback(exception):
+                log.debug("Exception %s", exception)
+                # a failure reading the file affects all the streams
+                for handler in set(self._particle_data_hdlr_objs.itervalues()):
+                    handler.setParticleDataCaptureFailure()
+
+            parser = GliderMultiStreamParser(parser_config,
+                                             file_handle,
+                                             exception_callback,
+                                             columnar=True)
+
+            router = GliderStreamRouter(dict((particle_class._data_particle_type,
+                                              self._particle_data_hdlr_objs[particle_class.__name__])
+                                             for particle_class in parser.particle_classes))
+
+            driver = DataSetDriver(parser, router, HIGH_RATE_BATCH_SIZE)
+            driver.processFileStream()
+
+        return self._particle_data_hdlr_objs
+
+
+@version("15.6.0")
+def parse(basePythonCodePath, sourceFilePath, particleDataHdlrObjs):
+    """
+    Parse a merged glider file once for several glider streams
+    @param basePythonCodePath - python code path from Java
+    @param sourceFilePath - source file from Java
+    @param particleDataHdlrObjs - dictionary of particle data handler objects keyed by glider particle class name
+    """
+    config.add_configuration(os.path.join(basePythonCodePath, 'res', 'config', 'mi-logging.yml'))
+
+    driver = GliderMultiStreamDriver(sourceFilePath, particleDataHdlrObjs)
+
+    return driver.process()
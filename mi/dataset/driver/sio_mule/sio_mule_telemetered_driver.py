@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.driver.sio_mule
+@file mi-dataset/mi/dataset/driver/sio_mule/sio_mule_telemetered_driver.py
+@brief Telemetered driver for all the instruments of an SIO mule file
+
+Release notes:
+
+Initial Release
+"""
+
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.dataset_driver import SimpleDatasetDriver, HIGH_RATE_BATCH_SIZE
+from mi.dataset.parser.sio_mule_common import SioMuleDemultiplexer
+from mi.dataset.parser.adcps_jln_sio import AdcpsJlnSioParser
+from mi.dataset.parser.ctdmo_ghqr_sio import CtdmoGhqrSioTelemeteredParser
+from mi.dataset.parser.ctdpf_ckl_wfp_sio import CtdpfCklWfpSioParser
+from mi.dataset.parser.dosta_abcdjm_sio import DostaAbcdjmSioParser, \
+    DostaAbcdjmSioTelemeteredMetadataDataParticle, \
+    DostaAbcdjmSioTelemeteredDataParticle, \
+    METADATA_PARTICLE_CLASS_KEY, \
+    DATA_PARTICLE_CLASS_KEY
+from mi.dataset.parser.dosta_ln_wfp_sio import DostaLnWfpSioParser
+from mi.dataset.parser.flord_l_wfp_sio import FlordLWfpSioParser
+from mi.dataset.parser.flort_dj_sio import FlortDjSioParser
+from mi.dataset.parser.phsen_abcdef_sio import PhsenAbcdefSioParser
+from mi.dataset.parser.sio_eng_sio import SioEngSioParser
+from mi.dataset.parser.vel3d_l_wfp import Vel3dLWfpSioParser
+from mi.dataset.parser.wfp_eng_wfp_sio import WfpEngWfpSioParser
+from mi.core.versioning import version
+
+# the telemetered parsers of the instruments on a mule, with the SIO instrument IDs of their blocks
+SIO_MULE_PARSERS = [
+    (['AD'], AdcpsJlnSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.adcps_jln_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'AdcpsJlnSioDataParticle'
+    }),
+    (['CT', 'CO'], CtdmoGhqrSioTelemeteredParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.ctdmo_ghqr_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: ['CtdmoGhqrSioTelemeteredInstrumentDataParticle',
+                                                 'CtdmoGhqrSioTelemeteredOffsetDataParticle']
+    }),
+    (['WC'], CtdpfCklWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.ctdpf_ckl_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: ['CtdpfCklWfpSioDataParticle',
+                                                 'CtdpfCklWfpSioMetadataParticle']
+    }),
+    (['DO'], DostaAbcdjmSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.dosta_abcdjm_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: None,
+        DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+            METADATA_PARTICLE_CLASS_KEY: DostaAbcdjmSioTelemeteredMetadataDataParticle,
+            DATA_PARTICLE_CLASS_KEY: DostaAbcdjmSioTelemeteredDataParticle
+        }
+    }),
+    (['WE'], DostaLnWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.dosta_ln_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'DostaLnWfpSioDataParticle'
+    }),
+    (['WE'], FlordLWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.flord_l_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'FlordLWfpSioDataParticle'
+    }),
+    (['FL'], FlortDjSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.flort_dj_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'FlortdParserDataParticle'
+    }),
+    (['PH'], PhsenAbcdefSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.phsen_abcdef_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: ['PhsenAbcdefSioDataParticle',
+                                                 'PhsenAbcdefSioControlDataParticle']
+    }),
+    (['CS'], SioEngSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.sio_eng_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'SioEngSioTelemeteredDataParticle'
+    }),
+    (['WE'], WfpEngWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.wfp_eng_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: None
+    }),
+    (['WA'], Vel3dLWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.vel3d_l_wfp',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: ['Vel3dLWfpInstrumentParticle',
+                                                 'Vel3dLWfpSioMuleMetadataParticle']
+    }),
+]
+
+
+@version("15.7.0")
+def parse(basePythonCodePath, sourceFilePath, particleDataHdlrObj):
+    """
+    This is the method called by Uframe
+    :param basePythonCodePath This is the file system location of mi-dataset
+    :param sourceFilePath This is the full path and filename of the file to be parsed
+    :param particleDataHdlrObj Java Object to consume the output of the parser
+    :return particleDataHdlrObj
+    """
+
+    with open(sourceFilePath, 'rb') as stream_handle:
+
+        # create and instance of the concrete driver class defined below
+        driver = SioMuleTelemeteredDriver(basePythonCodePath, stream_handle, particleDataHdlrObj)
+        driver.processFileStream()
+
+    return particleDataHdlrObj
+
+
+class SioMuleTelemeteredDriver(SimpleDatasetDriver):
+    """
+    The SIO mule driver reads the file once and returns the particles of all the instruments on the mule.
+    The parser built is the demultiplexer routing the blocks of each instrument to its parser.
+    """
+
+    def __init__(self, basePythonCodePath, stream_handle, particleDataHdlrObj):
+        super(SioMuleTelemeteredDriver, self).__init__(basePythonCodePath, stream_handle, particleDataHdlrObj,
+                                                       HIGH_RATE_BATCH_SIZE)
+
+    def _build_parser(self, stream_handle):
+
+        parser = SioMuleDemultiplexer(stream_handle)
+
+        for instrument_ids, parser_class, parser_config in SIO_MULE_PARSERS:
+            parser.register(parser_class(parser_config, stream_handle, self._exception_callback), instrument_ids)
+
+        return parser
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+import os
+import unittest
+
+from mi.core.log import get_logger
+from mi.idk.config import Config
+from mi.dataset.dataset_driver import ParticleDataHandler
+from mi.dataset.driver.sio_mule.sio_mule_telemetered_driver import parse
+
+log = get_logger()
+
+
+class SampleTest(unittest.TestCase):
+
+    def test_one(self):
+
+        source_file_path = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver',
+                                        'dosta_ln', 'wfp_sio', 'resource', 'node58p1.dat')
+
+        particle_data_handler = ParticleDataHandler()
+
+        particle_data_handler = parse(Config().base_dir(), source_file_path, particle_data_handler)
+
+        log.debug("SAMPLES: %s", particle_data_handler._samples)
+        log.debug("FAILURE: %s", particle_data_handler._failure)
+
+        self.assertEquals(particle_data_handler._failure, False)
+        # the engineering, ctdpf, dosta, flord and wfp engineering streams of the mule file
+        self.assertIn('sio_eng_control_status', particle_data_handler._samples)
+        self.assertIn('ctdpf_ckl_wfp_instrument', particle_data_handler._samples)
+        self.assertIn('dosta_ln_wfp_instrument', particle_data_handler._samples)
+        self.assertIn('flord_l_wfp_instrument', particle_data_handler._samples)
+        self.assertIn('wfp_eng_wfp_sio_mule_start_time', particle_data_handler._samples)
+
+
+if __name__ == '__main__':
+    test = SampleTest('test_one')
+    test.test_one()
@@ -18,20 +18,22 @@ from mi.core.versioning import version
 
 
 @version("15.6.0")
-def parse(basePythonCodePath, sourceFilePath, outputFilePath, particleDataHdlrObj):
+def parse(basePythonCodePath, sourceFilePath, outputFilePath, particleDataHdlrObj, renderer=None):
     """
     This is the method called by Uframe
     :param basePythonCodePath This is the file system location of mi-dataset
     :param sourceFilePath This is the full path and filename of the file to be parsed
     :param outputFilePath This is the full path of the file to be output
     :param particleDataHdlrObj Java Object to consume the output of the parser
+    :param renderer EchogramRenderer to queue the echogram plots to without waiting for them,
+    by default the plots are done before returning
     :return particleDataHdlrObj
     """
 
     with open(sourceFilePath, 'rb') as stream_handle:
 
         ZplscBTelemeteredDriver(basePythonCodePath, stream_handle, outputFilePath,
-                                particleDataHdlrObj).processFileStream()
+                                particleDataHdlrObj, renderer).processFileStream()
 
     return particleDataHdlrObj
 
@@ -41,9 +43,10 @@ class ZplscBTelemeteredDriver(SimpleDatasetDriver):
     The zplsc_b driver class extends the SimpleDatasetDriver.
     """
 
-    def __init__(self, basePythonCodePath, stream_handle, outputFilePath, particleDataHdlrObj):
+    def __init__(self, basePythonCodePath, stream_handle, outputFilePath, particleDataHdlrObj, renderer=None):
 
         self.outputFilePath = outputFilePath
+        self.renderer = renderer
 
         super(ZplscBTelemeteredDriver, self).__init__(basePythonCodePath, stream_handle, particleDataHdlrObj)
 
@@ -56,6 +59,7 @@ class ZplscBTelemeteredDriver(SimpleDatasetDriver):
         parser = ZplscBParser(parser_config,
                               stream_handle,
                               self._exception_callback,
-                              self.outputFilePath)
+                              self.outputFilePath,
+                              self.renderer)
 
         return parser
\ No newline at end of file
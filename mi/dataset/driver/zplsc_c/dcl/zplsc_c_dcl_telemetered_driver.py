@@ -16,18 +16,21 @@ from mi.core.versioning import version
 
 
 @version("15.6.0")
-def parse(basePythonCodePath, sourceFilePath, particleDataHdlrObj):
+def parse(basePythonCodePath, sourceFilePath, particleDataHdlrObj, outputFilePath=None, renderer=None):
     """
     This is the method called by Uframe
     :param basePythonCodePath This is the file system location of mi-dataset
     :param sourceFilePath This is the full path and filename of the file to be parsed
     :param particleDataHdlrObj Java Object to consume the output of the parser
+    :param outputFilePath This is the full path of the echogram files to be output
+    :param renderer EchogramRenderer to queue the echograms to, no echograms are made without one
     :return particleDataHdlrObj
     """
 
     with open(sourceFilePath, 'rb') as stream_handle:
 
-        ZplscCDclTelemeteredDriver(basePythonCodePath, stream_handle, particleDataHdlrObj).processFileStream()
+        ZplscCDclTelemeteredDriver(basePythonCodePath, stream_handle, particleDataHdlrObj,
+                                   outputFilePath, renderer).processFileStream()
 
     return particleDataHdlrObj
 
@@ -37,7 +40,10 @@ class ZplscCDclTelemeteredDriver(SimpleDatasetDriver):
     The zplsc_c_dcl driver class extends the SimpleDatasetDriver.
     """
 
-    def __init__(self, basePythonCodePath, stream_handle, particleDataHdlrObj):
+    def __init__(self, basePythonCodePath, stream_handle, particleDataHdlrObj, outputFilePath=None, renderer=None):
+
+        self.outputFilePath = outputFilePath
+        self.renderer = renderer
 
         super(ZplscCDclTelemeteredDriver, self).__init__(basePythonCodePath, stream_handle, particleDataHdlrObj)
 
@@ -49,6 +55,8 @@ class ZplscCDclTelemeteredDriver(SimpleDatasetDriver):
 
         parser = ZplscCDclParser(parser_config,
                                  stream_handle,
-                                 self._exception_callback)
+                                 self._exception_callback,
+                                 self.outputFilePath,
+                                 self.renderer)
 
         return parser
@@ -7,6 +7,8 @@
 @brief Extend the protocol param dict to handle dataset encoding exceptions
 """
 import re
+import sre_constants
+import sre_parse
 
 from mi.core.instrument.protocol_param_dict import ProtocolParameterDict, ParameterDescription
 from mi.core.instrument.protocol_param_dict import ParameterValue, ParameterDictVisibility
@@ -176,4 +178,102 @@ class DatasetParameterDict(ProtocolParameterDict):
         """
         Return the encoding errors list
         """
-        return self._encoding_errors
\ No newline at end of file
+        return self._encoding_errors
+
+class DatasetParameterSchema(object):
+    """
+    The regex parameters of a DatasetParameterDict compiled once, so they can be
+    shared by all the particles of a class. Parameters with the same regex are
+    matched once. A regex starting with a literal 'key=' is matched at the first
+    line starting with that key, found by a single pass over the lines of the
+    data, other regexes are searched for in the whole data.
+    """
+    # the 'key=' at the start of each line
+    KEY_MATCHER = re.compile(r'(?:^|(?<=\r))([^=\r\n]+=)', re.MULTILINE)
+
+    def __init__(self, param_dict):
+        """
+        @param param_dict The DatasetParameterDict of the regex parameters
+        """
+        self._params = []
+        self._regexes = []
+        regex_indices = {}
+        for name in param_dict._param_dict.keys():
+            param = param_dict._param_dict[name]
+            regex_key = (param.regex.pattern, param.regex.flags)
+            if regex_key not in regex_indices:
+                regex_indices[regex_key] = len(self._regexes)
+                self._regexes.append((param.regex, self.literal_key(param.regex)))
+            self._params.append((name, regex_indices[regex_key], param.f_getval, param.get_value()))
+
+    @staticmethod
+    def literal_key(regex):
+        """
+        Get the literal 'key=' a regex starts with
+        @param regex The compiled regex
+        @retval The key including the '=', None if the regex does not start with a literal key
+        """
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+        except (sre_constants.error, OverflowError):
+            return None
+        if parsed.pattern.flags & re.IGNORECASE:
+            return None
+
+        key = []
+        for op, av in parsed:
+            if op is not sre_constants.LITERAL or av > 255 or chr(av) in '\r\n':
+                return None
+            key.append(chr(av))
+            if key[-1] == '=':
+                return ''.join(key)
+        return None
+
+    def extract(self, in_data):
+        """
+        Extract the values of all the parameters, giving the same values and
+        encoding errors as updating a DatasetParameterDict with the data.
+        @param in_data The data to match the parameters in
+        @retval (dictionary of the value of each parameter, list of encoding errors)
+        """
+        if not isinstance(in_data, str):
+            in_data = str(in_data)
+
+        line_keys = {}
+        for match in self.KEY_MATCHER.finditer(in_data):
+            line_keys.setdefault(match.group(1), match.start())
+
+        matches = [None] * len(self._regexes)
+        searched = [False] * len(self._regexes)
+        values = {}
+        encoding_errors = []
+        for name, regex_index, f_getval, initial_value in self._params:
+            if not searched[regex_index]:
+                matches[regex_index] = self._search(in_data, line_keys, *self._regexes[regex_index])
+                searched[regex_index] = True
+
+            match = matches[regex_index]
+            if match is None:
+                values[name] = initial_value
+                continue
+            try:
+                values[name] = f_getval(match)
+            except Exception:
+                log.error("Dataset parameter dict error encoding Name:%s, set to None", name)
+                values[name] = None
+                encoding_errors.append({name: None})
+
+        return values, encoding_errors
+
+    @staticmethod
+    def _search(in_data, line_keys, regex, key):
+        """
+        Search for the first match of a regex, starting at the line of its key
+        if no other occurrence of the key comes first.
+        """
+        start = line_keys.get(key) if key is not None else None
+        if start is None or in_data.find(key, 0, start + len(key)) != start:
+            return regex.search(in_data)
+
+        # no match can start before the first occurrence of its key
+        return regex.match(in_data, start) or regex.search(in_data, start + 1)
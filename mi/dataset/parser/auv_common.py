@@ -117,9 +117,10 @@ class AuvCommonParser(SimpleParser):
                                               stream_handle,
                                               exception_callback)
 
-    def parse_file(self):
+    def iter_records(self):
         """
-        Entry point into parsing the file, loop over each line and interpret it until the entire file is parsed
+        Entry point into parsing the file, loop over each line and interpret it until the entire file is parsed,
+        yielding each particle as it is created
         """
 
         for line in self._stream_handle:
@@ -145,8 +146,7 @@ class AuvCommonParser(SimpleParser):
                             timestamp = compute_timestamp(parts)
                             if timestamp > EARLIEST_TIMESTAMP:  # Check to make sure the timestamp is OK
 
-                                particle = self._extract_sample(particle_class, None, parts, timestamp)
-                                self._record_buffer.append(particle)
+                                yield self._extract_sample(particle_class, None, parts, timestamp)
                         except Exception:
                             msg = 'Could not compute timestamp'
                             log.warn(msg)
@@ -10,8 +10,9 @@
 __author__ = 'mworden'
 __license__ = 'Apache 2.0'
 
-import copy
 import re
+import sre_constants
+import sre_parse
 
 from mi.core.log import get_logger
 log = get_logger()
@@ -1432,6 +1433,68 @@ PARTICLE_DATA_PARAM_VALUE_INDEX = 1
 
 # The following is a list of regular expressions for lines in the file to ignore.
 IGNORE_REGEX_LIST = [r'CI_SYS_STAT.status=.*', 'CI_SYS_STAT.last_update=.*', END_OF_LINE_REGEX]
+IGNORE_MATCHERS = [re.compile(regex) for regex in IGNORE_REGEX_LIST]
+
+# The most line keys whose candidate rules are kept
+MAX_DISPATCH_KEYS = 1024
+
+
+def regex_head(regex):
+    """
+    Get the literal start of a regex
+    @param regex The regex pattern
+    @retval Tuple of the characters the regex starts with, None for a character matched by '.'
+    """
+    head = []
+    for op, av in sre_parse.parse(regex):
+        if op == sre_constants.LITERAL:
+            head.append(chr(av))
+        elif op == sre_constants.ANY:
+            head.append(None)
+        else:
+            break
+    return tuple(head)
+
+
+class ParamRuleDispatcher(object):
+    """
+    Finds the rules of PARAM_REGEX_RULES_AND_VALUES which can match a line from the key of the
+    line, the text up to its first '='.  The literal start of each rule's regex is compared
+    with the key, and the rules which agree with it are kept by key, so a line is only matched
+    against the regexes of its own parameter instead of trying every rule in turn.
+    """
+
+    def __init__(self, param_regex_rules_and_values):
+        """
+        @param param_regex_rules_and_values The (regex, param rules and values, expected instances) rules
+        """
+        # the compiled rules, in the order they are tried
+        self.rules = [(re.compile(regex), param_rules_and_values, expected_instances)
+                      for regex, param_rules_and_values, expected_instances in param_regex_rules_and_values]
+
+        self._heads = [regex_head(regex)
+                       for regex, param_rules_and_values, expected_instances in param_regex_rules_and_values]
+        self._candidates = {}
+
+    def candidates(self, line):
+        """
+        @param line The line of the file
+        @retval The indices, in order, of the rules whose regex can match the line
+        """
+        key = line[:line.find('=') + 1] or line
+
+        try:
+            return self._candidates[key]
+        except KeyError:
+            candidates = tuple(index for index, head in enumerate(self._heads)
+                               if all(head_char is None or head_char == key_char
+                                      for head_char, key_char in zip(head, key)))
+            if len(self._candidates) < MAX_DISPATCH_KEYS:
+                self._candidates[key] = candidates
+            return candidates
+
+
+PARAM_RULE_DISPATCHER = ParamRuleDispatcher(PARAM_REGEX_RULES_AND_VALUES)
 
 
 class CgCpmEngCpmDataParticle(DataParticle):
@@ -1596,8 +1659,9 @@ class CgCpmEngCpmParser(SimpleParser):
 
         param_rules_and_values_dict = dict()
 
-        # Initialize a working copy of the PARAM_REGEX_RULES_AND_VALUES which we will modify
-        param_regex_rules_and_values = copy.deepcopy(PARAM_REGEX_RULES_AND_VALUES)
+        # The indices of the rules expecting one instance which have been matched, these rules
+        # are no longer tried
+        matched_rules = set()
 
         # Read the first line in the file
         line = self._stream_handle.readline()
@@ -1609,66 +1673,48 @@ class CgCpmEngCpmParser(SimpleParser):
 
             match_found = False
 
-            # Init the index at -1, since we will increment it on entry into the loop
-            index = -1
+            # Iterate through the rules which can match the line, in the order of the list containing
+            # the regex, param rules and values and expected instance info.
+            for index in PARAM_RULE_DISPATCHER.candidates(line):
 
-            # Iterate through the list containing the regex, param rules and values and expected instance
-            # info.  The list will be modified within the loop. Cases where the expected number of instances 
-            # is ONE will result in popping the item off the list to eliminate unnecessary regex match checking.
-            for regex, param_rules_and_values, expected_instances in \
-                    param_regex_rules_and_values:
+                if index in matched_rules:
+                    continue
 
-                index += 1
+                matcher, param_rules_and_values, expected_instances = PARAM_RULE_DISPATCHER.rules[index]
 
-                match = re.match(regex, line)
+                match = matcher.match(line)
                 if match:
 
                     # Set a flag indicating we found a match
                     match_found = True
 
-                    # Get the match group dictionary 
+                    # Get the match group dictionary
                     match_group_dict = match.groupdict()
 
-                    # Iterate through each param, rule and value in the list to process
+                    # Iterate through each param and rule in the list to process
                     for param_rule_and_value in param_rules_and_values:
 
-                        # Assigning the param name to a variable to for clarity
+                        # Assigning the param name and encoding to variables for clarity
                         param_name = param_rule_and_value[PARAM_REGEX_RULES_AND_VALUES_PARAM_NAME_INDEX]
+                        encoding = param_rule_and_value[PARAM_REGEX_RULES_AND_VALUES_PARAM_ENCODING_INDEX]
 
                         # Get the match group param value associated with the param name
                         value = match_group_dict.get(param_name)
 
-                        # Update the value to the param in the working data structure
-                        param_rule_and_value[PARAM_REGEX_RULES_AND_VALUES_PARAM_VALUE_INDEX] = value
-
-                        # Copy the param rule and value portion into its own list
-                        param_rule_and_value_copy = copy.deepcopy(
-                            param_rule_and_value[PARAM_REGEX_RULES_AND_VALUES_PARAM_ENCODING_INDEX:
-                            PARAM_REGEX_RULES_AND_VALUES_NUM_PARAM_INDICES])
-
                         # Are we dealing with only one expected instance?
                         if expected_instances == ExpectedInstancesEnum.ONE:
-                            # Convert the list to a tuple and save
-                            data_particle_tuple = tuple(param_rule_and_value_copy)
+                            data_particle_tuple = (encoding, value)
 
                         # OK.  We are expecting many.
                         else:
                             # Let's first check to see if the param_rules_and_values_dict already
                             # has a key that matches the param_name
-                            if not param_rules_and_values_dict.has_key(param_name):
-
-                                value_list = []
+                            if param_name not in param_rules_and_values_dict:
 
-                                # Create a tuple containing the encoding and an empty list
-                                data_particle_tuple =  \
-                                    (param_rule_and_value_copy[
-                                        PARTICLE_DATA_PARAM_ENCODING_INDEX], value_list)
+                                # Create a tuple containing the encoding and a list holding the value
+                                data_particle_tuple = (encoding, [value])
 
-                                # Now insert the value into the list within the tuple
-                                value_list.append(param_rule_and_value_copy[
-                                    PARTICLE_DATA_PARAM_VALUE_INDEX])
-
-                            # OK.  So we did not find an entry in the dictionary
+                            # OK.  So we found an entry in the dictionary
                             else:
 
                                 # Assigning the tuple to a variable for clarity
@@ -1677,7 +1723,7 @@ class CgCpmEngCpmParser(SimpleParser):
                                 # If the value is not None, let's process it
                                 if value is not None:
 
-                                    # Assigning the vaule list to a variable for clarity
+                                    # Assigning the value list to a variable for clarity
                                     value_list = data_particle_tuple[PARTICLE_DATA_PARAM_VALUE_INDEX]
 
                                     # If we found a None in the list, let's remove it.  The None value
@@ -1695,24 +1741,21 @@ class CgCpmEngCpmParser(SimpleParser):
                         # _extract_sample
                         param_rules_and_values_dict[param_name] = data_particle_tuple
 
-                    # If the number of expected instances was one, let's remove the entry so we don't
-                    # keep looking for it
+                    # If the number of expected instances was one, let's note the rule was matched so we
+                    # don't keep looking for it
                     if expected_instances == ExpectedInstancesEnum.ONE:
-
                         log.trace("Dropping regex, rules and value entry")
-                        # Done with that tuple, remove it
-                        param_regex_rules_and_values.pop(index)
+                        matched_rules.add(index)
 
-                    # Exit the loop.  We're done iterating through the param_regex_rules_and_values
-                    # for this line in the file.
+                    # Exit the loop.  We're done iterating through the rules for this line in the file.
                     break
 
             # If we did not find a match, let's iterate through the ignore regex list
             if not match_found:
 
-                for regex in IGNORE_REGEX_LIST:
+                for matcher in IGNORE_MATCHERS:
 
-                    if re.match(regex, line):
+                    if matcher.match(line):
                         match_found = True
                         log.trace("Expected data to ignore: %r", line)
 
@@ -1727,8 +1770,9 @@ class CgCpmEngCpmParser(SimpleParser):
 
         # fill in any missing expected values so long as one value was present
         if param_rules_and_values_dict:
-            for regex, param_rules_and_values, expected_instances in param_regex_rules_and_values:
-                if expected_instances == ExpectedInstancesEnum.ONE:
+            for index, (regex, param_rules_and_values, expected_instances) in \
+                    enumerate(PARAM_REGEX_RULES_AND_VALUES):
+                if expected_instances == ExpectedInstancesEnum.ONE and index not in matched_rules:
                     for param_rule_and_value in param_rules_and_values:
                         param_name, encoding, value = param_rule_and_value
                         param_rules_and_values_dict[param_name] = (encoding, value)
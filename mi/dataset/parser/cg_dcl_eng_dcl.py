@@ -20,10 +20,16 @@ from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.dataset.dataset_parser import SimpleParser, DataSetDriverConfigKeys
 from mi.dataset.parser.common_regexes import END_OF_LINE_REGEX, \
     DATE_YYYY_MM_DD_REGEX, TIME_HR_MIN_SEC_MSEC_REGEX, INT_REGEX, \
-    TIME_HR_MIN_SEC_REGEX, FLOAT_REGEX, ASCII_HEX_CHAR_REGEX
+    TIME_HR_MIN_SEC_REGEX, ASCII_HEX_CHAR_REGEX
 
 from mi.dataset.parser import utilities
 
+# The floats of common_regexes.FLOAT_REGEX, which splits the digits of a float between its two
+# alternatives in every possible way before giving up on a record, so a SUPERV record with its 50
+# floats could take minutes to not match. The digits are matched in a single way here, so a record
+# matches, with the same groups, or fails in linear time.
+FLOAT_REGEX = r'(?:[+-]?[0-9])+\.[0-9]+'
+
 
 class CgDclEngDclParticleClassTypes(BaseEnum):
     """
@@ -198,6 +204,32 @@ CHANNEL_V_REGEX = r'channel_\d_v'
 CHANNEL_I_REGEX = r'channel_\d_i'
 CHANNEL_ERROR_STATUS_REGEX = r'channel_\d_error_status'
 
+"""
+The list parameter each channel parameter is gathered in, in the order the keys are classified
+"""
+CHANNEL_LIST_MATCHERS = [
+    (CgDclEngDclParserDataParticleKey.CHANNEL_STATE, re.compile(CHANNEL_STATE_REGEX)),
+    (CgDclEngDclParserDataParticleKey.CHANNEL_V, re.compile(CHANNEL_V_REGEX)),
+    (CgDclEngDclParserDataParticleKey.CHANNEL_I, re.compile(CHANNEL_I_REGEX)),
+    (CgDclEngDclParserDataParticleKey.CHANNEL_ERROR_STATUS, re.compile(CHANNEL_ERROR_STATUS_REGEX)),
+]
+
+# the list parameter of each key classified, None if it is not a channel parameter
+_channel_list_params = {}
+
+
+def channel_list_param(key):
+    """
+    Get the list parameter a superv particle key is gathered in, each key is only classified once
+    @param key The particle key
+    @retval The list parameter, None if the key is not a channel parameter
+    """
+    try:
+        return _channel_list_params[key]
+    except KeyError:
+        list_param = next((param for param, matcher in CHANNEL_LIST_MATCHERS if matcher.match(key)), None)
+        return _channel_list_params.setdefault(key, list_param)
+
 """
 Channel parameters used in encoding rules and the superv regex
 """
@@ -725,6 +757,139 @@ DLOG_AARM_REGEX = r'(?P<' + CgDclEngDclParserDataParticleKey.HEADER_TIMESTAMP +
 IGNORE_REGEX = r'(' + END_OF_LINE_REGEX + '|' + DATE_YYYY_MM_DD_REGEX + '\s+' + \
                TIME_HR_MIN_SEC_MSEC_REGEX + '\s+MSG\s+D_CTL\s+.*' + END_OF_LINE_REGEX + '?)'
 
+# Regex matching the log type of the MSG, ERR/ALM/WNG and DAT records, as the log type regexes
+# above do, to the group named after the log type
+LOG_TYPE_REGEX = DATE_YYYY_MM_DD_REGEX + '\s+' + TIME_HR_MIN_SEC_MSEC_REGEX + \
+                 '\s+(?:(?P<MSG>MSG\s+D_STATUS\s+(?:STATUS|CPU\s+Uptime):)|(?P<ERR>(?:ERR|ALM|WNG))|(?P<DAT>DAT))'
+LOG_TYPE_MATCHER = re.compile(LOG_TYPE_REGEX)
+
+# the fixed positions of the log type and subsystem tag in a record,
+# 2013/12/20 01:30:45.503 DAT D_GPS 2013/12/20 01:30:44.848 GPS ...
+LOG_TYPE_START = 24
+LOG_TYPE_END = 27
+SUBSYSTEM_TAG_START = 28
+
+DLOGP_TAGS = ['DLOGP%d' % port for port in range(10)]
+
+
+class CgDclEngDclRecordType(object):
+    """
+    A type of cg_dcl_eng_dcl record, with the log types and subsystem tags it is routed by
+    """
+    def __init__(self, name, regex, particle_class_type, log_types, tags=None, marker=None):
+        """
+        @param name The name of the record type
+        @param regex The regex matching a record
+        @param particle_class_type The CgDclEngDclParticleClassTypes of the particles
+        @param log_types The log types of the records
+        @param tags The subsystem tags of the records, None for any tag
+        @param marker The literal following the tag, telling apart the record types of a tag
+        """
+        self.name = name
+        self.matcher = re.compile(regex)
+        self.particle_class_type = particle_class_type
+        self.log_types = log_types
+        self.tags = tags
+        self.marker = marker
+
+
+# the record types of each log type, in the order they are matched, with the message for an invalid record
+RECORD_TYPES = {
+    'MSG': ([
+        CgDclEngDclRecordType('msg_counts_match', MSG_COUNTS_REGEX,
+                              CgDclEngDclParticleClassTypes.MSG_COUNTS_PARTICLE_CLASS,
+                              ['MSG'], ['D_STATUS'], 'STATUS:'),
+        CgDclEngDclRecordType('cpu_uptime_match', CPU_UPTIME_REGEX,
+                              CgDclEngDclParticleClassTypes.CPU_UPTIME_PARTICLE_CLASS,
+                              ['MSG'], ['D_STATUS'], 'CPU'),
+    ], "Invalid MSG Log record, Line: "),
+    'ERR': ([
+        CgDclEngDclRecordType('error_match', ERROR_REGEX,
+                              CgDclEngDclParticleClassTypes.ERROR_PARTICLE_CLASS,
+                              ['ERR', 'ALM', 'WNG']),
+    ], "Invalid ERR, ALM or WNG Log record, Line: "),
+    'DAT': ([
+        CgDclEngDclRecordType('gps_match', GPS_REGEX,
+                              CgDclEngDclParticleClassTypes.GPS_PARTICLE_CLASS,
+                              ['DAT'], ['D_GPS']),
+        CgDclEngDclRecordType('pps_match', PPS_REGEX,
+                              CgDclEngDclParticleClassTypes.PPS_PARTICLE_CLASS,
+                              ['DAT'], ['D_PPS']),
+        CgDclEngDclRecordType('superv_match', SUPERV_REGEX,
+                              CgDclEngDclParticleClassTypes.SUPERV_PARTICLE_CLASS,
+                              ['DAT'], ['SUPERV']),
+        CgDclEngDclRecordType('dlog_mgr_match', DLOG_MGR_REGEX,
+                              CgDclEngDclParticleClassTypes.DLOG_MGR_PARTICLE_CLASS,
+                              ['DAT'], ['DLOG_MGR']),
+        CgDclEngDclRecordType('dlog_status_match', DLOG_STATUS_REGEX,
+                              CgDclEngDclParticleClassTypes.DLOG_STATUS_PARTICLE_CLASS,
+                              ['DAT'], DLOGP_TAGS, 'istatus:'),
+        CgDclEngDclRecordType('d_status_ntp_match', D_STATUS_NTP_REGEX,
+                              CgDclEngDclParticleClassTypes.STATUS_PARTICLE_CLASS,
+                              ['DAT'], ['D_STATUS']),
+        CgDclEngDclRecordType('sea_state_match', DLOG_AARM_REGEX,
+                              CgDclEngDclParticleClassTypes.DLOG_AARM_PARTICLE_CLASS,
+                              ['DAT'], DLOGP_TAGS, '3DM'),
+    ], "Invalid DAT Log record, Line: "),
+}
+
+# the record types of each (log type, subsystem tag), the tag None for the record types of any tag
+RECORD_ROUTES = {}
+for _record_types, _message in RECORD_TYPES.values():
+    for _record_type in _record_types:
+        for _log_type in _record_type.log_types:
+            for _tag in _record_type.tags or [None]:
+                RECORD_ROUTES.setdefault((_log_type, _tag), []).append(_record_type)
+
+
+def route_record(line):
+    """
+    Get the record type of a line from its log type and subsystem tag, read at their fixed positions
+    @param line The line
+    @retval The record type whose regex is the only one which may match the line, None if there is none
+    """
+    log_type = line[LOG_TYPE_START:LOG_TYPE_END]
+    tag_end = line.find(' ', SUBSYSTEM_TAG_START)
+    record_types = RECORD_ROUTES.get((log_type, line[SUBSYSTEM_TAG_START:tag_end])) or \
+        RECORD_ROUTES.get((log_type, None))
+    if not record_types:
+        return None
+
+    for record_type in record_types:
+        if record_type.marker is None or line.startswith(record_type.marker, tag_end + 1):
+            return record_type
+    return None
+
+
+def match_record(line):
+    """
+    Match a line to its record type. The regex of the record type a line is routed to is matched first,
+    only when it does not match are the log type and each record type of the log type matched in order.
+    The records of a log type are told apart by their tags, so a line matched by the regex of its route
+    is not matched by any record type before it.
+    @param line The line
+    @retval (record type, match, None) of a record, (None, None, message) of an invalid record of
+    a log type, (None, None, None) if the line is not a record
+    """
+    record_type = route_record(line)
+    if record_type is not None:
+        match = record_type.matcher.match(line)
+        if match is not None:
+            return record_type, match, None
+
+    log_type_match = LOG_TYPE_MATCHER.match(line)
+    if log_type_match is None:
+        return None, None, None
+
+    routed_record_type = record_type
+    record_types, message = RECORD_TYPES[log_type_match.lastgroup]
+    for record_type in record_types:
+        match = record_type.matcher.match(line) if record_type is not routed_record_type else None
+        if match is not None:
+            return record_type, match, None
+
+    return None, None, message
+
 
 class CgDclEngDclDataParticle(DataParticle):
     """
@@ -847,10 +1012,7 @@ class CgDclEngDclSupervDataParticle(CgDclEngDclDataParticle):
         """
         result = []
 
-        channel_states = []
-        channel_vs = []
-        channel_is = []
-        channel_error_statuses = []
+        channel_lists = dict((list_param, []) for list_param, matcher in CHANNEL_LIST_MATCHERS)
 
         # IMPORTANT: The keys must be sorted in order for the list of channel data to
         # be correctly ordered.
@@ -870,30 +1032,15 @@ class CgDclEngDclSupervDataParticle(CgDclEngDclDataParticle):
                     if bit_field != ERROR_BIT_NOT_USED:
                         result.append(self._encode_value(bit_field, bit, ENCODING_RULES_DICT[bit_field]))
 
-            elif re.match(CHANNEL_STATE_REGEX, key):
-
-                channel_states.append(ENCODING_RULES_DICT[key](self.raw_data[key]))
-            elif re.match(CHANNEL_V_REGEX, key):
-
-                channel_vs.append(ENCODING_RULES_DICT[key](self.raw_data[key]))
-            elif re.match(CHANNEL_I_REGEX, key):
-
-                channel_is.append(ENCODING_RULES_DICT[key](self.raw_data[key]))
-            elif re.match(CHANNEL_ERROR_STATUS_REGEX, key):
+            elif channel_list_param(key) is not None:
 
-                channel_error_statuses.append(ENCODING_RULES_DICT[key](self.raw_data[key]))
+                channel_lists[channel_list_param(key)].append(ENCODING_RULES_DICT[key](self.raw_data[key]))
             else:
 
                 result.append(self._encode_value(key, self.raw_data[key], ENCODING_RULES_DICT[key]))
 
-        result.append(self._encode_value(CgDclEngDclParserDataParticleKey.CHANNEL_STATE,
-                                         channel_states, list))
-        result.append(self._encode_value(CgDclEngDclParserDataParticleKey.CHANNEL_V,
-                                         channel_vs, list))
-        result.append(self._encode_value(CgDclEngDclParserDataParticleKey.CHANNEL_I,
-                                         channel_is, list))
-        result.append(self._encode_value(CgDclEngDclParserDataParticleKey.CHANNEL_ERROR_STATUS,
-                                         channel_error_statuses, list))
+        for list_param, matcher in CHANNEL_LIST_MATCHERS:
+            result.append(self._encode_value(list_param, channel_lists[list_param], list))
 
         return result
 
@@ -1035,26 +1182,8 @@ class CgDclEngDclParser(SimpleParser):
 
         try:
             particle_classes_dict = config[DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT]
-            self._msg_counts_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.MSG_COUNTS_PARTICLE_CLASS]
-            self._cpu_uptime_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.CPU_UPTIME_PARTICLE_CLASS]
-            self._error_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.ERROR_PARTICLE_CLASS]
-            self._gps_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.GPS_PARTICLE_CLASS]
-            self._pps_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.PPS_PARTICLE_CLASS]
-            self._superv_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.SUPERV_PARTICLE_CLASS]
-            self._dlog_mgr_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.DLOG_MGR_PARTICLE_CLASS]
-            self._dlog_status_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.DLOG_STATUS_PARTICLE_CLASS]
-            self._status_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.STATUS_PARTICLE_CLASS]
-            self._dlog_aarm_particle_class = particle_classes_dict[
-                CgDclEngDclParticleClassTypes.DLOG_AARM_PARTICLE_CLASS]
+            self._particle_classes = dict((particle_class_type, particle_classes_dict[particle_class_type])
+                                          for particle_class_type in CgDclEngDclParticleClassTypes.list())
 
         except (KeyError, AttributeError):
             message = "Invalid cg_dcl_eng_dcl configuration parameters."
@@ -1077,119 +1206,20 @@ class CgDclEngDclParser(SimpleParser):
 
             log.trace("Line: %s", line)
 
-            # Let's first see if we have a MSG log message
-            if re.match(MSG_LOG_TYPE_REGEX, line):
-
-                msg_counts_match = re.match(MSG_COUNTS_REGEX, line)
-                cpu_uptime_match = re.match(CPU_UPTIME_REGEX, line)
-
-                if msg_counts_match is not None:
-                    log.trace("msg_counts_match: %s", msg_counts_match.groupdict())
-
-                    sample = self._extract_sample(self._msg_counts_particle_class,
-                                                  None,
-                                                  msg_counts_match.groupdict(),
-                                                  None)
-
-                elif cpu_uptime_match is not None:
-                    log.trace("cpu_uptime_match: %s", cpu_uptime_match.groupdict())
-
-                    sample = self._extract_sample(self._cpu_uptime_particle_class,
-                                                  None,
-                                                  cpu_uptime_match.groupdict(),
-                                                  None)
-
-                else:
-                    message = "Invalid MSG Log record, Line: " + line
-                    log.error(message)
-                    self._exception_callback(UnexpectedDataException(message))
-
-            elif re.match(ERR_ALM_WNG_LOG_TYPE_REGEX, line):
-
-                error_match = re.match(ERROR_REGEX, line)
-
-                if error_match is not None:
-                    log.trace("error_match: %s", error_match.groupdict())
-
-                    sample = self._extract_sample(self._error_particle_class,
-                                                  None,
-                                                  error_match.groupdict(),
-                                                  None)
-                else:
-                    message = "Invalid ERR, ALM or WNG Log record, Line: " + line
-                    log.error(message)
-                    self._exception_callback(UnexpectedDataException(message))
+            record_type, match, invalid_message = match_record(line)
 
-            elif re.match(DAT_LOG_TYPE_REGEX, line):
+            if record_type is not None:
+                log.trace("%s: %s", record_type.name, match.groupdict())
 
-                gps_match = re.match(GPS_REGEX, line)
-                pps_match =  re.match(PPS_REGEX, line)
-                superv_match =  re.match(SUPERV_REGEX, line)
-                dlog_mgr_match = re.match(DLOG_MGR_REGEX, line)
-                dlog_status_match = re.match(DLOG_STATUS_REGEX, line)
-                d_status_ntp_match = re.match(D_STATUS_NTP_REGEX, line)
-                dlog_aarm_match = re.match(DLOG_AARM_REGEX, line)
+                sample = self._extract_sample(self._particle_classes[record_type.particle_class_type],
+                                              None,
+                                              match.groupdict(),
+                                              None)
 
-                if gps_match is not None:
-                    log.trace("gps_match: %s", gps_match.groupdict())
-
-                    sample = self._extract_sample(self._gps_particle_class,
-                                                  None,
-                                                  gps_match.groupdict(),
-                                                  None)
-
-                elif pps_match is not None:
-                    log.trace("pps_match: %s", pps_match.groupdict())
-
-                    sample = self._extract_sample(self._pps_particle_class,
-                                                  None,
-                                                  pps_match.groupdict(),
-                                                  None)
-
-                elif superv_match is not None:
-                    log.trace("superv_match: %s", superv_match.groupdict())
-
-                    sample = self._extract_sample(self._superv_particle_class,
-                                                  None,
-                                                  superv_match.groupdict(),
-                                                  None)
-
-                elif dlog_mgr_match is not None:
-                    log.trace("dlog_mgr_match: %s", dlog_mgr_match.groupdict())
-
-                    sample = self._extract_sample(self._dlog_mgr_particle_class,
-                                                  None,
-                                                  dlog_mgr_match.groupdict(),
-                                                  None)
-
-                elif dlog_status_match is not None:
-                    log.trace("dlog_status_match: %s", dlog_status_match.groupdict())
-
-                    sample = self._extract_sample(self._dlog_status_particle_class,
-                                                  None,
-                                                  dlog_status_match.groupdict(),
-                                                  None)
-
-                elif d_status_ntp_match is not None:
-                    log.trace("d_status_ntp_match: %s", d_status_ntp_match.groupdict())
-
-                    sample = self._extract_sample(self._status_particle_class,
-                                                  None,
-                                                  d_status_ntp_match.groupdict(),
-                                                  None)
-
-                elif dlog_aarm_match is not None:
-                    log.trace("sea_state_match: %s", dlog_aarm_match.groupdict())
-
-                    sample = self._extract_sample(self._dlog_aarm_particle_class,
-                                                  None,
-                                                  dlog_aarm_match.groupdict(),
-                                                  None)
-
-                else:
-                    message = "Invalid DAT Log record, Line: " + line
-                    log.error(message)
-                    self._exception_callback(UnexpectedDataException(message))
+            elif invalid_message is not None:
+                message = invalid_message + line
+                log.error(message)
+                self._exception_callback(UnexpectedDataException(message))
 
             else:
                 log.debug("Non-match .. ignoring line: %r", line)
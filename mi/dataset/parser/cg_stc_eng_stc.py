@@ -22,7 +22,7 @@ from mi.core.common import BaseEnum
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.exceptions import SampleException, DatasetParserException, SampleEncodingException
 from mi.dataset.dataset_parser import Parser
-from mi.dataset.param_dict import DatasetParameterDict
+from mi.dataset.param_dict import DatasetParameterDict, DatasetParameterSchema
 
 class CgDataParticleType(BaseEnum):
     TELEMETERED = 'cg_stc_eng_stc'
@@ -345,6 +345,9 @@ class CgStcEngStcParserDataAbstractParticle(DataParticle):
     """
     _data_particle_type = None
 
+    # the compiled parameters, built once for each particle class
+    _param_schema = None
+
     def _build_parsed_values(self):
         """
         Take something in the data format and turn it into
@@ -352,19 +355,23 @@ class CgStcEngStcParserDataAbstractParticle(DataParticle):
         @throws SampleException If there is a problem with sample creation
         """
         result = []
-        # Instantiate the param_dict 
-        params = self._build_param_dict()
-        
-        # Go through the param_dict dictionary for every definition
-        params.update(self.raw_data)
-        encoding_errors = params.get_encoding_errors()
-        self._encoding_errors = encoding_errors
-        all_params = params.get_all()
+        # Go through the compiled param_dict for every definition
+        all_params, self._encoding_errors = self._get_param_schema().extract(self.raw_data)
         for (key, value) in all_params.iteritems():
             result.append({DataParticleKey.VALUE_ID: key, DataParticleKey.VALUE: value})
         log.debug("CgStcEngStcParserDataParticle %s", result)
         return result
 
+    def _get_param_schema(self):
+        """
+        Get the compiled parameter schema of this particle class, the param_dict
+        is only built and its regexes compiled for the first particle.
+        """
+        particle_class = type(self)
+        if particle_class.__dict__.get('_param_schema') is None:
+            particle_class._param_schema = DatasetParameterSchema(self._build_param_dict())
+        return particle_class._param_schema
+
     def _build_param_dict(self):
         """
         Populate the parameter dictionary with cg_stc_eng_stc parameters.
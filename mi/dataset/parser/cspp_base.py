@@ -13,7 +13,6 @@ initial release
 __author__ = 'Mark Worden'
 __license__ = 'Apache 2.0'
 
-from functools import partial
 import copy
 import re
 import string
@@ -24,7 +23,7 @@ from mi.core.common import BaseEnum
 from mi.core.exceptions import DatasetParserException, \
     UnexpectedDataException, RecoverableSampleException, \
     ConfigurationException
-from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.chunker import RegexSieve
 from mi.core.instrument.data_particle import DataParticle
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.dataset_parser import BufferLoadingParser
@@ -265,8 +264,7 @@ class CsppParser(BufferLoadingParser):
         super(CsppParser, self).__init__(config,
                                          stream_handle,
                                          None,
-                                         partial(StringChunker.regex_sieve_function,
-                                                 regex_list=[SIEVE_MATCHER]),
+                                         RegexSieve([SIEVE_MATCHER], end_marker='\n'),
                                          lambda state, ingested: None,
                                          lambda data: None,
                                          exception_callback)
@@ -45,6 +45,7 @@ from mi.dataset.dataset_parser import SimpleParser
 
 from mi.dataset.parser.common_regexes import \
     END_OF_LINE_REGEX, ANY_CHARS_REGEX, ASCII_HEX_CHAR_REGEX
+from mi.dataset.parser.hex_decoder import HexField, HexRecordLayout
 
 # Basic patterns
 
@@ -109,6 +110,18 @@ ENDURANCE_DATA_REGEX += r'(?P<ctd_time>' + ASCII_HEX_CHAR_REGEX + '{8})' + END_O
 
 ENDURANCE_DATA_MATCHER = re.compile(ENDURANCE_DATA_REGEX, re.VERBOSE)
 
+# The fields of the data records of each matcher, decoded at once
+PIONEER_DATA_FIELDS = [
+    HexField('temperature', 0, 6),
+    HexField('conductivity', 6, 6),
+    HexField('pressure', 12, 6),
+    HexField('pressure_temp', 18, 4)
+]
+DATA_LAYOUTS = {
+    PIONEER_DATA_MATCHER: HexRecordLayout(PIONEER_DATA_FIELDS + [HexField('ctd_time', 22, 8)]),
+    ENDURANCE_DATA_MATCHER: HexRecordLayout(PIONEER_DATA_FIELDS + [HexField('ctd_time', 28, 8)])
+}
+
 
 class DataParticleType(BaseEnum):
     """
@@ -141,8 +154,11 @@ class CtdbpCdefInstrumentDataParticle(DataParticle):
         # the data contains seconds since Jan 1, 2000. Need the number of seconds before that
         seconds_till_jan_1_2000 = calendar.timegm(JAN_1_2000)
 
+        # convert all the hex fields of the record, the layout is that of the matcher of the record
+        self._values = DATA_LAYOUTS[self.raw_data.re].decode(self.raw_data.group(0))
+
         # calculate the internal timestamp
-        ctd_time = int(self.raw_data.group('ctd_time'), 16)
+        ctd_time = self._values['ctd_time']
         elapsed_seconds = seconds_till_jan_1_2000 + ctd_time
         self.set_internal_timestamp(unix_time=elapsed_seconds)
 
@@ -152,7 +168,7 @@ class CtdbpCdefInstrumentDataParticle(DataParticle):
         @throws SampleException If there is a problem with sample creation
         """
 
-        return [self._encode_value(name, self.raw_data.group(name), lambda x: int(x, 16))
+        return [self._encode_value(name, self._values[name], int)
                 for name in DATA_PARTICLE_MAP]
 
 
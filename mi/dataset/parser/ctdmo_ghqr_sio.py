@@ -28,6 +28,7 @@ import binascii
 import re
 import struct
 
+from mi.dataset.parser.hex_decoder import HexField, HexRecordLayout
 from mi.dataset.parser.utilities import zulu_timestamp_to_ntp_time
 
 from mi.core.log import get_logger
@@ -187,6 +188,16 @@ class CtdmoInstrumentDataParticleKey(BaseEnum):
     CTD_TIME = "ctd_time"
 
 
+# The fields of the telemetered science data converted to hex ascii, 7 binary bytes
+# holding 5 hex digits each of temperature and conductivity and a 2 byte pressure
+# field in reverse byte order.
+TEL_CT_SCIENCE_LAYOUT = HexRecordLayout([
+    HexField(CtdmoInstrumentDataParticleKey.TEMPERATURE, 0, 5),
+    HexField(CtdmoInstrumentDataParticleKey.CONDUCTIVITY, 5, 5),
+    HexField(CtdmoInstrumentDataParticleKey.PRESSURE, 10, 4, little_endian=True)
+])
+
+
 class CtdmoGhqrRecoveredInstrumentDataParticle(DataParticle):
     """
     Class for generating Instrument Data Particles from Recovered data.
@@ -275,8 +286,7 @@ class CtdmoGhqrSioTelemeteredInstrumentDataParticle(DataParticle):
             # 7 binary bytes get turned into 14 hex ascii bytes.
             # The 2 byte pressure field is in reverse byte order.
             #
-            science_data = binascii.b2a_hex(self.raw_data[RAW_INDEX_TEL_CT_SCIENCE])
-            pressure = science_data[12:14] + science_data[10:12]
+            science_data = TEL_CT_SCIENCE_LAYOUT.decode(binascii.b2a_hex(self.raw_data[RAW_INDEX_TEL_CT_SCIENCE]))
 
         except (ValueError, TypeError, IndexError) as ex:
             log.warn("Error (%s) while decoding parameters in data: [%s]", ex, self.raw_data)
@@ -292,14 +302,14 @@ class CtdmoGhqrSioTelemeteredInstrumentDataParticle(DataParticle):
                                self.raw_data[RAW_INDEX_TEL_CT_ID])[0],
                                int),
             self._encode_value(CtdmoInstrumentDataParticleKey.TEMPERATURE,
-                               science_data[0:5],
-                               convert_hex_ascii_to_int),
+                               science_data[CtdmoInstrumentDataParticleKey.TEMPERATURE],
+                               int),
             self._encode_value(CtdmoInstrumentDataParticleKey.CONDUCTIVITY,
-                               science_data[5:10],
-                               convert_hex_ascii_to_int),
+                               science_data[CtdmoInstrumentDataParticleKey.CONDUCTIVITY],
+                               int),
             self._encode_value(CtdmoInstrumentDataParticleKey.PRESSURE,
-                               pressure,
-                               convert_hex_ascii_to_int),
+                               science_data[CtdmoInstrumentDataParticleKey.PRESSURE],
+                               int),
             self._encode_value(CtdmoInstrumentDataParticleKey.CTD_TIME,
                                reversed_hex_time,
                                convert_hex_ascii_to_int)
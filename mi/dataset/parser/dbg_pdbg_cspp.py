@@ -15,7 +15,6 @@ __license__ = 'Apache 2.0'
 
 import copy
 import re
-from functools import partial
 import string
 import numpy
 
@@ -32,7 +31,7 @@ from mi.core.exceptions import \
 
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.dataset_parser import BufferLoadingParser
-from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.chunker import RegexSieve
 
 from mi.dataset.parser.cspp_base import \
     DEFAULT_HEADER_KEY_LIST, \
@@ -357,8 +356,7 @@ class DbgPdbgCsppParser(BufferLoadingParser):
         super(DbgPdbgCsppParser, self).__init__(config,
                                                 stream_handle,
                                                 None,
-                                                partial(StringChunker.regex_sieve_function,
-                                                        regex_list=[SIEVE_MATCHER]),
+                                                RegexSieve([SIEVE_MATCHER], end_marker='\n'),
                                                 lambda state, ingested: None,
                                                 lambda data: None,
                                                 exception_callback)
@@ -13,15 +13,15 @@ initial release
 __author__ = 'Ronald Ronquillo'
 __license__ = 'Apache 2.0'
 
-import calendar
 import re
-from functools import partial
+from itertools import islice
 
 from mi.core.log import get_logger
 log = get_logger()
-from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.chunker import RegexSieve
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.exceptions import UnexpectedDataException, InstrumentParameterException
+from mi.core.timestamp import day_start
 
 from mi.dataset.dataset_parser import BufferLoadingParser, DataSetDriverConfigKeys
 from mi.dataset.parser.common_regexes import END_OF_LINE_REGEX, SPACE_REGEX, \
@@ -58,6 +58,64 @@ SENSOR_GROUP_SECOND = 6
 SENSOR_GROUP_MILLISECOND = 7
 
 
+# inline flags and backreferences change meaning when a pattern is part of a larger one
+UNCOMBINABLE_MATCHER = re.compile(r'\(\?[iLmsux]+\)|\\[1-9]|\(\?P=')
+
+
+class MatcherDispatcher(object):
+    """
+    Tells which of several matchers matches a record with a single match of a regex having
+    each matcher's pattern as an alternative.  The alternatives are tried in order, so the
+    result is that of trying each matcher in turn, and the groups of the matching matcher
+    are taken out of the combined match.
+    """
+
+    def __init__(self, matchers):
+        """
+        @param matchers The compiled regexes, in the order they would be tried
+        """
+        patterns = []
+        # the matcher index and the slice of the groups of each alternative, by its group
+        self._alternatives = {}
+
+        group = 1
+        for index, matcher in enumerate(matchers):
+            patterns.append(START_GROUP + matcher.pattern + END_GROUP)
+            self._alternatives[group] = (index, group, group + matcher.groups)
+            group += matcher.groups + 1
+
+        self._matcher = re.compile('|'.join(patterns), matchers[0].flags)
+
+    @classmethod
+    def build(cls, matchers):
+        """
+        Build a dispatcher for matchers which can be combined
+        @param matchers The compiled regexes, in the order they would be tried
+        @retval The dispatcher, None if the patterns cannot be combined
+        """
+        if len(set(matcher.flags for matcher in matchers)) != 1 or \
+                any(UNCOMBINABLE_MATCHER.search(matcher.pattern) for matcher in matchers):
+            return None
+        try:
+            return cls(matchers)
+        except re.error:
+            return None
+
+    def match(self, record):
+        """
+        @param record The record to match
+        @retval (index of the first matcher matching the record, groups of its match),
+            (None, None) if none match
+        """
+        match = self._matcher.match(record)
+        if match is None:
+            return None, None
+
+        # the group of the alternative is the outermost, so it is the last index
+        index, start, end = self._alternatives[match.lastindex]
+        return index, match.groups()[start:end]
+
+
 class DclInstrumentDataParticle(DataParticle):
     """
     Class for generating the dcl instrument particle.
@@ -69,17 +127,14 @@ class DclInstrumentDataParticle(DataParticle):
 
         # The particle timestamp is the DCL Controller timestamp.
         # The individual fields have already been extracted by the parser.
-        timestamp = (
-            int(self.raw_data[SENSOR_GROUP_YEAR]),
-            int(self.raw_data[SENSOR_GROUP_MONTH]),
-            int(self.raw_data[SENSOR_GROUP_DAY]),
-            int(self.raw_data[SENSOR_GROUP_HOUR]),
-            int(self.raw_data[SENSOR_GROUP_MINUTE]),
-            float(self.raw_data[SENSOR_GROUP_SECOND] + "." +
-                  self.raw_data[SENSOR_GROUP_MILLISECOND]),
-            0, 0, 0)
-
-        elapsed_seconds = calendar.timegm(timestamp)
+        # The start of the day is cached, and counted from the first of the month as calendar.timegm does.
+        day_seconds = day_start(int(self.raw_data[SENSOR_GROUP_YEAR]),
+                                int(self.raw_data[SENSOR_GROUP_MONTH]),
+                                int(self.raw_data[SENSOR_GROUP_DAY]))[0]
+
+        elapsed_seconds = day_seconds + \
+            (int(self.raw_data[SENSOR_GROUP_HOUR]) * 60 + int(self.raw_data[SENSOR_GROUP_MINUTE])) * 60 + \
+            float(self.raw_data[SENSOR_GROUP_SECOND] + "." + self.raw_data[SENSOR_GROUP_MILLISECOND])
         self.set_internal_timestamp(unix_time=elapsed_seconds)
         self.instrument_particle_map = instrument_particle_map
 
@@ -130,14 +185,23 @@ class DclFileCommonParser(BufferLoadingParser):
             raise InstrumentParameterException("data matcher required")
         self.metadata_matcher = metadata_matcher
 
+        # Records which are whole lines are read a line at a time straight from the stream,
+        # without the chunker.  The position of the next line is kept as a byte count.
+        self._line_mode = record_matcher is RECORD_MATCHER
+        self._position = 0
+        # the parse_lines generator particles are taken from in line mode
+        self._line_iterator = None
+        # dispatcher of the sensor data matchers and the metadata matcher, set with the particle classes
+        self._dispatcher = None
+
         # No fancy sieve function needed for this parser.
-        # File is ASCII with records separated by newlines.
+        # File is ASCII with records separated by newlines, so only
+        # sieve again once a new line has come in.
         super(DclFileCommonParser, self).__init__(
             config,
             stream_handle,
             None,
-            partial(StringChunker.regex_sieve_function,
-                    regex_list=[record_matcher]),
+            RegexSieve([record_matcher], end_marker='\n'),
             *args, **kwargs)
 
     def handle_non_data(self, non_data, non_end, start):
@@ -152,25 +216,98 @@ class DclFileCommonParser(BufferLoadingParser):
                 "Found %d bytes of un-expected non-data %s" %
                 (len(non_data), non_data)))
 
-    def parse_chunks(self):
+    def get_records(self, num_records):
         """
-        Parse out any pending data chunks in the chunker.
-        If it is valid data, build a particle.
-        Go until the chunker has no more valid data.
-        @retval a list of tuples with sample particles encountered in this
+        Get particles from the file.  In line mode only the lines needed for the requested number of
+        particles are parsed, a line at a time, and the particles are handed out from the record buffer.
+        @param num_records The number of records to gather
+        @retval Return the list of particles requested, [] if none available
+        """
+        if not self._line_mode:
+            return super(DclFileCommonParser, self).get_records(num_records)
+
+        if num_records <= 0:
+            return []
+
+        if self._pending_exception is not None:
+            exception, self._pending_exception = self._pending_exception, None
+            raise exception
+
+        if self._line_iterator is None:
+            self._line_iterator = self.parse_lines()
+
+        try:
+            for record in islice(self._line_iterator, max(num_records - len(self._record_buffer), 0)):
+                self._record_buffer.append(record)
+            if len(self._record_buffer) < num_records:
+                self.file_complete = True
+        except Exception as e:
+            if not self._record_buffer:
+                raise
+            # hand out the particles parsed before the failure, the exception is raised on the next call
+            self._pending_exception = e
+
+        return self._yank_particles(num_records)
+
+    def parse_lines(self):
+        """
+        Generator parsing each line of the stream.  A last line without a newline is not a record,
+        and is left out as the chunker leaves it out.
+        @retval generator of tuples with sample particles encountered in this
             parsing, plus the state.
         """
-        result_particles = []
-        nd_timestamp, non_data, non_start, non_end = self._chunker.get_next_non_data_with_index(clean=False)
-        timestamp, chunk, start, end = self._chunker.get_next_data_with_index(clean=True)
-        self.handle_non_data(non_data, non_end, start)
+        self._set_particle_classes()
+
+        for line in self._stream_handle:
+            self._position += len(line)
+            if line.endswith('\n'):
+                particle = self.parse_record(line)
+                if particle is not None:
+                    yield particle, None
+            else:
+                log.debug("Ignoring %d bytes without a newline at position %d",
+                          len(line), self._position - len(line))
 
+    def _set_particle_classes(self):
         # If not set from config & no InstrumentParameterException error from constructor
         if self.particle_classes is None:
             self.particle_classes = (self._particle_class,)
 
-        while chunk:
+        if self._dispatcher is None:
+            self._build_dispatcher()
 
+    def _build_dispatcher(self):
+        """
+        Combine the sensor data matchers, in the order of their particle classes, and the metadata
+        matcher, so a record is matched once.  If they cannot be combined they are tried in turn.
+        """
+        # a class without its own data matcher uses the sensor data matcher
+        matchers = []
+        sensor_data_matcher = getattr(self, 'sensor_data_matcher', None)
+        for particle_class in self.particle_classes:
+            sensor_data_matcher = getattr(particle_class, 'data_matcher', sensor_data_matcher)
+            matchers.append(sensor_data_matcher)
+        if None not in matchers:
+            self._dispatcher = MatcherDispatcher.build(matchers + [self.metadata_matcher])
+
+    def parse_record(self, chunk):
+        """
+        Parse a record.  If it is valid sensor data, build a particle, metadata is ignored,
+        and anything else is reported as unknown data.
+        @param chunk The record, a line of the file
+        @retval The particle, None if there is none
+        """
+        if self._dispatcher is not None:
+            # one match tells which particle class applies, or if it is metadata
+            index, groups = self._dispatcher.match(chunk)
+            if index is not None and index < len(self.particle_classes):
+                return self._extract_sample(self.particle_classes[index],
+                                            None,
+                                            groups,
+                                            None)
+            meta_match = index
+
+        else:
             for particle_class in self.particle_classes:
                 if hasattr(particle_class, "data_matcher"):
                     self.sensor_data_matcher = particle_class.data_matcher
@@ -179,29 +316,46 @@ class DclFileCommonParser(BufferLoadingParser):
                 # use the extracted fields to generate a particle.
                 sensor_match = self.sensor_data_matcher.match(chunk)
                 if sensor_match is not None:
-                    break
-
-            if sensor_match is not None:
-                particle = self._extract_sample(particle_class,
+                    return self._extract_sample(particle_class,
                                                 None,
                                                 sensor_match.groups(),
                                                 None)
-                if particle is not None:
-                    result_particles.append((particle, None))
 
             # It's not a sensor data record, see if it's a metadata record.
-            else:
+            meta_match = self.metadata_matcher.match(chunk)
+
+        # If it's a valid metadata record, ignore it.
+        # Otherwise generate warning for unknown data.
+        if meta_match is None:
+            error_message = 'Unknown data found in chunk %s' % chunk
+            log.warn(error_message)
+            self._exception_callback(UnexpectedDataException(error_message))
+
+        return None
+
+    def parse_chunks(self):
+        """
+        Parse out any pending data chunks in the chunker.
+        If it is valid data, build a particle.
+        Go until the chunker has no more valid data.
+        @retval a list of tuples with sample particles encountered in this
+            parsing, plus the state.
+        """
+        result_particles = []
+        nd_timestamp, non_data, non_start, non_end = self._chunker.get_next_non_data_with_index(clean=False)
+        timestamp, chunk, start, end = self._chunker.get_next_data_with_index(clean=True)
+        self.handle_non_data(non_data, non_end, start)
+
+        self._set_particle_classes()
+
+        while chunk:
 
-                # If it's a valid metadata record, ignore it.
-                # Otherwise generate warning for unknown data.
-                meta_match = self.metadata_matcher.match(chunk)
-                if meta_match is None:
-                    error_message = 'Unknown data found in chunk %s' % chunk
-                    log.warn(error_message)
-                    self._exception_callback(UnexpectedDataException(error_message))
+            particle = self.parse_record(chunk)
+            if particle is not None:
+                result_particles.append((particle, None))
 
             nd_timestamp, non_data, non_start, non_end = self._chunker.get_next_non_data_with_index(clean=False)
             timestamp, chunk, start, end = self._chunker.get_next_data_with_index(clean=True)
             self.handle_non_data(non_data, non_end, start)
 
-        return result_particles
\ No newline at end of file
+        return result_particles
@@ -13,11 +13,10 @@ Initial Release
 __author__ = 'Rachel Manoni'
 __license__ = 'Apache 2.0'
 
-import calendar
 import csv
-import time
 import math
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
+from mi.core.timestamp import formatted_timestamp_to_unix_time
 from mi.dataset.dataset_parser import SimpleParser
 from mi.core.log import get_logger
 log = get_logger()
@@ -76,8 +75,7 @@ class FlobnCMDataParticle(DataParticle):
         super(FlobnCMDataParticle, self).__init__(raw_data, *args, **kwargs)
 
         # set timestamp
-        struct_time = time.strptime(self.raw_data[self.start_time_index], self.time_struct)
-        elapsed_seconds = calendar.timegm(struct_time)
+        elapsed_seconds = formatted_timestamp_to_unix_time(self.raw_data[self.start_time_index], self.time_struct)
         self.set_internal_timestamp(unix_time=elapsed_seconds)
 
     def _build_parsed_values(self):
@@ -10,6 +10,8 @@ __license__ = 'Apache 2.0'
 
 import re
 import ntplib
+from itertools import islice
+import numpy as np
 from math import copysign, isnan
 from mi.core.log import get_logger
 from mi.core.common import BaseEnum
@@ -21,6 +23,9 @@ from mi.dataset.dataset_parser import SimpleParser, DataSetDriverConfigKeys
 # start the logger
 log = get_logger()
 
+# number of data rows read into GliderColumns at a time in columnar mode
+COLUMNS_CHUNK_ROWS = 500
+
 
 class DataParticleType(BaseEnum):
     # Data particle types for the Open Ocean (aka Global) and Coastal gliders.
@@ -92,6 +97,9 @@ class GliderParticle(DataParticle):
             if value is None:
                 # this key was not present in this file, there is no value
                 result.append({DataParticleKey.VALUE_ID: key, DataParticleKey.VALUE: None})
+            elif not isinstance(value, basestring):
+                # the value was already converted using the type of its column
+                result.append({DataParticleKey.VALUE_ID: key, DataParticleKey.VALUE: value})
             elif ('_lat' in key or '_lon' in key) and value != 'NaN':
                 # special encoding for latitude and longitude
                 result.append(self._encode_value(key, value, GliderParticle._string_to_ddegrees))
@@ -837,6 +845,180 @@ class NutnrMDataParticle(GliderParticle):
         return self._parsed_values(NutnrMParticleKey.list())
 
 
+class ColumnType(BaseEnum):
+    """
+    Types of the columns in glider columnar data
+    """
+    INT = 'int'
+    FLOAT = 'float'
+    STRING = 'string'
+
+
+class GliderColumns(object):
+    """
+    Columnar copy of the data rows of a glider file. Numeric columns are held in
+    one float array with a row for each data row, the other columns are kept as
+    strings so they can be encoded per value by the particles. A numeric column is
+    an int column when none of its values is printed as a float, a float column when
+    all of them are, and is kept as strings when it has both, so the particle values
+    have the types of the per value encoding.
+    """
+
+    # number of bytes of the numeric sensors from the bytes label row
+    NUMERIC_BYTES = ['1', '2', '4', '8']
+
+    def __init__(self, labels, units, num_bytes):
+        """
+        @param labels list of column labels
+        @param units list of column units
+        @param num_bytes list of column sizes in bytes
+        """
+        self.labels = labels
+        self.index = dict((label, index) for index, label in enumerate(labels))
+        self.types = [self._column_type(label, unit, size) for label, unit, size in zip(labels, units, num_bytes)]
+        self.num_rows = 0
+        self.values = np.empty((0, len(labels)), dtype=np.float64)
+        self.strings = {}
+        self._value_masks = {}
+
+    def load(self, data_records, rows):
+        """
+        Load the data rows into the columns
+        @param data_records list of data record strings, each with a value for every column
+        @param rows list of the values of each data record split into strings
+        """
+        num_columns = len(self.labels)
+        self.num_rows = len(data_records)
+
+        tokens = np.array(rows, dtype=str).reshape(self.num_rows, num_columns)
+        values = np.fromstring(''.join(data_records), dtype=np.float64, sep=' ')
+
+        if values.size == self.num_rows * num_columns:
+            self.values = values.reshape(self.num_rows, num_columns)
+        else:
+            # conversion stops at the first value that is not a number, convert one column at a time
+            # and fall back to encoding the values one at a time in the columns which are not numbers
+            self.values = np.empty((self.num_rows, num_columns), dtype=np.float64)
+            self.values.fill(np.nan)
+
+            for index, column_type in enumerate(self.types):
+                if column_type != ColumnType.STRING:
+                    try:
+                        self.values[:, index] = tokens[:, index].astype(np.float64)
+                    except ValueError:
+                        self.types[index] = ColumnType.STRING
+
+        # infinite values are not valid particle values, leave them to the per value encoding
+        for index in np.flatnonzero(np.isinf(self.values).any(axis=0)):
+            self.types[index] = ColumnType.STRING
+
+        # the per value encoding takes a value printed with a '.' or 'e' as a float and any other as an int
+        numeric_indices = [index for index, column_type in enumerate(self.types)
+                           if column_type != ColumnType.STRING]
+        if numeric_indices:
+            numeric_tokens = tokens[:, numeric_indices]
+            printed_float = (np.char.find(numeric_tokens, '.') >= 0) | (np.char.find(numeric_tokens, 'e') >= 0)
+            has_value = ~np.isnan(self.values[:, numeric_indices])
+            any_float = (printed_float & has_value).any(axis=0)
+            any_int = (~printed_float & has_value).any(axis=0)
+
+            for position, index in enumerate(numeric_indices):
+                if any_float[position] and any_int[position]:
+                    self.types[index] = ColumnType.STRING
+                elif any_int[position]:
+                    self.types[index] = ColumnType.INT
+                else:
+                    self.types[index] = ColumnType.FLOAT
+
+        for index, column_type in enumerate(self.types):
+            if column_type == ColumnType.STRING:
+                self.strings[index] = tokens[:, index]
+
+    @staticmethod
+    def _column_type(label, unit, size):
+        """
+        Determine whether a column is numeric from its label, units and number of bytes,
+        numeric columns start out as float columns until their values are loaded
+        """
+        if '_lat' in label or '_lon' in label or unit in ['lat', 'lon']:
+            # latitudes and longitudes need the special encoding of the value strings
+            return ColumnType.STRING
+        if unit == 'timestamp' or size in GliderColumns.NUMERIC_BYTES:
+            return ColumnType.FLOAT
+        return ColumnType.STRING
+
+    def row(self, row_index):
+        """
+        Get a view of one data row
+        """
+        return GliderRow(self, row_index)
+
+    def any_value_mask(self, indices):
+        """
+        Get a boolean array which is True for the rows with a value that is not NaN in any of the columns
+        @param indices tuple of column indices
+        """
+        mask = self._value_masks.get(indices)
+        if mask is None:
+            numeric_indices = [index for index in indices if self.types[index] != ColumnType.STRING]
+            mask = ~np.isnan(self.values[:, numeric_indices]).all(axis=1)
+            for index in indices:
+                if self.types[index] == ColumnType.STRING:
+                    mask |= self.strings[index] != 'NaN'
+            self._value_masks[indices] = mask
+        return mask
+
+
+class GliderRow(object):
+    """
+    View of one row of glider columnar data, used as the raw data of particles in
+    place of the dictionary of labels to value strings. Numeric values are returned
+    converted to int or float, with None for NaN.
+    """
+    __slots__ = ['_columns', '_row_index', '_values']
+
+    def __init__(self, columns, row_index):
+        self._columns = columns
+        self._row_index = row_index
+        self._values = columns.values[row_index]
+
+    def get(self, key, default=None):
+        index = self._columns.index.get(key)
+        if index is None:
+            return default
+
+        column_type = self._columns.types[index]
+        if column_type == ColumnType.STRING:
+            return str(self._columns.strings[index][self._row_index])
+
+        value = self._values[index]
+        if isnan(value):
+            return None
+        if column_type == ColumnType.INT:
+            return int(value)
+        return float(value)
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def has_value(self, key):
+        """
+        Check if the column of key is present and not NaN in this row
+        """
+        value = self.get(key)
+        return value is not None and value != 'NaN'
+
+    def has_any_value(self, indices):
+        """
+        Check if any of the columns is not NaN in this row
+        @param indices tuple of column indices
+        """
+        return self._columns.any_value_mask(indices)[self._row_index]
+
+
 class GliderParser(SimpleParser):
     """
     GliderParser parses a Slocum Electric Glider data file that has been
@@ -844,14 +1026,24 @@ class GliderParser(SimpleParser):
     science data file, and holds the self describing header data in a header
     dictionary and the data in a data dictionary using the column labels as the
     dictionary keys. These dictionaries are used to build the particles.
+
+    In columnar mode the data rows are read into GliderColumns instead, a chunk of
+    rows at a time, with the type of each column taken from the units and bytes label
+    rows and the way its values are printed in the chunk, and particles are built from
+    GliderRow views into the columns.
     """
     def __init__(self,
                  config,
                  stream_handle,
-                 exception_callback):
+                 exception_callback,
+                 columnar=False):
 
         self._record_buffer = []  # holds tuples of (record, state)
         self._header_dict = {}
+        self._columnar = columnar
+        self._label_index = {}
+        # indices of the science parameter columns of each particle class
+        self._science_indices = {}
         # only initialize particle class to None if it does not already exist
         if not hasattr(self, '_particle_class'):
             self._particle_class = None
@@ -946,6 +1138,7 @@ class GliderParser(SimpleParser):
         label_list = self._stream_handle.readline().strip().split()
         self.num_columns = len(label_list)
         self._header_dict['labels'] = label_list
+        self._label_index = dict((label, index) for index, label in enumerate(label_list))
 
         # the m_present_time label is required to generate particles, raise an exception if it is not found
         if not GliderParticleKey.M_PRESENT_TIME in label_list:
@@ -955,10 +1148,12 @@ class GliderParser(SimpleParser):
         # read the units line (should be at row 16 of the file at this point)
         data_unit_list = self._stream_handle.readline().strip().split()
         data_unit_list_length = len(data_unit_list)
+        self._header_dict['units'] = data_unit_list
 
         # read the number of bytes line (should be at row 17 of the file at this point)
         num_of_bytes_list = self._stream_handle.readline().strip().split()
         num_of_bytes_list_length = len(num_of_bytes_list)
+        self._header_dict['num_bytes'] = num_of_bytes_list
 
         # number of labels for name, unit, and number of bytes must match
         if data_unit_list_length != self.num_columns or self.num_columns != num_of_bytes_list_length:
@@ -980,50 +1175,132 @@ class GliderParser(SimpleParser):
         Read in the column labels, data type, number of bytes of each
         data type, and the data from an ASCII glider data file.
         """
-        data_dict = {}
-        data_labels = self._header_dict['labels']
         data = data_record.strip().split()
 
+        self._check_num_columns(data)
+
+        # extract record to dictionary
+        return dict(zip(self._header_dict['labels'], data))
+
+    def _check_num_columns(self, data):
+        """
+        Raise an exception if the split data record does not have a value for each column
+        """
         if self.num_columns != len(data):
             err_msg = "GliderParser._read_data(): Num Of Columns NOT EQUAL to Num of Data items: " + \
                       "Expected Columns= %s vs Actual Data= %s" % (self.num_columns, len(data))
             log.error(err_msg)
             raise DatasetParserException(err_msg)
 
-        # extract record to dictionary
-        for ii, value in enumerate(data):
-            label = data_labels[ii]
-            data_dict[label] = value
+    def _read_columns(self, max_rows):
+        """
+        Read up to max_rows of the data rows remaining in the file into GliderColumns. If a row does not
+        have the right number of values, the rows before it are returned along with the exception.
+        @param max_rows the maximum number of rows to read
+        @retval tuple of the columns and the exception or None
+        """
+        columns = GliderColumns(self._header_dict['labels'], self._header_dict['units'],
+                                self._header_dict['num_bytes'])
+        data_records = []
+        rows = []
+        error = None
+
+        for data_record in islice(self._stream_handle, max_rows):
+            data = data_record.split()
+            try:
+                self._check_num_columns(data)
+            except DatasetParserException as e:
+                error = e
+                break
+            data_records.append(data_record)
+            rows.append(data)
 
-        return data_dict
+        columns.load(data_records, rows)
+        return columns, error
 
-    def parse_file(self):
+    def _iter_rows(self, particle_classes=None):
         """
-        Create particles from the data in the file
+        Read the data rows in the file, yielding a tuple of the data and the timestamp of each row. The data
+        is a dictionary of labels to value strings, or a GliderRow in columnar mode.
+        @param particle_classes if given, only yield the rows with science data for one of these particle classes
         """
         # the header was already read in the init, start at the first sample line
 
-        for line in self._stream_handle:
+        if particle_classes is not None:
+            science_indices = tuple(sorted(set().union(*[self._science_column_indices(particle_class)
+                                                         for particle_class in particle_classes])))
+
+        if not self._columnar:
+            labels = self._header_dict['labels']
+            for line in self._stream_handle:
+                data = line.strip().split()
+                self._check_num_columns(data)
+
+                # only look at the science columns to skip rows without data before building the dictionary
+                if particle_classes is not None and all(data[index] == 'NaN' for index in science_indices):
+                    continue
+
+                # create the dictionary of key/value pairs composed of the labels and the values from the
+                # record being parsed
+                # ex: data_dict = {'sci_bsipar_temp':10.67, n1, n2, nn}
+                data_dict = dict(zip(labels, data))
+                yield data_dict, ntplib.system_to_ntp_time(float(data_dict[GliderParticleKey.M_PRESENT_TIME]))
+            return
+
+        # the rows are read in bounded chunks, so only the columns of one chunk are held at a time
+        while True:
+            columns, error = self._read_columns(COLUMNS_CHUNK_ROWS)
+
+            if particle_classes is None:
+                row_indices = xrange(columns.num_rows)
+            else:
+                # filter the whole chunk at once
+                row_indices = np.flatnonzero(columns.any_value_mask(science_indices))
 
-            # create the dictionary of key/value pairs composed of the labels and the values from the
-            # record being parsed
-            # ex: data_dict = {'sci_bsipar_temp':10.67, n1, n2, nn}
-            data_dict = self._read_data(line)
+            time_index = columns.index[GliderParticleKey.M_PRESENT_TIME]
+            for row_index in row_indices:
+                timestamp = ntplib.system_to_ntp_time(float(columns.values[row_index, time_index]))
+                yield columns.row(row_index), timestamp
 
-            if GliderParser._has_science_data(data_dict, self._particle_class):
-                # create the timestamp
-                timestamp = ntplib.system_to_ntp_time(float(data_dict[GliderParticleKey.M_PRESENT_TIME]))
-                # create the particle
-                self._record_buffer.append(self._extract_sample(self._particle_class, None, data_dict, timestamp))
+            if error is not None:
+                raise error
+            if columns.num_rows < COLUMNS_CHUNK_ROWS:
+                return
 
-    @staticmethod
-    def _has_science_data(data_dict, particle_class):
+    def iter_records(self):
+        """
+        Create particles from the data in the file, yielding each one as it is created
+        """
+        # only the rows with science data for the particle class are returned
+        for data_dict, timestamp in self._iter_rows([self._particle_class]):
+            # create the particle
+            yield self._extract_sample(self._particle_class, None, data_dict, timestamp)
+
+    def _science_column_indices(self, particle_class):
+        """
+        Get the indices of the columns of the science parameters of a particle class, worked out once
+        from the labels
+        @retval tuple of column indices
+        """
+        indices = self._science_indices.get(particle_class)
+        if indices is None:
+            indices = tuple(sorted(self._label_index[key] for key in set(particle_class.science_parameters)
+                                   if key in self._label_index))
+            self._science_indices[particle_class] = indices
+        return indices
+
+    def _has_science_data(self, data_dict, particle_class):
         """
-        Examine the data_dict to see if it contains particle parameters
+        Examine the data_dict to see if it contains particle parameters, only looking at the science
+        parameter columns
         """
-        for key, value in data_dict.iteritems():
-            if value != 'NaN' and key in particle_class.science_parameters:
-                return True
+        indices = self._science_column_indices(particle_class)
+
+        if isinstance(data_dict, GliderRow):
+            return data_dict.has_any_value(indices)
+
+        labels = self._header_dict['labels']
+        return any(data_dict[labels[index]] != 'NaN' for index in indices)
 
 
 class EngineeringClassKey(BaseEnum):
@@ -1036,7 +1313,8 @@ class GliderEngineeringParser(GliderParser):
     def __init__(self,
                  config,
                  stream_handle,
-                 exception_callback):
+                 exception_callback,
+                 columnar=False):
 
         # set the class types from the config
         particle_class_dict = config.get(DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT)
@@ -1060,32 +1338,26 @@ class GliderEngineeringParser(GliderParser):
 
         super(GliderEngineeringParser, self).__init__(config,
                                                       stream_handle,
-                                                      exception_callback)
+                                                      exception_callback,
+                                                      columnar)
 
-    def parse_file(self):
+    def iter_records(self):
         """
-        Create particles out of the data in the file
+        Create particles out of the data in the file, yielding each one as it is created
         """
-        # the header was already read in the init, start at the samples
-
-        for data_record in self._stream_handle:
-
-            # create the dictionary of key/value pairs composed of the labels and the values from the
-            # record being parsed
-            data_dict = self._read_data(data_record)
-            timestamp = ntplib.system_to_ntp_time(float(data_dict[GliderParticleKey.M_PRESENT_TIME]))
+        for data_dict, timestamp in self._iter_rows():
 
             # handle this particle if it is an engineering metadata particle
             if not self._metadata_sent:
-                self._record_buffer.append(self.handle_metadata_particle(timestamp))
+                yield self.handle_metadata_particle(timestamp)
 
             # check for the presence of particle data in the raw data row before continuing
-            if GliderParser._has_science_data(data_dict, self._particle_class):
-                self._record_buffer.append(self._extract_sample(self._particle_class, None, data_dict, timestamp))
+            if self._has_science_data(data_dict, self._particle_class):
+                yield self._extract_sample(self._particle_class, None, data_dict, timestamp)
 
             # check for the presence of science particle data in the raw data row before continuing
-            if GliderParser._has_science_data(data_dict, self._science_class):
-                self._record_buffer.append(self._extract_sample(self._science_class, None, data_dict, timestamp))
+            if self._has_science_data(data_dict, self._science_class):
+                yield self._extract_sample(self._science_class, None, data_dict, timestamp)
 
     def handle_metadata_particle(self, timestamp):
         """
@@ -1099,3 +1371,87 @@ class GliderEngineeringParser(GliderParser):
 
         self._metadata_sent = True
         return self._extract_sample(self._metadata_class, None, header_data_dict, timestamp)
+
+
+class GliderMultiStreamParser(GliderParser):
+    """
+    GliderMultiStreamParser parses a merged glider file once for several particle
+    streams. The header and column labels are read once and each data row is split
+    once, then a particle is produced from the row for each configured particle class
+    with data in it. The particle_classes_dict in the config maps a stream key to the
+    name of a particle class in this module, engineering metadata particle classes
+    are produced once from the header at the first row.
+    """
+    def __init__(self,
+                 config,
+                 stream_handle,
+                 exception_callback,
+                 columnar=False):
+
+        particle_class_dict = config.get(DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT)
+        if not particle_class_dict:
+            raise ConfigurationException('Missing particle_classes_dict in config')
+
+        # get the particle module
+        module = __import__('mi.dataset.parser.glider', fromlist=particle_class_dict.values())
+
+        self._metadata_classes = []
+        self._particle_classes = []
+        # sort by stream key so the order of particles from a row does not depend on dictionary order
+        for key in sorted(particle_class_dict):
+            try:
+                # get the class from the string name of the class
+                particle_class = getattr(module, particle_class_dict[key])
+            except AttributeError:
+                raise ConfigurationException('Config provided a class which does not exist %s' % config)
+
+            if issubclass(particle_class, EngineeringMetadataCommonDataParticle):
+                self._metadata_classes.append(particle_class)
+            else:
+                self._particle_classes.append(particle_class)
+
+        # the glider parser requires a particle class, the first one is as good as any other
+        self._particle_class = (self._particle_classes + self._metadata_classes)[0]
+        self._metadata_sent = False
+
+        super(GliderMultiStreamParser, self).__init__(config,
+                                                      stream_handle,
+                                                      exception_callback,
+                                                      columnar)
+
+    @property
+    def particle_classes(self):
+        """
+        All the particle classes this parser produces particles for
+        """
+        return self._metadata_classes + self._particle_classes
+
+    def iter_records(self):
+        """
+        Create particles for all the configured streams out of the data in the file, yielding each one as
+        it is created
+        """
+        # each record is split once for all the particle classes, if there are no metadata particles
+        # which need the first row only rows with data for one of the particle classes are needed
+        row_particle_classes = None if self._metadata_classes else self._particle_classes
+
+        for data_dict, timestamp in self._iter_rows(row_particle_classes):
+
+            if not self._metadata_sent:
+                for metadata_class in self._metadata_classes:
+                    yield self.handle_metadata_particle(metadata_class, timestamp)
+                self._metadata_sent = True
+
+            for particle_class in self._particle_classes:
+                if self._has_science_data(data_dict, particle_class):
+                    yield self._extract_sample(particle_class, None, data_dict, timestamp)
+
+    def handle_metadata_particle(self, metadata_class, timestamp):
+        """
+        Produce an engineering metadata particle from the header
+        """
+        header_data_dict = {'glider_eng_filename': self._header_dict.get('filename_label'),
+                            'glider_mission_name': self._header_dict.get('mission_name'),
+                            'glider_eng_fileopen_time': self._header_dict.get('fileopen_time')}
+
+        return self._extract_sample(metadata_class, None, header_data_dict, timestamp)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser
+@file mi/dataset/parser/hex_decoder.py
+@brief Decoding of the fields of ascii hex records
+Release notes:
+
+The ascii hex of a record is converted to bytes at once with binascii.unhexlify and read with
+numpy.frombuffer through a structured dtype built from a layout of its fields, so all the values of
+a record, arrays of measurements included, are decoded together instead of one int(x, 16) at a time.
+A field is laid out by its offset and width in hex characters, with its signedness and byte order.
+"""
+
+__license__ = 'Apache 2.0'
+
+import binascii
+
+import numpy as np
+
+from mi.core.log import get_logger
+log = get_logger()
+
+# True for the ascii codes of the hex digits
+HEX_DIGITS = np.zeros(256, dtype=bool)
+for _digit in '0123456789abcdefABCDEF':
+    HEX_DIGITS[ord(_digit)] = True
+
+# the numpy unsigned and signed types of the byte widths with one
+UNSIGNED_TYPES = {1: 'u1', 2: 'u2', 4: 'u4', 8: 'u8'}
+SIGNED_TYPES = {1: 'i1', 2: 'i2', 4: 'i4', 8: 'i8'}
+
+
+class HexField(object):
+    """
+    A field of an ascii hex record, a single value or an array of consecutive values
+    """
+
+    def __init__(self, name, offset, width, count=None, signed=False, little_endian=False):
+        """
+        @param name The name the field is decoded to
+        @param offset The offset of the field in hex characters from the start of the record
+        @param width The width of a value in hex characters
+        @param count The number of values of an array field, None for a single value
+        @param signed True if the values are two's complement
+        @param little_endian True if the bytes of a value are in little endian order
+        @throws ValueError if the width or count is not valid
+        """
+        if width < 1 or (count is not None and count < 0):
+            raise ValueError("Hex field %s has invalid width %s or count %s" % (name, width, count))
+        if count is not None and width % 2:
+            raise ValueError("Hex field %s is an array of values which are not whole bytes" % name)
+        if little_endian and width % 2:
+            raise ValueError("Hex field %s is little endian but its values are not whole bytes" % name)
+
+        self.name = name
+        self.offset = offset
+        self.width = width
+        self.count = count
+        self.signed = signed
+        self.little_endian = little_endian
+        self.end = offset + width * (1 if count is None else count)
+
+
+class HexRecordLayout(object):
+    """
+    The layout of the fields of an ascii hex record, decoding all of them at once
+    """
+
+    def __init__(self, fields):
+        """
+        @param fields The list of HexField of the record
+        @throws ValueError if a field is not aligned with the bytes of the record or its values are too wide
+        """
+        self.fields = fields
+        self.start = min(field.offset for field in fields)
+        self.end = max(field.end for field in fields)
+        # the hex is read in whole bytes from the start of the first field
+        self._padding = '0' * ((self.end - self.start) % 2)
+
+        names, formats, offsets = [], [], []
+        self._conversions = []
+        for field in fields:
+            nibble_offset = field.offset - self.start
+            if nibble_offset % 2 and (field.count is not None or field.little_endian):
+                raise ValueError("Hex field %s does not start on a byte of the record" % field.name)
+
+            num_bytes = (nibble_offset % 2 + field.width + 1) // 2
+            if num_bytes > 8:
+                raise ValueError("Hex field %s has values of more than 64 bits" % field.name)
+            byte_order = '<' if field.little_endian else '>'
+            shift = 4 * ((nibble_offset + field.width) % 2)
+            aligned = not nibble_offset % 2 and not shift
+
+            if num_bytes in UNSIGNED_TYPES:
+                types = SIGNED_TYPES if field.signed and aligned else UNSIGNED_TYPES
+                field_format = byte_order + types[num_bytes]
+            else:
+                field_format = ('u1', (num_bytes,))
+            if field.count is not None:
+                field_format = (field_format, (field.count,)) if num_bytes in UNSIGNED_TYPES else \
+                    ('u1', (field.count, num_bytes))
+
+            names.append(field.name)
+            formats.append(field_format)
+            offsets.append(nibble_offset // 2)
+
+            # the conversion of the bytes read to the values of the field
+            byte_weights = None
+            if num_bytes not in UNSIGNED_TYPES:
+                byte_weights = 256 ** np.arange(num_bytes, dtype=np.int64)
+                if not field.little_endian:
+                    byte_weights = byte_weights[::-1]
+            sign_bit = 1 << (4 * field.width - 1) if field.signed and not (aligned and byte_weights is None) else None
+            mask = (1 << (4 * field.width)) - 1 if not aligned else None
+            positions = np.arange(field.end - field.offset).reshape(-1, field.width) + nibble_offset
+            self._conversions.append((field, byte_weights, shift, mask, sign_bit, positions))
+
+        # a record of nothing but empty arrays has no bytes to read
+        self._dtype = None
+        if self.end > self.start:
+            self._dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                                    'itemsize': (self.end - self.start + 1) // 2})
+
+    def decode(self, record, strict=True):
+        """
+        Decode the fields of a record
+        @param record The ascii hex record, a string holding the fields at their offsets
+        @param strict True to raise an error for a value with a character which is not a hex digit,
+        False to decode such a value to None
+        @retval dictionary of the values of the fields by name, an int or a list of ints for an array field
+        @throws ValueError if the record is too short, or a value is not ascii hex when strict
+        """
+        span = record[self.start:self.end]
+        if len(span) != self.end - self.start:
+            raise ValueError("Hex record of length %d is too short for fields ending at %d" % (len(record), self.end))
+
+        if self._dtype is None:
+            return dict((field.name, []) for field in self.fields)
+
+        valid = None
+        try:
+            data = binascii.unhexlify(span + self._padding)
+        except TypeError:
+            if strict:
+                raise ValueError("Hex record has a character which is not a hex digit: %r" % span)
+            chars = np.frombuffer(span, dtype=np.uint8)
+            valid = HEX_DIGITS[chars]
+            data = binascii.unhexlify(np.where(valid, chars, ord('0')).astype(np.uint8).tostring() + self._padding)
+
+        values = np.frombuffer(data, dtype=self._dtype)[0]
+        decoded = {}
+        for conversion in self._conversions:
+            decoded[conversion[0].name] = self._convert(values[conversion[0].name], valid, *conversion)
+        return decoded
+
+    @staticmethod
+    def _convert(value, valid, field, byte_weights, shift, mask, sign_bit, positions):
+        """
+        Convert the bytes read of a field to its values
+        @retval the int value, or the list of values of an array field, with None for a value which is not hex
+        """
+        if byte_weights is not None or shift or mask is not None or sign_bit is not None:
+            value = np.asarray(value, dtype=np.int64)
+            if byte_weights is not None:
+                value = value.dot(byte_weights)
+            if shift:
+                value = value >> shift
+            if mask is not None:
+                value = value & mask
+            if sign_bit is not None:
+                value = value - ((value & sign_bit) << 1)
+
+        elif value.dtype.kind == 'u' and value.dtype.itemsize == 4:
+            # unsigned 32 bit values are python longs once converted, int(x, 16) gives ints
+            value = np.asarray(value, dtype=np.int64)
+
+        value = value.tolist()
+        if value.__class__ is long or (field.count and value[0].__class__ is long):
+            value = int(value) if field.count is None else [int(item) for item in value]
+        if valid is not None:
+            invalid = ~valid[positions].all(axis=1)
+            if field.count is None:
+                return None if invalid[0] else value
+            return [None if invalid[index] else item for index, item in enumerate(value)]
+        return value
+
+
+_array_layouts = {}
+
+
+def hex_values(ascii_hex, width=2, signed=False, little_endian=False, strict=True):
+    """
+    Decode an array of consecutive values of the same width, a partial value at the end is left out
+    @param ascii_hex The ascii hex of the values
+    @param width The width of a value in hex characters, an even number
+    @param signed True if the values are two's complement
+    @param little_endian True if the bytes of a value are in little endian order
+    @param strict True to raise an error for a value which is not ascii hex, False to decode it to None
+    @retval list of the values
+    @throws ValueError if a value is not ascii hex when strict
+    """
+    key = (len(ascii_hex) // width, width, signed, little_endian)
+    try:
+        layout = _array_layouts[key]
+    except KeyError:
+        layout = _array_layouts.setdefault(key, HexRecordLayout([
+            HexField('values', 0, width, key[0], signed, little_endian)]))
+
+    return layout.decode(ascii_hex, strict)['values']
+
+
+def hex_byte_sum(ascii_hex):
+    """
+    Sum the bytes of ascii hex, as is done for the checksum of a record
+    @param ascii_hex The ascii hex, a last hex digit of an odd length is summed as a byte of its own
+    @retval the sum of the bytes
+    @throws ValueError if the ascii hex has a character which is not a hex digit
+    """
+    num_digits = len(ascii_hex) - len(ascii_hex) % 2
+    try:
+        data = binascii.unhexlify(ascii_hex[:num_digits])
+    except TypeError as e:
+        raise ValueError("Unable to sum the bytes of ascii hex %r: %s" % (ascii_hex, e))
+
+    byte_sum = int(np.frombuffer(data, dtype=np.uint8).sum(dtype=np.int64))
+    if num_digits < len(ascii_hex):
+        byte_sum += int(ascii_hex[-1], 16)
+    return byte_sum
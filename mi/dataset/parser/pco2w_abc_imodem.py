@@ -12,6 +12,7 @@ from mi.dataset.dataset_parser import SimpleParser
 from mi.dataset.parser.pco2w_abc_particles import Pco2wAbcDataParticleKey, \
     Pco2wAbcParticleClassKey
 from mi.dataset.parser.common_regexes import FLOAT_REGEX, ASCII_HEX_CHAR_REGEX
+from mi.dataset.parser.hex_decoder import HexField, HexRecordLayout
 from mi.dataset.parser.utilities import formatted_timestamp_utc_time, \
     sum_hex_digits
 
@@ -66,6 +67,39 @@ CO2_CONTROL_START = 128
 
 LEN_CONTROL_RECORD_WITH_VOLTAGE = 40
 
+# the fields of the record data decoded which are not particle parameters
+RECORD_ID = 'record_id'
+LEN_HEX_DATA = 'len_hex_data'
+RECORD_TYPE = 'record_type'
+RECORD_TIMESTAMP = 'record_timestamp'
+FLAGS = 'flags'
+
+# the header of the record data
+RECORD_HEADER_LAYOUT = HexRecordLayout([
+    HexField(RECORD_ID, 0, 2),
+    HexField(LEN_HEX_DATA, 2, 2),
+    HexField(RECORD_TYPE, 4, 2),
+    HexField(RECORD_TIMESTAMP, 6, 8)
+])
+
+# the fields of an instrument record, from its length, with 14 light measurements
+INSTRUMENT_RECORD_LAYOUT = HexRecordLayout([
+    HexField(Pco2wAbcDataParticleKey.LIGHT_MEASUREMENTS, 12, 4, count=14),
+    HexField(Pco2wAbcDataParticleKey.VOLTAGE_BATTERY, 68, 4),
+    HexField(Pco2wAbcDataParticleKey.THERMISTOR_RAW, 72, 4)
+])
+
+# the fields of a control record, from its length, the voltage battery is optional
+CONTROL_RECORD_FIELDS = [
+    HexField(FLAGS, 12, 4),
+    HexField(Pco2wAbcDataParticleKey.NUM_DATA_RECORDS, 16, 6),
+    HexField(Pco2wAbcDataParticleKey.NUM_ERROR_RECORDS, 22, 6),
+    HexField(Pco2wAbcDataParticleKey.NUM_BYTES_STORED, 28, 6)
+]
+CONTROL_RECORD_LAYOUT = HexRecordLayout(CONTROL_RECORD_FIELDS)
+CONTROL_RECORD_WITH_VOLTAGE_LAYOUT = HexRecordLayout(CONTROL_RECORD_FIELDS + [
+    HexField(Pco2wAbcDataParticleKey.VOLTAGE_BATTERY, 34, 4)])
+
 
 class Pco2wAbcImodemParser(SimpleParser):
     def __init__(self,
@@ -280,30 +314,19 @@ class Pco2wAbcImodemParser(SimpleParser):
                                             len_hex_data,
                                             record_data,
                                             instrument_data_dict):
-            light_measurements = []
-
             """
             The offset into the light measurements is 12 ASCII HEX characters into
             record buffer.
             Light measurements consist of 14 instances of 4 ASCII HEX characters
             """
-            offset = 12
-            num_light_measurements = 14
-            num_ascii_hex_chars = 4
-            for index in range(offset,
-                               offset+(num_light_measurements*num_ascii_hex_chars),
-                               num_ascii_hex_chars):
-                light_measurements.append(
-                    int(record_data[index:index+num_ascii_hex_chars], 16))
-
-            offset += num_light_measurements*num_ascii_hex_chars
+            values = INSTRUMENT_RECORD_LAYOUT.decode(record_data)
+            light_measurements = values[Pco2wAbcDataParticleKey.LIGHT_MEASUREMENTS]
 
             instrument_data_dict[Pco2wAbcDataParticleKey.VOLTAGE_BATTERY] = \
-                int(record_data[offset:offset+4], 16)
+                values[Pco2wAbcDataParticleKey.VOLTAGE_BATTERY]
 
-            offset += 4
             instrument_data_dict[Pco2wAbcDataParticleKey.THERMISTOR_RAW] = \
-                int(record_data[offset:offset+4], 16)
+                values[Pco2wAbcDataParticleKey.THERMISTOR_RAW]
 
             if record_type == CO2_TYPE_NORMAL:
                 instrument_data_dict[
@@ -383,10 +406,15 @@ class Pco2wAbcImodemParser(SimpleParser):
                                             record_data,
                                             control_data_dict):
 
-            # Convert the ascii hex to an integer, format the result into a
-            # binary string and zero fill up to 16 bits to ensure having a
-            # 16 bit string
-            bit_string = format(int(record_data[12:16], 16), 'b').zfill(16)
+            # The voltage battery is optional
+            if len_record_data == LEN_CONTROL_RECORD_WITH_VOLTAGE:
+                values = CONTROL_RECORD_WITH_VOLTAGE_LAYOUT.decode(record_data)
+            else:
+                values = CONTROL_RECORD_LAYOUT.decode(record_data)
+
+            # Format the flags into a binary string and zero fill up to
+            # 16 bits to ensure having a 16 bit string
+            bit_string = format(values[FLAGS], 'b').zfill(16)
 
             bit_flag_params = [Pco2wAbcDataParticleKey.POWER_ON_INVALID,
                                Pco2wAbcDataParticleKey.FLASH_ERASED,
@@ -412,21 +440,16 @@ class Pco2wAbcImodemParser(SimpleParser):
                 index += 1
 
             control_data_dict[Pco2wAbcDataParticleKey.NUM_DATA_RECORDS] = \
-                int(record_data[16:22], 16)
+                values[Pco2wAbcDataParticleKey.NUM_DATA_RECORDS]
 
             control_data_dict[Pco2wAbcDataParticleKey.NUM_ERROR_RECORDS] = \
-                int(record_data[22:28], 16)
+                values[Pco2wAbcDataParticleKey.NUM_ERROR_RECORDS]
 
             control_data_dict[Pco2wAbcDataParticleKey.NUM_BYTES_STORED] = \
-                int(record_data[28:34], 16)
+                values[Pco2wAbcDataParticleKey.NUM_BYTES_STORED]
 
-            # The voltage battery is optional
-            if len_record_data == LEN_CONTROL_RECORD_WITH_VOLTAGE:
-                control_data_dict[Pco2wAbcDataParticleKey.VOLTAGE_BATTERY] = \
-                    int(record_data[34:38], 16)
-            else:
-                control_data_dict[Pco2wAbcDataParticleKey.VOLTAGE_BATTERY] = \
-                    None
+            control_data_dict[Pco2wAbcDataParticleKey.VOLTAGE_BATTERY] = \
+                values.get(Pco2wAbcDataParticleKey.VOLTAGE_BATTERY)
 
             particle = self._extract_sample(self._control_class,
                                             None,
@@ -443,13 +466,15 @@ class Pco2wAbcImodemParser(SimpleParser):
         :return: None
         """
 
-        record_id = int(record_data[0:2], 16)
+        header = RECORD_HEADER_LAYOUT.decode(record_data)
+
+        record_id = header[RECORD_ID]
 
-        len_hex_data = int(record_data[2:4], 16)
+        len_hex_data = header[LEN_HEX_DATA]
 
-        record_type = int(record_data[4:6], 16)
+        record_type = header[RECORD_TYPE]
 
-        record_timestamp = int(record_data[6:14], 16)
+        record_timestamp = header[RECORD_TIMESTAMP]
 
         if record_type in CO2_INSTRUMENT_TYPE_VALUES:
 
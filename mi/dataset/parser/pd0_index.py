@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+@package mi.dataset.parser.pd0_index
+@file mi/dataset/parser/pd0_index.py
+@brief Index of the ensembles in a PD0 file
+Release notes:
+
+The index holds the position, length, ensemble number and time of each valid ensemble in a PD0 file.
+It is built by searching a memory map of the file for the header ID, so it resynchronizes at the next
+ensemble after corrupted data, and can be saved next to the file so the file is only scanned once.
+Selections of the index by position, ensemble number or time can be given to AdcpPd0Parser to parse
+just those ensembles.
+"""
+import datetime as dt
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from mi.core.log import get_logger
+from mi.dataset.parser.pd0_parser import BlockId, ENSEMBLE_HEADER_ID
+from mi.dataset.parser.utilities import map_file
+
+log = get_logger()
+
+# file name suffix of a saved index
+INDEX_SUFFIX = '.pd0idx'
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'),
+                        ('length', '<u4'),
+                        ('ensemble_number', '<u4'),
+                        ('rtc_time', '<f8')])
+
+NTP_EPOCH = dt.datetime(1900, 1, 1)
+
+
+def ensemble_time(data, position):
+    """
+    Get the ensemble number and the ntp time of the real time clock of the ensemble at position, as
+    the adcp_pd0 particles compute them
+    @retval (ensemble number, rtc time), time is nan when it is not a valid date
+    """
+    num_data_types = ord(data[position + 5])
+    for offset in struct.unpack_from('<%dH' % num_data_types, data, position + 6):
+        if struct.unpack_from('<H', data, position + offset)[0] == BlockId.VARIABLE_DATA:
+            number, year, month, day, hour, minute, second, hundredths, roll_over = \
+                struct.unpack_from('<HBBBBBBBB', data, position + offset + 2)
+            try:
+                rtc = dt.datetime(2000 + year, month, day, hour, minute, second)
+            except ValueError:
+                return (roll_over << 16) + number, np.nan
+            return (roll_over << 16) + number, (rtc - NTP_EPOCH).total_seconds() + hundredths / 100.0
+
+    return 0, np.nan
+
+
+class AdcpPd0Index(object):
+    """
+    Index of the ensembles in a PD0 file, with the offset, length including the checksum, ensemble number
+    and real time clock ntp time of each ensemble in a numpy structured array
+    """
+
+    def __init__(self, ensembles=None):
+        """
+        @param ensembles - structured array of INDEX_DTYPE
+        """
+        if ensembles is None:
+            ensembles = np.zeros(0, INDEX_DTYPE)
+        self.ensembles = ensembles
+
+    def __len__(self):
+        return len(self.ensembles)
+
+    def __getitem__(self, item):
+        """
+        Select ensembles by position, a slice or an index array returns an AdcpPd0Index
+        """
+        if isinstance(item, (int, long, np.integer)):
+            return self.ensembles[item]
+        return AdcpPd0Index(self.ensembles[item])
+
+    def __eq__(self, other):
+        return isinstance(other, AdcpPd0Index) and np.array_equal(self.ensembles, other.ensembles)
+
+    def __ne__(self, other):
+        return not self == other
+
+    @property
+    def offsets(self):
+        return self.ensembles['offset']
+
+    @property
+    def lengths(self):
+        return self.ensembles['length']
+
+    @property
+    def ensemble_numbers(self):
+        return self.ensembles['ensemble_number']
+
+    @property
+    def rtc_times(self):
+        return self.ensembles['rtc_time']
+
+    def ensemble_range(self, first, last):
+        """
+        Select the ensembles numbered first to last, inclusive
+        """
+        numbers = self.ensemble_numbers
+        return self[(numbers >= first) & (numbers <= last)]
+
+    def time_window(self, start_time, end_time):
+        """
+        Select the ensembles with a time from start_time up to, not including, end_time
+        @param start_time - ntp start time
+        @param end_time - ntp end time
+        """
+        times = self.rtc_times
+        return self[(times >= start_time) & (times < end_time)]
+
+    def split(self, count):
+        """
+        Split the index into count ranges of consecutive ensembles of about the same size
+        """
+        return [AdcpPd0Index(ensembles) for ensembles in np.array_split(self.ensembles, count)]
+
+    @staticmethod
+    def index_path(file_path):
+        return file_path + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, data):
+        """
+        Build the index of a buffer of PD0 data. Each header ID found starts an ensemble if the whole
+        ensemble is there and its checksum is valid, otherwise the search goes on from the next byte.
+        @param data - string or mmap holding the PD0 data
+        """
+        end = len(data)
+        data_bytes = np.frombuffer(data, np.uint8) if end else np.zeros(0, np.uint8)
+        entries = []
+
+        position = data.find(ENSEMBLE_HEADER_ID)
+        while position != -1:
+            if position + 6 <= end:
+                num_bytes = struct.unpack_from('<H', data, position + 2)[0]
+                if 6 <= num_bytes and position + num_bytes + 2 <= end:
+                    checksum = int(data_bytes[position:position + num_bytes].sum(dtype=np.uint64)) & 0xFFFF
+                    if checksum == struct.unpack_from('<H', data, position + num_bytes)[0]:
+                        try:
+                            number, rtc_time = ensemble_time(data, position)
+                        except (struct.error, IndexError):
+                            number, rtc_time = 0, np.nan
+                        entries.append((position, num_bytes + 2, number, rtc_time))
+                        position = data.find(ENSEMBLE_HEADER_ID, position + num_bytes + 2)
+                        continue
+
+            position = data.find(ENSEMBLE_HEADER_ID, position + 1)
+
+        del data_bytes
+        return cls(np.array(entries, INDEX_DTYPE))
+
+    @classmethod
+    def from_file(cls, file_path, persist=False):
+        """
+        Get the index of a PD0 file, loading the saved index if it is up to date
+        @param file_path - path of the PD0 file
+        @param persist - True to save the index next to the file when it is built
+        """
+        index = cls.load(file_path)
+        if index is None:
+            with open(file_path, 'rb') as stream_handle:
+                data = map_file(stream_handle)
+                try:
+                    index = cls.build(data)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+
+            if persist:
+                index.save(file_path)
+
+        return index
+
+    def save(self, file_path):
+        """
+        Save the index of a PD0 file next to the file, with the size and modification time of the file
+        """
+        stat = os.stat(file_path)
+        with open(self.index_path(file_path), 'wb') as index_file:
+            np.savez(index_file, ensembles=self.ensembles, file_stat=np.array([stat.st_size, stat.st_mtime]))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Load the saved index of a PD0 file
+        @retval AdcpPd0Index, or None if there is no saved index or the file changed since it was saved
+        """
+        index_path = cls.index_path(file_path)
+        if not os.path.exists(index_path):
+            return None
+
+        stat = os.stat(file_path)
+        try:
+            with open(index_path, 'rb') as index_file:
+                saved = np.load(index_file)
+                ensembles = saved['ensembles']
+                file_stat = saved['file_stat'].tolist()
+        except (IOError, ValueError, KeyError) as e:
+            log.warn('Unable to load PD0 index %s: %s', index_path, e)
+            return None
+
+        if file_stat != [stat.st_size, stat.st_mtime] or ensembles.dtype != INDEX_DTYPE:
+            return None
+
+        return cls(ensembles)
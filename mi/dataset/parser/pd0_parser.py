@@ -12,6 +12,8 @@ import struct
 
 import sys
 
+import numpy as np
+
 namedtuple_store = {}
 bitmapped_namedtuple_store = {}
 
@@ -32,6 +34,167 @@ class ChecksumException(PD0ParsingException):
     pass
 
 
+HEADER_FORMAT = (
+    ('id', 'B'),
+    ('data_source', 'B'),
+    ('num_bytes', 'H'),
+    ('spare', 'B'),
+    ('num_data_types', 'B')
+)
+
+
+FIXED_FORMAT = (
+    ('id', 'H'),
+    ('cpu_firmware_version', 'B'),
+    ('cpu_firmware_revision', 'B'),
+    ('system_configuration', 'H'),
+    ('simulation_data_flag', 'B'),
+    ('lag_length', 'B'),
+    ('number_of_beams', 'B'),
+    ('number_of_cells', 'B'),
+    ('pings_per_ensemble', 'H'),
+    ('depth_cell_length', 'H'),
+    ('blank_after_transmit', 'H'),
+    ('signal_processing_mode', 'B'),
+    ('low_corr_threshold', 'B'),
+    ('num_code_reps', 'B'),
+    ('minimum_percentage', 'B'),
+    ('error_velocity_max', 'H'),
+    ('tpp_minutes', 'B'),
+    ('tpp_seconds', 'B'),
+    ('tpp_hundredths', 'B'),
+    ('coord_transform', 'B'),
+    ('heading_alignment', 'H'),
+    ('heading_bias', 'H'),
+    ('sensor_source', 'B'),
+    ('sensor_available', 'B'),
+    ('bin_1_distance', 'H'),
+    ('transmit_pulse_length', 'H'),
+    ('starting_depth_cell', 'B'),
+    ('ending_depth_cell', 'B'),
+    ('false_target_threshold', 'B'),
+    ('spare1', 'B'),
+    ('transmit_lag_distance', 'H'),
+    ('cpu_board_serial_number', 'Q'),
+    ('system_bandwidth', 'H'),
+    ('system_power', 'B'),
+    ('spare2', 'B'),
+    ('serial_number', 'I'),
+    ('beam_angle', 'B')
+)
+
+
+VARIABLE_FORMAT = (
+    ('id', 'H'),
+    ('ensemble_number', 'H'),
+    ('rtc_year', 'B'),
+    ('rtc_month', 'B'),
+    ('rtc_day', 'B'),
+    ('rtc_hour', 'B'),
+    ('rtc_minute', 'B'),
+    ('rtc_second', 'B'),
+    ('rtc_hundredths', 'B'),
+    ('ensemble_roll_over', 'B'),
+    ('bit_result', 'H'),
+    ('speed_of_sound', 'H'),
+    ('depth_of_transducer', 'H'),
+    ('heading', 'H'),
+    ('pitch', 'h'),
+    ('roll', 'h'),
+    ('salinity', 'H'),
+    ('temperature', 'h'),
+    ('mpt_minutes', 'B'),
+    ('mpt_seconds', 'B'),
+    ('mpt_hundredths', 'B'),
+    ('heading_standard_deviation', 'B'),
+    ('pitch_standard_deviation', 'B'),
+    ('roll_standard_deviation', 'B'),
+    ('transmit_current', 'B'),
+    ('transmit_voltage', 'B'),
+    ('ambient_temperature', 'B'),
+    ('pressure_positive', 'B'),
+    ('pressure_negative', 'B'),
+    ('attitude_temperature', 'B'),
+    ('attitude', 'B'),
+    ('contamination_sensor', 'B'),
+    ('error_status_word', 'I'),
+    ('reserved', 'H'),
+    ('pressure', 'I'),
+    ('pressure_variance', 'I'),
+    ('spare', 'B'),
+    ('rtc_y2k_century', 'B'),
+    ('rtc_y2k_year', 'B'),
+    ('rtc_y2k_month', 'B'),
+    ('rtc_y2k_day', 'B'),
+    ('rtc_y2k_hour', 'B'),
+    ('rtc_y2k_minute', 'B'),
+    ('rtc_y2k_seconds', 'B'),
+    ('rtc_y2k_hundredths', 'B')
+)
+
+
+BOTTOM_TRACK_FORMAT = (
+    ('id', 'H'),
+    ('pings_per_ensemble', 'H'),
+    ('delay_before_reacquire', 'H'),
+    ('correlation_mag_min', 'B'),
+    ('eval_amplitude_min', 'B'),
+    ('percent_good_minimum', 'B'),
+    ('mode', 'B'),
+    ('error_velocity_max', 'H'),
+    ('reserved', 'I'),
+    ('range_1', 'H'),
+    ('range_2', 'H'),
+    ('range_3', 'H'),
+    ('range_4', 'H'),
+    ('velocity_1', 'h'),
+    ('velocity_2', 'h'),
+    ('velocity_3', 'h'),
+    ('velocity_4', 'h'),
+    ('corr_1', 'B'),
+    ('corr_2', 'B'),
+    ('corr_3', 'B'),
+    ('corr_4', 'B'),
+    ('amp_1', 'B'),
+    ('amp_2', 'B'),
+    ('amp_3', 'B'),
+    ('amp_4', 'B'),
+    ('pcnt_1', 'B'),
+    ('pcnt_2', 'B'),
+    ('pcnt_3', 'B'),
+    ('pcnt_4', 'B'),
+    ('ref_layer_min', 'H'),
+    ('ref_layer_near', 'H'),
+    ('ref_layer_far', 'H'),
+    ('ref_velocity_1', 'h'),
+    ('ref_velocity_2', 'h'),
+    ('ref_velocity_3', 'h'),
+    ('ref_velocity_4', 'h'),
+    ('ref_corr_1', 'B'),
+    ('ref_corr_2', 'B'),
+    ('ref_corr_3', 'B'),
+    ('ref_corr_4', 'B'),
+    ('ref_amp_1', 'B'),
+    ('ref_amp_2', 'B'),
+    ('ref_amp_3', 'B'),
+    ('ref_amp_4', 'B'),
+    ('ref_pcnt_1', 'B'),
+    ('ref_pcnt_2', 'B'),
+    ('ref_pcnt_3', 'B'),
+    ('ref_pcnt_4', 'B'),
+    ('max_depth', 'H'),
+    ('rssi_1', 'B'),
+    ('rssi_2', 'B'),
+    ('rssi_3', 'B'),
+    ('rssi_4', 'B'),
+    ('gain', 'B'),
+    ('range_msb_1', 'B'),
+    ('range_msb_2', 'B'),
+    ('range_msb_3', 'B'),
+    ('range_msb_4', 'B'),
+)
+
+
 class BlockId(object):
     FIXED_DATA = 0
     VARIABLE_DATA = 128
@@ -44,6 +207,45 @@ class BlockId(object):
     AUV_NAV_DATA = 8192
 
 
+def format_class(name, formatter):
+    """
+    Get the namedtuple class holding the fields of a block format
+    """
+    if name not in namedtuple_store:
+        namedtuple_store[name] = namedtuple(name, [item[0] for item in formatter])
+    return namedtuple_store[name]
+
+
+def cell_data_class(name):
+    """
+    Get the namedtuple class holding the id and per beam values of a cell data block
+    """
+    if name not in namedtuple_store:
+        namedtuple_store[name] = namedtuple(name, ('id', 'beam1', 'beam2', 'beam3', 'beam4'))
+    return namedtuple_store[name]
+
+
+def format_ranges(block_id, formatter, fields=None):
+    """
+    Get the byte ranges of fields of a block format
+    @param block_id - id of the block
+    @param formatter - format of the block
+    @param fields - names of the fields, by default all the fields of the format
+    @retval list of (block_id, start, end) of the fields within the block, adjacent fields are joined
+    """
+    ranges = []
+    start = 0
+    for name, format_char in formatter:
+        end = start + struct.calcsize('<' + format_char)
+        if fields is None or name in fields:
+            if ranges and ranges[-1][2] == start:
+                ranges[-1] = (block_id, ranges[-1][1], end)
+            else:
+                ranges.append((block_id, start, end))
+        start = end
+    return ranges
+
+
 def count_zero_bits(bitmask):
     if not bitmask:
         return 0
@@ -75,6 +277,7 @@ class AdcpPd0Record(object):
         self.bit_result = None
         self.error_word = None
         self.stored_checksum = None
+        self.block_offsets = {}
         self._process(glider)
 
     def __str__(self):
@@ -85,15 +288,12 @@ class AdcpPd0Record(object):
 
     def _unpack_from_format(self, name, formatter, offset):
         format_string = ''.join([item[1] for item in formatter])
-        fields = [item[0] for item in formatter]
         data = struct.unpack_from('<' + format_string, self.data, offset)
-        if name not in namedtuple_store:
-            namedtuple_store[name] = namedtuple(name, fields)
-        _class = namedtuple_store[name]
+        _class = format_class(name, formatter)
         return _class(*data)
 
     def _unpack_cell_data(self, name, format_string, offset):
-        _class = namedtuple(name, ('id', 'beam1', 'beam2', 'beam3', 'beam4'))
+        _class = cell_data_class(name)
         data = struct.unpack_from('<H%d%s' % (self.fixed_data.number_of_cells * 4, format_string), self.data, offset)
         _object = _class(data[0], [], [], [], [])
         _object.beam1[:] = data[1::4]
@@ -157,20 +357,14 @@ class AdcpPd0Record(object):
         self._parse_error_word()
 
     def _process_header(self):
-        header_format = (
-            ('id', 'B'),
-            ('data_source', 'B'),
-            ('num_bytes', 'H'),
-            ('spare', 'B'),
-            ('num_data_types', 'B')
-        )
-        self.header = self._unpack_from_format('header', header_format, 0)
+        self.header = self._unpack_from_format('header', HEADER_FORMAT, 0)
         self.data = self.data[:self.header.num_bytes + 2]
 
     def _parse_offset_data(self):
         self.offsets = struct.unpack_from('<%dH' % self.header.num_data_types, self.data, 6)
         for offset in self.offsets:
             block_id = struct.unpack_from('<H', self.data, offset)[0]
+            self.block_offsets[block_id] = offset
             if block_id == BlockId.FIXED_DATA:
                 self._parse_fixed(offset)
             elif block_id == BlockId.VARIABLE_DATA:
@@ -194,96 +388,10 @@ class AdcpPd0Record(object):
                 raise UnhandledBlockException('Found unhandled data type id: %d' % block_id)
 
     def _parse_fixed(self, offset):
-        fixed_format = (
-            ('id', 'H'),
-            ('cpu_firmware_version', 'B'),
-            ('cpu_firmware_revision', 'B'),
-            ('system_configuration', 'H'),
-            ('simulation_data_flag', 'B'),
-            ('lag_length', 'B'),
-            ('number_of_beams', 'B'),
-            ('number_of_cells', 'B'),
-            ('pings_per_ensemble', 'H'),
-            ('depth_cell_length', 'H'),
-            ('blank_after_transmit', 'H'),
-            ('signal_processing_mode', 'B'),
-            ('low_corr_threshold', 'B'),
-            ('num_code_reps', 'B'),
-            ('minimum_percentage', 'B'),
-            ('error_velocity_max', 'H'),
-            ('tpp_minutes', 'B'),
-            ('tpp_seconds', 'B'),
-            ('tpp_hundredths', 'B'),
-            ('coord_transform', 'B'),
-            ('heading_alignment', 'H'),
-            ('heading_bias', 'H'),
-            ('sensor_source', 'B'),
-            ('sensor_available', 'B'),
-            ('bin_1_distance', 'H'),
-            ('transmit_pulse_length', 'H'),
-            ('starting_depth_cell', 'B'),
-            ('ending_depth_cell', 'B'),
-            ('false_target_threshold', 'B'),
-            ('spare1', 'B'),
-            ('transmit_lag_distance', 'H'),
-            ('cpu_board_serial_number', 'Q'),
-            ('system_bandwidth', 'H'),
-            ('system_power', 'B'),
-            ('spare2', 'B'),
-            ('serial_number', 'I'),
-            ('beam_angle', 'B')
-        )
-        self.fixed_data = self._unpack_from_format('fixed', fixed_format, offset)
+        self.fixed_data = self._unpack_from_format('fixed', FIXED_FORMAT, offset)
 
     def _parse_variable(self, offset):
-        variable_format = (
-            ('id', 'H'),
-            ('ensemble_number', 'H'),
-            ('rtc_year', 'B'),
-            ('rtc_month', 'B'),
-            ('rtc_day', 'B'),
-            ('rtc_hour', 'B'),
-            ('rtc_minute', 'B'),
-            ('rtc_second', 'B'),
-            ('rtc_hundredths', 'B'),
-            ('ensemble_roll_over', 'B'),
-            ('bit_result', 'H'),
-            ('speed_of_sound', 'H'),
-            ('depth_of_transducer', 'H'),
-            ('heading', 'H'),
-            ('pitch', 'h'),
-            ('roll', 'h'),
-            ('salinity', 'H'),
-            ('temperature', 'h'),
-            ('mpt_minutes', 'B'),
-            ('mpt_seconds', 'B'),
-            ('mpt_hundredths', 'B'),
-            ('heading_standard_deviation', 'B'),
-            ('pitch_standard_deviation', 'B'),
-            ('roll_standard_deviation', 'B'),
-            ('transmit_current', 'B'),
-            ('transmit_voltage', 'B'),
-            ('ambient_temperature', 'B'),
-            ('pressure_positive', 'B'),
-            ('pressure_negative', 'B'),
-            ('attitude_temperature', 'B'),
-            ('attitude', 'B'),
-            ('contamination_sensor', 'B'),
-            ('error_status_word', 'I'),
-            ('reserved', 'H'),
-            ('pressure', 'I'),
-            ('pressure_variance', 'I'),
-            ('spare', 'B'),
-            ('rtc_y2k_century', 'B'),
-            ('rtc_y2k_year', 'B'),
-            ('rtc_y2k_month', 'B'),
-            ('rtc_y2k_day', 'B'),
-            ('rtc_y2k_hour', 'B'),
-            ('rtc_y2k_minute', 'B'),
-            ('rtc_y2k_seconds', 'B'),
-            ('rtc_y2k_hundredths', 'B')
-        )
-        self.variable_data = self._unpack_from_format('variable', variable_format, offset)
+        self.variable_data = self._unpack_from_format('variable', VARIABLE_FORMAT, offset)
 
     def _parse_velocity(self, offset):
         self.velocities = self._unpack_cell_data('velocity', 'h', offset)
@@ -298,67 +406,7 @@ class AdcpPd0Record(object):
         self.percent_good = self._unpack_cell_data('percent_good', 'B', offset)
 
     def _parse_bottom_track(self, offset):
-        bottom_track_format = (
-            ('id', 'H'),
-            ('pings_per_ensemble', 'H'),
-            ('delay_before_reacquire', 'H'),
-            ('correlation_mag_min', 'B'),
-            ('eval_amplitude_min', 'B'),
-            ('percent_good_minimum', 'B'),
-            ('mode', 'B'),
-            ('error_velocity_max', 'H'),
-            ('reserved', 'I'),
-            ('range_1', 'H'),
-            ('range_2', 'H'),
-            ('range_3', 'H'),
-            ('range_4', 'H'),
-            ('velocity_1', 'h'),
-            ('velocity_2', 'h'),
-            ('velocity_3', 'h'),
-            ('velocity_4', 'h'),
-            ('corr_1', 'B'),
-            ('corr_2', 'B'),
-            ('corr_3', 'B'),
-            ('corr_4', 'B'),
-            ('amp_1', 'B'),
-            ('amp_2', 'B'),
-            ('amp_3', 'B'),
-            ('amp_4', 'B'),
-            ('pcnt_1', 'B'),
-            ('pcnt_2', 'B'),
-            ('pcnt_3', 'B'),
-            ('pcnt_4', 'B'),
-            ('ref_layer_min', 'H'),
-            ('ref_layer_near', 'H'),
-            ('ref_layer_far', 'H'),
-            ('ref_velocity_1', 'h'),
-            ('ref_velocity_2', 'h'),
-            ('ref_velocity_3', 'h'),
-            ('ref_velocity_4', 'h'),
-            ('ref_corr_1', 'B'),
-            ('ref_corr_2', 'B'),
-            ('ref_corr_3', 'B'),
-            ('ref_corr_4', 'B'),
-            ('ref_amp_1', 'B'),
-            ('ref_amp_2', 'B'),
-            ('ref_amp_3', 'B'),
-            ('ref_amp_4', 'B'),
-            ('ref_pcnt_1', 'B'),
-            ('ref_pcnt_2', 'B'),
-            ('ref_pcnt_3', 'B'),
-            ('ref_pcnt_4', 'B'),
-            ('max_depth', 'H'),
-            ('rssi_1', 'B'),
-            ('rssi_2', 'B'),
-            ('rssi_3', 'B'),
-            ('rssi_4', 'B'),
-            ('gain', 'B'),
-            ('range_msb_1', 'B'),
-            ('range_msb_2', 'B'),
-            ('range_msb_3', 'B'),
-            ('range_msb_4', 'B'),
-        )
-        self.bottom_track = self._unpack_from_format('bottom_track', bottom_track_format, offset)
+        self.bottom_track = self._unpack_from_format('bottom_track', BOTTOM_TRACK_FORMAT, offset)
 
     def _parse_sysconfig(self):
         """
@@ -589,3 +637,313 @@ class AdcpPd0Record(object):
         )
 
         self.error_word = self._unpack_bitmapped('error_word', error_word_format, self.variable_data.error_status_word)
+
+
+ENSEMBLE_HEADER_ID = b'\x7f\x7f'
+
+# numpy types matching the struct format characters used in the block formats
+NUMPY_TYPES = {'B': 'u1', 'H': '<u2', 'h': '<i2', 'I': '<u4', 'Q': '<u8'}
+
+# leader blocks: record attribute, namedtuple name and format
+LEADER_BLOCKS = {
+    BlockId.FIXED_DATA: ('fixed_data', 'fixed', FIXED_FORMAT),
+    BlockId.VARIABLE_DATA: ('variable_data', 'variable', VARIABLE_FORMAT),
+    BlockId.BOTTOM_TRACK: ('bottom_track', 'bottom_track', BOTTOM_TRACK_FORMAT),
+}
+
+# cell data blocks: record attribute, namedtuple name and numpy type of the cell values
+CELL_BLOCKS = {
+    BlockId.VELOCITY_DATA: ('velocities', 'velocity', '<i2'),
+    BlockId.CORRELATION_DATA: ('correlation_magnitudes', 'correlation', 'u1'),
+    BlockId.ECHO_INTENSITY_DATA: ('echo_intensity', 'echo_intensity', 'u1'),
+    BlockId.PERCENT_GOOD_DATA: ('percent_good', 'percent_good', 'u1'),
+}
+
+IGNORED_BLOCKS = (BlockId.AUV_NAV_DATA, BlockId.STATUS_DATA_ID)
+
+
+def format_dtype(formatter):
+    """
+    Build the numpy structured dtype matching a block format
+    """
+    return np.dtype([(name, NUMPY_TYPES[format_char]) for name, format_char in formatter])
+
+
+def find_ensembles(data):
+    """
+    Step through a buffer of PD0 data the way the parsers read a file: an ensemble is expected at each
+    position and when the header ID is not found the next two bytes are tried
+    @param data - buffer holding the PD0 data
+    @retval generator of (position, length) of each ensemble, including the checksum, length is None
+        where the header ID was not found, the last ensemble may extend past the end of the data
+    """
+    position = 0
+    end = len(data)
+    while position < end:
+        if data[position:position + 2] != ENSEMBLE_HEADER_ID:
+            yield position, None
+            position += 2
+        elif position + 4 > end:
+            # not even the number of bytes is there
+            yield position, 4
+            return
+        else:
+            length = struct.unpack_from('<H', data, position + 2)[0] + 2
+            yield position, length
+            position += length
+
+
+class AdcpPd0EnsembleGroup(object):
+    """
+    Ensembles sharing one layout, that is the same size, data types, data type offsets and number of cells,
+    decoded together into a numpy structured array with one row per ensemble. The leader blocks are
+    available as structured arrays and the cell data blocks as namedtuples of per beam
+    (number of ensembles, number of cells) matrices, under the attribute names used by AdcpPd0Record.
+    """
+
+    def __init__(self, layout, data, positions):
+        """
+        @param layout - (num_bytes, offsets, block_ids, number_of_cells) shared by the ensembles
+        @param data - buffer holding the ensembles
+        @param positions - start position of each ensemble in data
+        @throws ValueError if the blocks do not fit within the ensemble
+        """
+        self.num_bytes, self.offsets, self.block_ids, self.number_of_cells = layout
+        self.block_offsets = dict(zip(self.block_ids, self.offsets))
+        ensemble_size = self.num_bytes + 2
+
+        names = ['header', 'checksum']
+        formats = [format_dtype(HEADER_FORMAT), '<u2']
+        offsets = [0, self.num_bytes]
+        for offset, block_id in zip(self.offsets, self.block_ids):
+            if block_id in LEADER_BLOCKS:
+                _, name, formatter = LEADER_BLOCKS[block_id]
+                formats.append(format_dtype(formatter))
+            elif block_id in CELL_BLOCKS:
+                _, name, cell_type = CELL_BLOCKS[block_id]
+                formats.append(np.dtype([('id', '<u2'), ('cells', cell_type, (self.number_of_cells, 4))]))
+            else:
+                continue
+            names.append(name)
+            offsets.append(offset)
+
+        dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': ensemble_size})
+        buf = ''.join([data[position:position + ensemble_size] for position in positions])
+
+        # checksum is the sum of all the bytes before it
+        raw = np.frombuffer(buf, np.uint8).reshape(len(positions), ensemble_size)
+        checksums = raw[:, :self.num_bytes].sum(axis=1, dtype=np.uint64) & 0xFFFF
+        self.valid = checksums == np.frombuffer(buf, dtype)['checksum']
+        self.positions = np.asarray(positions)
+
+        if not self.valid.all():
+            # drop the bad ensembles from the raw bytes, copying the structured rows would only copy the fields
+            raw = raw[self.valid]
+            self.positions = self.positions[self.valid]
+
+        self.ensembles = raw.view(dtype).reshape(-1)
+        self._record_values = None
+
+    def __len__(self):
+        return len(self.ensembles)
+
+    def ensemble_bytes(self, row):
+        """
+        Get the bytes of the ensemble in a row
+        """
+        return self.ensembles[row].tobytes()
+
+    def record_values(self):
+        """
+        Get the values of the ensembles converted to the python types used by AdcpPd0Record, the
+        conversion is done once for all the rows
+        @retval list of (record attribute, list of values by row)
+        """
+        if self._record_values is None:
+            self._record_values = [
+                ('header', map(format_class('header', HEADER_FORMAT)._make, self.ensembles['header'].tolist())),
+                ('stored_checksum', self.ensembles['checksum'].tolist())]
+
+            for block_id in self.block_ids:
+                if block_id in LEADER_BLOCKS:
+                    attribute, name, formatter = LEADER_BLOCKS[block_id]
+                    values = map(format_class(name, formatter)._make, self.ensembles[name].tolist())
+                elif block_id in CELL_BLOCKS:
+                    attribute, name, _ = CELL_BLOCKS[block_id]
+                    _class = cell_data_class(name)
+                    block = self.ensembles[name]
+                    # (ensemble, cell, beam) to lists of beam values by ensemble
+                    beams = block['cells'].transpose(0, 2, 1).tolist()
+                    values = [_class(cell_id, *ensemble_beams)
+                              for cell_id, ensemble_beams in zip(block['id'].tolist(), beams)]
+                else:
+                    continue
+                self._record_values.append((attribute, values))
+
+        return self._record_values
+
+    def _leader(self, name):
+        if name in self.ensembles.dtype.names:
+            return self.ensembles[name]
+        return None
+
+    def _cell_data(self, name):
+        if name not in self.ensembles.dtype.names:
+            return None
+        block = self.ensembles[name]
+        cells = block['cells']
+        return cell_data_class(name)(block['id'], cells[:, :, 0], cells[:, :, 1], cells[:, :, 2], cells[:, :, 3])
+
+    @property
+    def fixed_data(self):
+        return self._leader('fixed')
+
+    @property
+    def variable_data(self):
+        return self._leader('variable')
+
+    @property
+    def bottom_track(self):
+        return self._leader('bottom_track')
+
+    @property
+    def velocities(self):
+        return self._cell_data('velocity')
+
+    @property
+    def correlation_magnitudes(self):
+        return self._cell_data('correlation')
+
+    @property
+    def echo_intensity(self):
+        return self._cell_data('echo_intensity')
+
+    @property
+    def percent_good(self):
+        return self._cell_data('percent_good')
+
+
+class AdcpPd0EnsembleRecord(AdcpPd0Record):
+    """
+    AdcpPd0Record for one ensemble of a decoded ensemble group, giving the particles the same
+    values as an AdcpPd0Record decoded from the ensemble bytes
+    """
+
+    def __init__(self, group, row, glider=False):
+        self.data = group.ensemble_bytes(row)
+        self.offsets = group.offsets
+        self.block_offsets = group.block_offsets
+        self.velocities = None
+        self.correlation_magnitudes = None
+        self.echo_intensity = None
+        self.percent_good = None
+
+        for attribute, values in group.record_values():
+            setattr(self, attribute, values[row])
+
+        self._parse_sysconfig()
+        self._parse_coord_transform()
+        self._parse_sensor_source(glider)
+        self._parse_sensor_avail(glider)
+        self._parse_bit_result()
+        self._parse_error_word()
+
+
+class AdcpPd0Ensembles(object):
+    """
+    Bulk decoder for PD0 ensembles. The ensembles are grouped by layout and each group is decoded at once
+    into numpy structured arrays, see AdcpPd0EnsembleGroup. Ensembles which do not fit a group, such as
+    those with unknown data types or a bad checksum, are decoded by AdcpPd0Record when their record is
+    requested, so they fail the same way.
+    """
+
+    def __init__(self, data, positions, glider=False):
+        """
+        @param data - buffer holding the PD0 data
+        @param positions - start position of each complete ensemble in data
+        @param glider - True if the ensembles are from a glider ADCP
+        """
+        self._data = data
+        self._positions = list(positions)
+        self._glider = glider
+        self._locations = [None] * len(self._positions)
+        self.groups = []
+
+        layouts = {}
+        for index, position in enumerate(self._positions):
+            try:
+                layout = self._layout(position)
+            except (struct.error, ValueError):
+                # a stray header ID, leave it to AdcpPd0Record to report
+                continue
+            if layout is not None:
+                layouts.setdefault(layout, []).append(index)
+
+        for layout, indices in sorted(layouts.iteritems(), key=lambda item: item[1][0]):
+            try:
+                group = AdcpPd0EnsembleGroup(layout, data, [self._positions[index] for index in indices])
+            except ValueError:
+                # leave the ensembles of a layout numpy cannot map to AdcpPd0Record
+                continue
+            self.groups.append(group)
+            for row, index in enumerate(index for index, valid in zip(indices, group.valid) if valid):
+                self._locations[index] = (group, row)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _layout(self, position):
+        """
+        Get the layout of the ensemble at position, or None if it cannot be decoded in bulk
+        """
+        data = self._data
+        if position + 6 > len(data):
+            return None
+
+        num_bytes, _, num_data_types = struct.unpack_from('<HBB', data, position + 2)
+        if num_data_types == 0 or 6 + 2 * num_data_types > num_bytes:
+            return None
+
+        offsets = struct.unpack_from('<%dH' % num_data_types, data, position + 6)
+        if max(offsets) + 2 > num_bytes:
+            return None
+
+        block_ids = tuple(struct.unpack_from('<H', data, position + offset)[0] for offset in offsets)
+        if len(set(block_ids)) != len(block_ids) or \
+                BlockId.FIXED_DATA not in block_ids or BlockId.VARIABLE_DATA not in block_ids:
+            return None
+
+        # the cell data blocks are sized from the fixed leader which must come first
+        fixed_index = block_ids.index(BlockId.FIXED_DATA)
+        for index, block_id in enumerate(block_ids):
+            if block_id in CELL_BLOCKS:
+                if index < fixed_index:
+                    return None
+            elif block_id not in LEADER_BLOCKS and block_id not in IGNORED_BLOCKS:
+                return None
+
+        fixed_offset = offsets[fixed_index]
+        if fixed_offset + 10 > num_bytes:
+            return None
+        number_of_cells = ord(data[position + fixed_offset + 9])
+
+        return num_bytes, offsets, block_ids, number_of_cells
+
+    def record(self, index):
+        """
+        Get the record of an ensemble
+        @param index - index of the ensemble in the positions
+        @retval AdcpPd0Record for the ensemble
+        @throws PD0ParsingException if the ensemble cannot be parsed
+        """
+        location = self._locations[index]
+        if location is None:
+            position = self._positions[index]
+            num_bytes = struct.unpack_from('<H', self._data, position + 2)[0]
+            try:
+                return AdcpPd0Record(self._data[position:position + num_bytes + 2], glider=self._glider)
+            except struct.error:
+                raise InsufficientDataException('Insufficient data in PD0 record at position %d' % position)
+
+        group, row = location
+        return AdcpPd0EnsembleRecord(group, row, glider=self._glider)
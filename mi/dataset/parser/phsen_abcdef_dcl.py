@@ -26,7 +26,8 @@ from mi.dataset.dataset_parser import BufferLoadingParser
 from mi.core.instrument.chunker import StringChunker
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.parser.common_regexes import END_OF_LINE_REGEX, ONE_OR_MORE_WHITESPACE_REGEX
-from mi.dataset.parser.utilities import convert_to_signed_int_16_bit, dcl_controller_timestamp_to_ntp_time
+from mi.dataset.parser.hex_decoder import HexField, HexRecordLayout, hex_byte_sum
+from mi.dataset.parser.utilities import dcl_controller_timestamp_to_ntp_time
 
 METADATA_PARTICLE_CLASS_KEY = 'metadata_particle_class'
 # The key for the data particle class
@@ -43,22 +44,14 @@ def _calculate_working_record_checksum(working_record):
     log.trace("_calculate_working_record_checksum(): string_length is %s, working_record is %s",
               len(working_record), working_record)
 
-    checksum = 0
-
     ## strip off the leading * and ID characters of the log line (3 characters) and
     ## strip off the trailing Checksum characters (2 characters)
     star_and_checksum_stripped_working_record = working_record[3:-2]
 
-    working_record_length = len(star_and_checksum_stripped_working_record)
-
     log.trace("_calculate_working_record_checksum(): stripped working_record length is %s",
-              working_record_length)
-
-    for x in range(0, working_record_length, 2):
-        value = star_and_checksum_stripped_working_record[x:x+2]
-        checksum += int(value, 16)
+              len(star_and_checksum_stripped_working_record))
 
-    modulo_checksum = checksum % 256
+    modulo_checksum = hex_byte_sum(star_and_checksum_stripped_working_record) % 256
 
     return modulo_checksum
 
@@ -103,17 +96,19 @@ class PhsenAbcdefDclMetadataDataParticle(DataParticle):
         log.trace("PhsenAbcdefDclMetadataDataParticle._generate_particle(): dcl_controller_timestamp= %s, "
                   "working_record= %s", dcl_controller_timestamp, working_record)
 
-        log.trace("PhsenAbcdefDclMetadataDataParticle._generate_particle(): Data Length= %s, working_record Length= %s",
-                  int(working_record[3:5], 16), len(working_record))
-
         ## Per the IDD, voltage_battery data is optional and not guaranteed to be included in every CONTROL
         ## data record. Nominal size of a metadata string without the voltage_battery data is 39 (including the #).
         ## Voltage data adds 4 ascii characters to that, so raw_data greater than 41 contains voltage data,
         ## anything smaller does not.
         if len(working_record) >= 41:
             have_voltage_battery_data = True
+            values = METADATA_WITH_VOLTAGE_BATTERY_LAYOUT.decode(working_record)
         else:
             have_voltage_battery_data = False
+            values = METADATA_LAYOUT.decode(working_record)
+
+        log.trace("PhsenAbcdefDclMetadataDataParticle._generate_particle(): Data Length= %s, working_record Length= %s",
+                  values[DATA_LENGTH], len(working_record))
 
         log.trace("PhsenAbcdefDclMetadataDataParticle._generate_particle(): "
                   "raw_data len= %s and contains: %s, have_voltage_battery_data= %s ",
@@ -122,22 +117,13 @@ class PhsenAbcdefDclMetadataDataParticle(DataParticle):
         ##
         ## Begin saving particle data
         ##
-        unique_id_ascii_hex = working_record[1:3]
-        ## convert 2 ascii (hex) chars to int
-        unique_id_int = int(unique_id_ascii_hex, 16)
-
-        record_type_ascii_hex = working_record[5:7]
-        ## convert 2 ascii (hex) chars to int
-        record_type_int = int(record_type_ascii_hex, 16)
-
-        record_time_ascii_hex = working_record[7:15]
-        ## convert 8 ascii (hex) chars to int
-        record_time_int = int(record_time_ascii_hex, 16)
+        unique_id_int = values[PhsenAbcdefDclMetadataDataParticleKey.UNIQUE_ID]
+        record_type_int = values[PhsenAbcdefDclMetadataDataParticleKey.RECORD_TYPE]
+        record_time_int = values[PhsenAbcdefDclMetadataDataParticleKey.RECORD_TIME]
 
         ## FLAGS
-        flags_ascii_hex = working_record[15:19]
-        ## convert 4 ascii (hex) chars to list of binary data
-        flags_ascii_int = int(flags_ascii_hex, 16)
+        ## convert the flags to list of binary data
+        flags_ascii_int = values[FLAGS]
         binary_list = [(flags_ascii_int >> x) & 0x1 for x in range(16)]
         # log.debug("PhsenAbcdefDclMetadataDataParticle._generate_particle(): binary_list= %s", binary_list)
 
@@ -158,49 +144,26 @@ class PhsenAbcdefDclMetadataDataParticle(DataParticle):
         flash_erased = binary_list[14]
         power_on_invalid = binary_list[15]
 
-        num_data_records_ascii_hex = working_record[19:25]
-        ## convert 6 ascii (hex) chars to int
-        num_data_records_int = int(num_data_records_ascii_hex, 16)
-
-        num_error_records_ascii_hex = working_record[25:31]
-        ## convert 6 ascii (hex) chars to int
-        num_error_records_int = int(num_error_records_ascii_hex, 16)
-
-        num_bytes_stored_ascii_hex = working_record[31:37]
-        ## convert 6 ascii (hex) chars to int
-        num_bytes_stored_int = int(num_bytes_stored_ascii_hex, 16)
+        num_data_records_int = values[PhsenAbcdefDclMetadataDataParticleKey.NUM_DATA_RECORDS]
+        num_error_records_int = values[PhsenAbcdefDclMetadataDataParticleKey.NUM_ERROR_RECORDS]
+        num_bytes_stored_int = values[PhsenAbcdefDclMetadataDataParticleKey.NUM_BYTES_STORED]
 
         calculated_checksum = _calculate_working_record_checksum(working_record)
 
         ## Record may not have voltage data...
         if have_voltage_battery_data:
-            voltage_battery_ascii_hex = working_record[37:41]
-            ## convert 4 ascii (hex) chars to int
-            voltage_battery_int = int(voltage_battery_ascii_hex, 16)
-
-            passed_checksum_ascii_hex = working_record[41:43]
-            ## convert 2 ascii (hex) chars to int
-            passed_checksum_int = int(passed_checksum_ascii_hex, 16)
-
-            ## Per IDD, if the calculated checksum does not match the checksum in the record,
-            ## use a checksum of zero in the resultant particle
-            if passed_checksum_int != calculated_checksum:
-                checksum_final = 0
-            else:
-                checksum_final = 1
+            voltage_battery_int = values[PhsenAbcdefDclMetadataDataParticleKey.VOLTAGE_BATTERY]
         else:
             voltage_battery_int = None
 
-            passed_checksum_ascii_hex = working_record[37:39]
-            ## convert 2 ascii (hex) chars to int
-            passed_checksum_int = int(passed_checksum_ascii_hex, 16)
+        passed_checksum_int = values[CHECKSUM]
 
-            ## Per IDD, if the calculated checksum does not match the checksum in the record,
-            ## use a checksum of zero in the resultant particle
-            if passed_checksum_int != calculated_checksum:
-                checksum_final = 0
-            else:
-                checksum_final = 1
+        ## Per IDD, if the calculated checksum does not match the checksum in the record,
+        ## use a checksum of zero in the resultant particle
+        if passed_checksum_int != calculated_checksum:
+            checksum_final = 0
+        else:
+            checksum_final = 1
 
         log.debug("### ### ###PhsenAbcdefDclMetadataDataParticle._generate_particle(): "
                   "calculated_checksum= %s, passed_checksum_int= %s", calculated_checksum, passed_checksum_int)
@@ -316,60 +279,29 @@ class PhsenAbcdefDclMetadataDataParticleKey(BaseEnum):
     PASSED_CHECKSUM = 'passed_checksum'
 
 
-class PhsenAbcdefDclInstrumentDataParticle(DataParticle):
-    measurement_num_of_chars = 4
-
-    def _create_light_measurements_array(self, working_record):
-        """
-        Creates a light measurement array from raw data for a PHSEN DCL Instrument record
-        @returns list a list of light measurement values.  From the IDD: (an) array of 92 light measurements
-                      (23 sets of 4 measurements)
-        """
-        light_measurements_list_int = []
-
-        light_measurements_chunk = working_record[83:-14]
-        light_measurements_ascii_hex = [light_measurements_chunk[i:i+self.measurement_num_of_chars]
-                                        for i in range(0, len(light_measurements_chunk),
-                                                       self.measurement_num_of_chars)]
-
-        for ascii_hex_value in light_measurements_ascii_hex:
-            light_measurements_int = convert_to_signed_int_16_bit(ascii_hex_value)
-            light_measurements_list_int.append(light_measurements_int)
-
-            log.trace("PhsenAbcdefDclInstrumentDataParticle._create_light_measurements_array(): "
-                      "ascii_hex_value= %s converted to light_measurements_int= %s",
-                      ascii_hex_value, light_measurements_int)
-
-        log.trace("PhsenAbcdefDclInstrumentDataParticle._create_light_measurements_array(): Array (list) is "
-                  "light_measurements_list_int= %s", light_measurements_list_int)
-
-        return light_measurements_list_int
-
-    def _create_reference_light_measurements_array(self, working_record):
-        """
-        Creates a reference light measurement array from raw data for a PHSEN DCL Instrument record
-        @returns list a list of light measurement values.  From the IDD: (an) array of 16 measurements
-                      (4 sets of 4 measurements)
-        """
-        reference_light_measurements_list_int = []
-
-        reference_light_measurements_chunk = working_record[19:-382]
-        reference_light_measurements_ascii_hex = [reference_light_measurements_chunk[i:i+self.measurement_num_of_chars]
-                                                  for i in range(0, len(reference_light_measurements_chunk),
-                                                                 self.measurement_num_of_chars)]
-
-        for ascii_hex_value in reference_light_measurements_ascii_hex:
-            reference_light_measurements_int = convert_to_signed_int_16_bit(ascii_hex_value)
-            reference_light_measurements_list_int.append(reference_light_measurements_int)
+## the fields of the records decoded which are not particle parameters
+DATA_LENGTH = 'data_length'
+FLAGS = 'flags'
+CHECKSUM = 'checksum'
+
+## the fields of a control record, with offsets from the leading * of the record
+METADATA_FIELDS = [
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.UNIQUE_ID, 1, 2),
+    HexField(DATA_LENGTH, 3, 2),
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.RECORD_TYPE, 5, 2),
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.RECORD_TIME, 7, 8),
+    HexField(FLAGS, 15, 4),
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.NUM_DATA_RECORDS, 19, 6),
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.NUM_ERROR_RECORDS, 25, 6),
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.NUM_BYTES_STORED, 31, 6)
+]
+METADATA_LAYOUT = HexRecordLayout(METADATA_FIELDS + [HexField(CHECKSUM, 37, 2)])
+METADATA_WITH_VOLTAGE_BATTERY_LAYOUT = HexRecordLayout(METADATA_FIELDS + [
+    HexField(PhsenAbcdefDclMetadataDataParticleKey.VOLTAGE_BATTERY, 37, 4),
+    HexField(CHECKSUM, 41, 2)])
 
-            log.trace("PhsenAbcdefDclInstrumentDataParticle._create_reference_light_measurements_array(): "
-                      "ascii_hex_value= %s converted to reference_light_measurements_int= %s",
-                      ascii_hex_value, reference_light_measurements_int)
 
-        log.trace("PhsenAbcdefDclInstrumentDataParticle._create_reference_light_measurements_array(): "
-                  "reference_light_measurements_list_int= %s", reference_light_measurements_list_int)
-
-        return reference_light_measurements_list_int
+class PhsenAbcdefDclInstrumentDataParticle(DataParticle):
 
     def _build_parsed_values(self):
         """
@@ -394,43 +326,33 @@ class PhsenAbcdefDclInstrumentDataParticle(DataParticle):
         log.trace("PhsenAbcdefDclInstrumentDataParticle._generate_particle(): dcl_controller_timestamp= %s, "
                   "working_record= %s", dcl_controller_timestamp, working_record)
 
+        ## decode all the fields of the record at once, light measurements included
+        values = INSTRUMENT_LAYOUT.decode(working_record)
+
         log.trace("PhsenAbcdefDclInstrumentDataParticle._generate_particle(): "
-                  "Data Length= %s, working_record Length= %s", int(working_record[3:5], 16), len(working_record))
+                  "Data Length= %s, working_record Length= %s", values[DATA_LENGTH], len(working_record))
 
         ##
         ## Begin saving particle data
         ##
-        unique_id_ascii_hex = working_record[1:3]
-        ## convert 2 ascii (hex) chars to int
-        unique_id_int = int(unique_id_ascii_hex, 16)
-
-        record_type_ascii_hex = working_record[5:7]
-        ## convert 2 ascii (hex) chars to int
-        record_type_int = int(record_type_ascii_hex, 16)
-
-        record_time_ascii_hex = working_record[7:15]
-        ## convert 8 ascii (hex) chars to int
-        record_time_int = int(record_time_ascii_hex, 16)
-
-        thermistor_start_ascii_hex = working_record[15:19]
-        ## convert 4 ascii (hex) chars to int
-        thermistor_start_int = int(thermistor_start_ascii_hex, 16)
+        unique_id_int = values[PhsenAbcdefDclInstrumentDataParticleKey.UNIQUE_ID]
+        record_type_int = values[PhsenAbcdefDclInstrumentDataParticleKey.RECORD_TYPE]
+        record_time_int = values[PhsenAbcdefDclInstrumentDataParticleKey.RECORD_TIME]
+        thermistor_start_int = values[PhsenAbcdefDclInstrumentDataParticleKey.THERMISTOR_START]
 
-        reference_light_measurements_list_int = self._create_reference_light_measurements_array(working_record)
+        ## From the IDD: (an) array of 16 reference light measurements (4 sets of 4 measurements)
+        ## and (an) array of 92 light measurements (23 sets of 4 measurements)
+        reference_light_measurements_list_int = \
+            values[PhsenAbcdefDclInstrumentDataParticleKey.REFERENCE_LIGHT_MEASUREMENTS]
+        light_measurements_list_int = values[PhsenAbcdefDclInstrumentDataParticleKey.LIGHT_MEASUREMENTS]
 
-        light_measurements_list_int = self._create_light_measurements_array(working_record)
-
-        voltage_battery_ascii_hex = working_record[455:459]
-        ## convert 4 ascii (hex) chars to int
-        voltage_battery_int = int(voltage_battery_ascii_hex, 16)
-
-        thermistor_end_ascii_hex = working_record[459:463]
-        ## convert 4 ascii (hex) chars to int
-        thermistor_end_int = int(thermistor_end_ascii_hex, 16)
+        log.trace("PhsenAbcdefDclInstrumentDataParticle._generate_particle(): "
+                  "reference_light_measurements_list_int= %s, light_measurements_list_int= %s",
+                  reference_light_measurements_list_int, light_measurements_list_int)
 
-        passed_checksum_ascii_hex = working_record[463:465]
-        ## convert 2 ascii (hex) chars to int
-        passed_checksum_int = int(passed_checksum_ascii_hex, 16)
+        voltage_battery_int = values[PhsenAbcdefDclInstrumentDataParticleKey.VOLTAGE_BATTERY]
+        thermistor_end_int = values[PhsenAbcdefDclInstrumentDataParticleKey.THERMISTOR_END]
+        passed_checksum_int = values[CHECKSUM]
 
         calculated_checksum = _calculate_working_record_checksum(working_record)
 
@@ -495,6 +417,22 @@ class PhsenAbcdefDclInstrumentDataParticleKey(BaseEnum):
     PASSED_CHECKSUM = 'passed_checksum'
 
 
+## the fields of an instrument record, with offsets from the leading * of the record,
+## the light measurements are signed 16 bit values
+INSTRUMENT_LAYOUT = HexRecordLayout([
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.UNIQUE_ID, 1, 2),
+    HexField(DATA_LENGTH, 3, 2),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.RECORD_TYPE, 5, 2),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.RECORD_TIME, 7, 8),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.THERMISTOR_START, 15, 4),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.REFERENCE_LIGHT_MEASUREMENTS, 19, 4, count=16, signed=True),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.LIGHT_MEASUREMENTS, 83, 4, count=92, signed=True),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.VOLTAGE_BATTERY, 455, 4),
+    HexField(PhsenAbcdefDclInstrumentDataParticleKey.THERMISTOR_END, 459, 4),
+    HexField(CHECKSUM, 463, 2)
+])
+
+
 class PhsenAbcdefDclMetadataRecoveredDataParticle(PhsenAbcdefDclMetadataDataParticle):
 
     _data_particle_type = DataParticleType.METADATA_RECOVERED
@@ -22,6 +22,7 @@ log = get_logger()
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys, SimpleParser
 from mi.dataset.parser.common_regexes import \
     ASCII_HEX_CHAR_REGEX, END_OF_LINE_REGEX, FLOAT_REGEX
+from mi.dataset.parser.hex_decoder import hex_values, hex_byte_sum
 from mi.dataset.parser.phsen_abcdef_imodem_particles import \
     PhsenAbcdefImodemDataParticleKey
 from mi.dataset.parser.utilities import \
@@ -276,18 +277,10 @@ class PhsenAbcdefImodemParser(SimpleParser):
         :return: dict filled in light or reference light measurements
         """
         log.trace("entered _populate_light_measurements()")
-        end_range = num_chars = 4
-        last_light_measurement_start_index = len(light_measurements)-3
-        for x in range(0, last_light_measurement_start_index, num_chars):
-            light_measurement = light_measurements[x: end_range]
-            log.trace("ascii-hex light_measurement[%s]: %s", x+1, light_measurement)
-            # convert to int
-            int_light_measurement = int(light_measurement, 16)
 
-            # append int value to instrument_dict
-            instrument_dict[dict_key].append(int_light_measurement)
-
-            end_range += num_chars
+        # convert all the 4 character ascii-hex light measurements at once
+        instrument_dict[dict_key].extend(hex_values(light_measurements, 4))
+        log.trace("light measurements: %s", instrument_dict[dict_key])
 
         return instrument_dict[dict_key]
 
@@ -302,7 +295,6 @@ class PhsenAbcdefImodemParser(SimpleParser):
 
         log.trace("_calculate_passed_checksum(): string_length is %s, record is %s, record_checksum is %s",
                   len(line), line, record_checksum)
-        checksum = 0
 
         # Strip off the leading part of the record, including the ID characters. This
         # will vary as some lines start with Record, and others don't. Also the
@@ -319,10 +311,7 @@ class PhsenAbcdefImodemParser(SimpleParser):
 
         log.trace("_calculate_passed_checksum(): stripped record length is %s",
                   stripped_record_length)
-        for x in range(0, stripped_record_length, 2):
-            value = stripped_record[x:x+2]
-            log.trace("value: %s", value)
-            checksum += int(value, 16)
+        checksum = hex_byte_sum(stripped_record)
 
         # module of the checksum will give us the low order byte
         log.trace("modulo of calculated checksum: %s", checksum % 256)
@@ -22,6 +22,7 @@ from mi.core.common import BaseEnum
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.exceptions import SampleException, RecoverableSampleException, UnexpectedDataException
 from mi.dataset.parser.common_regexes import ASCII_HEX_CHAR_REGEX
+from mi.dataset.parser.hex_decoder import hex_values, hex_byte_sum
 from mi.dataset.parser.sio_mule_common import SioParser, SIO_HEADER_MATCHER, SIO_BLOCK_END
 
 # match the ascii hex ph records
@@ -123,42 +124,16 @@ class PhsenAbcdefSioDataParticle(DataParticle):
         sec_since_1970 = int(ts, 16)
         self.set_internal_timestamp(unix_time=sec_since_1970)
 
-        ref_meas = []
-        previous_record_bytes = 4
-        # 4 sets of 4 reference light measurements (16 total)
-        for i in range(0, 16):
-            start_idx = previous_record_bytes + i * MEASUREMENT_BYTES
-            # confirm this contains only ascii hex chars
-            if HEX_INT_MATCHER.match(data_match.group(4)[start_idx:start_idx + MEASUREMENT_BYTES]):
-                this_ref = int(data_match.group(4)[start_idx:start_idx + MEASUREMENT_BYTES], 16)
-                ref_meas.append(this_ref)
-            else:
-                # don't send an exception if a non ascii hex char is in this value
-                ref_meas.append(None)
-
-        light_meas = []
-        n_outer_sets = 23
-        n_inner_sets = 4
-        previous_record_bytes = 68
-        # 23 sets of 4 light measurements
-        for i in range(0, n_outer_sets):
-            for s in range(0, n_inner_sets):
-                start_idx = previous_record_bytes + i * n_inner_sets * MEASUREMENT_BYTES + s * MEASUREMENT_BYTES
-                # confirm this contains only ascii hex chars
-                if HEX_INT_MATCHER.match(data_match.group(4)[start_idx:start_idx + MEASUREMENT_BYTES]):
-                    this_meas = int(data_match.group(4)[start_idx:start_idx + MEASUREMENT_BYTES], 16)
-                    light_meas.append(this_meas)
-                else:
-                    # don't send an exception if a non ascii hex char is in this value
-                    light_meas.append(None)
+        # 4 sets of 4 reference light measurements (16 total), then 23 sets of 4 light measurements,
+        # a measurement with a non ascii hex char is None rather than sending an exception
+        ref_meas = hex_values(data_match.group(4)[4:4 + 16 * MEASUREMENT_BYTES], MEASUREMENT_BYTES, strict=False)
+        light_meas = hex_values(data_match.group(4)[68:68 + 92 * MEASUREMENT_BYTES], MEASUREMENT_BYTES, strict=False)
 
         # calculate the checksum and compare with the received checksum
         passed_checksum = True
         try:
             chksum = int(data_match.group(0)[-3:-1], 16)
-            sum_bytes = 0
-            for i in range(7, 467, 2):
-                sum_bytes += int(data_match.group(0)[i:i + 2], 16)
+            sum_bytes = hex_byte_sum(data_match.group(0)[7:467])
             calc_chksum = sum_bytes & 255
             if calc_chksum != chksum:
                 passed_checksum = False
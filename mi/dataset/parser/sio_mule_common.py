@@ -11,14 +11,16 @@ sio which contain the common sio header.
 __author__ = 'Emily Hahn'
 __license__ = 'Apache 2.0'
 
+import mmap
 import re
-import struct
 import time
 import ntplib
+import numpy as np
 
 from mi.core.log import get_logger
 log = get_logger()
 from mi.dataset.dataset_parser import BufferLoadingParser
+from mi.dataset.parser.utilities import map_file
 
 # SIO Main controller header (ascii) and data (binary):
 #   Start of header
@@ -64,6 +66,332 @@ SIO_HEADER_GROUP_CHECKSUM = 5       # checksum
 # since block numbers roll over after 255
 # each block may contain multiple data samples
 
+# SIO header checksum, a reflected CRC-16 with this polynomial, an initial value of 0xFFFF
+# and the result inverted
+SIO_CRC_POLYNOMIAL = 0x8408
+SIO_CRC_INITIAL = 0xFFFF
+
+# blocks are checked together in batches of up to this many bytes, padded to the longest block
+SIO_CRC_BATCH_BYTES = 1 << 20
+# below this many blocks the checksums are calculated one block at a time
+SIO_CRC_MIN_BATCH = 16
+# number of candidate blocks found by the block reader before their checksums are checked
+SIO_BLOCK_BATCH = 256
+
+
+def crc_table():
+    """
+    Build the table of the checksum of each byte value
+    @returns: list of 256 checksums
+    """
+    table = []
+    for byte in xrange(256):
+        crc = byte
+        for _ in xrange(8):
+            crc = (crc >> 1) ^ SIO_CRC_POLYNOMIAL if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+SIO_CRC_TABLE = crc_table()
+SIO_CRC_ARRAY = np.array(SIO_CRC_TABLE, dtype=np.uint16)
+
+
+def crc16(data, start=0, end=None, crc=SIO_CRC_INITIAL):
+    """
+    Run the SIO checksum over data a byte at a time with the table
+    @param: data buffer holding the data
+    @param: start, end range of the data in the buffer
+    @param: crc checksum of the preceding data
+    @returns: checksum before inversion
+    """
+    table = SIO_CRC_TABLE
+    for byte in bytearray(data[start:end]):
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 255]
+    return crc
+
+
+def format_checksum(crc):
+    """
+    Format a checksum as in the SIO header, 4 upper case hex digits
+    @param: crc checksum before inversion
+    """
+    return '%04X' % (crc ^ 0xFFFF)
+
+
+def calc_checksums(data, blocks):
+    """
+    Calculate the SIO checksums of many blocks together. Blocks of similar length are batched,
+    and the checksums of a batch are run a byte position at a time across all its blocks.
+    @param: data buffer holding the blocks
+    @param: blocks list of (start, end) of the data of each block in the buffer
+    @returns: list of the checksums of the blocks, formatted as in the SIO header
+    """
+    if not blocks:
+        return []
+
+    starts, ends = np.array(blocks, dtype=np.int64).reshape(-1, 2).T
+    lengths = ends - starts
+    crcs = np.empty(len(blocks), dtype=np.uint16)
+
+    # longest blocks first, so each batch is padded to the length of its first block
+    order = np.argsort(-lengths, kind='mergesort')
+    first = 0
+    while first < len(order):
+        size = max(1, SIO_CRC_BATCH_BYTES // max(lengths[order[first]], 1))
+        rows = order[first:first + size]
+        crcs[rows] = _batch_crc16(data, starts[rows], lengths[rows])
+        first += size
+
+    return [format_checksum(crc) for crc in crcs.tolist()]
+
+
+def _batch_crc16(data, starts, lengths):
+    """
+    Run the checksums of a batch of blocks, longest first
+    """
+    count = len(starts)
+    max_length = int(lengths[0])
+    crcs = np.empty(count, dtype=np.uint16)
+    crcs.fill(SIO_CRC_INITIAL)
+
+    # a row per byte position, with a column per block
+    columns = np.zeros((max_length, count), dtype=np.uint8)
+    for column, (start, length) in enumerate(zip(starts.tolist(), lengths.tolist())):
+        columns[:length, column] = np.frombuffer(data[start:start + length], dtype=np.uint8)
+    # the number of blocks still running at each position
+    active = np.searchsorted(-lengths, -np.arange(max_length), side='left')
+
+    position = 0
+    while position < max_length and active[position] >= SIO_CRC_MIN_BATCH:
+        running = crcs[:active[position]]
+        crcs[:active[position]] = (running >> 8) ^ SIO_CRC_ARRAY[(running ^ columns[position, :active[position]]) & 255]
+        position += 1
+
+    # finish the few longest blocks one at a time
+    if position < max_length:
+        for column in xrange(active[position]):
+            start = int(starts[column])
+            crcs[column] = crc16(data, start + position, start + int(lengths[column]), int(crcs[column]))
+
+    return crcs
+
+
+def sio_blocks(data, start=0, batch=SIO_BLOCK_BATCH):
+    """
+    Scan data for SIO blocks, checking the end of block byte and the checksum of each block. The
+    candidate blocks are checked in batches as the scan goes on, so only a batch is held at a time.
+    Headers found within the data of a good block are part of that data and skipped.
+    @param: data string or memory map to scan
+    @param: start index to start scanning from
+    @param: batch number of candidate blocks checked together
+    @returns: generator of (header match, data, start index) of each good block, the header fields
+      are the groups of the match and the data is a view of the block data without the end of block byte
+    """
+    try:
+        view = memoryview(data)
+    except TypeError:
+        # a memory map only has the old buffer interface in python 2
+        view = None
+
+    block_end = start
+    candidates = []
+    matches = SIO_HEADER_MATCHER.finditer(data, start)
+    match = next(matches, None)
+
+    while match is not None or candidates:
+        while match is not None and len(candidates) < batch:
+            #
+            # Calculate the expected end index of the SIO block.
+            # If there are not enough bytes to comprise an entire SIO block,
+            # this header is skipped.
+            #
+            end_packet_idx = match.end(0) + int(match.group(SIO_HEADER_GROUP_DATA_LENGTH), 16)
+
+            if end_packet_idx < len(data):
+                if data[end_packet_idx] == SIO_BLOCK_END:
+                    candidates.append((match, end_packet_idx))
+                else:
+                    log.debug('End packet at %d is not x03 for header %s',
+                              end_packet_idx, match.group(0)[1:32])
+            match = next(matches, None)
+
+        #
+        # Calculate the checksums of the data portion of the candidate
+        # SIO blocks together (excludes start of header, header,
+        # and end of header).
+        #
+        checksums = calc_checksums(data, [(header.end(0), end_packet_idx)
+                                          for header, end_packet_idx in candidates])
+
+        for (header, end_packet_idx), actual_checksum in zip(candidates, checksums):
+            if header.start(0) < block_end:
+                continue
+
+            expected_checksum = header.group(SIO_HEADER_GROUP_CHECKSUM)
+            if actual_checksum == expected_checksum:
+                block_end = end_packet_idx + 1
+                if view is not None:
+                    block_data = view[header.end(0):end_packet_idx]
+                else:
+                    block_data = buffer(data, header.end(0), end_packet_idx - header.end(0))
+                yield header, block_data, header.start(0)
+            else:
+                log.debug("Calculated checksum %s != received checksum %s for header %s and packet %d to %d",
+                          actual_checksum, expected_checksum,
+                          header.group(0)[1:32],
+                          header.end(0), end_packet_idx)
+
+        candidates = []
+
+
+def sio_block_gaps(blocks):
+    """
+    Add the end index of the preceding block to each block, anything between that and the block is non data
+    @param: blocks (header match, data, start index) of each block, as from sio_blocks
+    @returns: generator of (header match, data, start index, end index of the preceding block)
+    """
+    previous_end = 0
+    for header, block_data, start in blocks:
+        yield header, block_data, start, previous_end
+        previous_end = header.end(0) + len(block_data) + 1
+
+
+class SioBlockQueue(object):
+    """
+    Hands out the blocks from the SIO block reader through the chunker calls the SIO parsers
+    make. Data chunks are the whole SIO blocks, and non data is what lies between a block and
+    the block before it in the file. Indices are those of the file, so only a block is held at a time.
+    """
+
+    def __init__(self, data, timestamp, blocks=None):
+        """
+        @param: data string or memory map of the file
+        @param: timestamp the timestamp handed out with each chunk
+        @param: blocks (header match, data, start index, end index of the preceding block) of the blocks
+          to hand out, as from sio_block_gaps, by default all the blocks of the file
+        """
+        self._data = data
+        self._blocks = iter(blocks if blocks is not None else sio_block_gaps(sio_blocks(data)))
+        self._timestamp = timestamp
+        # end index of the last block or non data handed out, and the next block
+        self._position = 0
+        self._next_block = next(self._blocks, None)
+
+    def get_next_data(self, clean=True):
+        """
+        @returns: (timestamp, chunk) of the next block, (None, None) if there are no more blocks
+        """
+        (timestamp, chunk, start, end) = self.get_next_data_with_index(clean)
+        return timestamp, chunk
+
+    def get_next_data_with_index(self, clean=True):
+        """
+        @param: clean False to leave the block in the queue
+        @returns: (timestamp, chunk, start, end) of the next block, all None if there are no more blocks
+        """
+        if self._next_block is None:
+            return None, None, None, None
+
+        header, block_data, start, previous_end = self._next_block
+        end = header.end(0) + len(block_data) + 1
+        if clean:
+            self._position = end
+            self._next_block = next(self._blocks, None)
+        return self._timestamp, self._data[start:end], start, end
+
+    def get_next_non_data(self, clean=True):
+        """
+        @returns: (timestamp, non_data) before the next block, (None, None) if there is none
+        """
+        (timestamp, non_data, start, end) = self.get_next_non_data_with_index(clean)
+        return timestamp, non_data
+
+    def get_next_non_data_with_index(self, clean=True):
+        """
+        Get the non data before the next block, trailing data after the last block is not handed out
+        @param: clean True to drop the non data from the queue
+        @returns: (timestamp, non_data, start, end), all None if there is none
+        """
+        if self._next_block is None:
+            return None, None, None, None
+
+        header, block_data, block_start, previous_end = self._next_block
+        start, end = max(previous_end, self._position), block_start
+        if start >= end:
+            return None, None, None, None
+
+        if clean:
+            self._position = end
+        return self._timestamp, self._data[start:end], start, end
+
+
+class SioMuleDemultiplexer(object):
+    """
+    Reads the SIO blocks of a mule file once and routes each block by its instrument ID to the
+    parsers registered for that instrument, so the parsers of all the instruments on the mule
+    share one pass over the file. Particles are returned from each parser in turn.
+    """
+
+    def __init__(self, stream_handle):
+        """
+        @param: stream_handle An already open file-like file handle
+        """
+        self._stream_handle = stream_handle
+        self._routes = []
+        # the parsers with particles left to return, None until the file is parsed
+        self._pending = None
+
+    def register(self, parser, instrument_ids):
+        """
+        @param: parser SioParser to hand the blocks of the instruments to
+        @param: instrument_ids SIO header instrument IDs of the blocks the parser handles
+        """
+        self._routes.append((parser, frozenset(instrument_ids)))
+
+    def parse_file(self):
+        """
+        Read the blocks of the file and have each parser parse the blocks routed to it
+        """
+        route_blocks = dict((instrument_id, []) for parser, instrument_ids in self._routes
+                            for instrument_id in instrument_ids)
+        data = map_file(self._stream_handle)
+        try:
+            for block in sio_block_gaps(sio_blocks(data)):
+                blocks = route_blocks.get(block[0].group(SIO_HEADER_GROUP_ID))
+                if blocks is not None:
+                    blocks.append(block)
+
+            timestamp = ntplib.system_to_ntp_time(time.time())
+            for parser, instrument_ids in self._routes:
+                blocks = sorted((block for instrument_id in instrument_ids for block in route_blocks[instrument_id]),
+                                key=lambda block: block[2])
+                parser.parse_blocks(SioBlockQueue(data, timestamp, blocks))
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+        self._pending = [parser for parser, instrument_ids in self._routes]
+
+    def get_records(self, num_records):
+        """
+        Get particles from the registered parsers, parsing the file with the first call
+        @param: num_records The number of records to gather
+        @returns: list of the particles requested, [] if none are left
+        """
+        if self._pending is None:
+            self.parse_file()
+
+        records = []
+        while self._pending and len(records) < num_records:
+            parser_records = self._pending[0].get_records(num_records - len(records))
+            if parser_records:
+                records.extend(parser_records)
+            else:
+                self._pending.pop(0)
+        return records
+
+
 # constants for accessing unprocessed and in process data
 START_IDX = 0
 END_IDX = 1
@@ -88,7 +416,6 @@ class SioParser(BufferLoadingParser):
                                         None,
                                         exception_callback)
 
-        self.all_data = None
         self.input_file = stream_handle
         self._record_buffer = []  # holds list of records
 
@@ -98,64 +425,27 @@ class SioParser(BufferLoadingParser):
         Calculate SIO header checksum of data
         @param: data input data to calculate the checksum on
         """
-        crc = 65535
-        if len(data) == 0:
-            return '0000'
-        for iData in range(0, len(data)):
-            short = struct.unpack('H', data[iData] + '\x00')
-            point = 255 & short[0]
-            crc ^= point
-            for i in range(7, -1, -1):
-                if crc & 1:
-                    crc = (crc >> 1) ^ 33800
-                else:
-                    crc >>= 1
-        crc = ~crc
-        # convert to unsigned
-        if crc < 0:
-            crc += 65536
-        # get rid of the '0x' from the hex string
-        crc = "%s" % hex(crc)[2:].upper()
-        # make sure we have the right format for comparing, must be 4 hex digits
-        if len(crc) == 3:
-            crc = '0' + crc
-        elif len(crc) == 2:
-            crc = '00' + crc
-        elif len(crc) == 1:
-            crc = '000' + crc
-        return crc
+        return format_checksum(crc16(data))
 
     def get_records(self, num_records):
         """
         Go ahead and execute the data parsing loop up to a point. This involves
-        getting data from the file, stuffing it in to the chunker, then parsing
-        it and publishing.
+        reading the SIO blocks from the file through the block queue, then parsing
+        them and publishing.
         @param: num_records The number of records to gather
         @returns: Return the list of particles requested, [] if none available
         """
         if num_records <= 0:
             return []
 
-        if self.all_data is None:
-            # need to read in the entire data file first and store it because escape sequences shift position of
-            # in process and unprocessed blocks
-            self.all_data = self.read_file()
-            self.file_complete = True
-
-            # there is more data, add it to the chunker
-            self._chunker.add_chunk(self.all_data, ntplib.system_to_ntp_time(time.time()))
-
-            # parse the chunks now that there is new data in the chunker
-            result = self.parse_chunks()
-
-            # clear out any non matching data.  Don't do this during parsing because
-            # it cleans out actual data too because of the way the chunker works
-            (nd_timestamp, non_data) = self._chunker.get_next_non_data(clean=True)
-            while non_data is not None:
-                (nd_timestamp, non_data) = self._chunker.get_next_non_data(clean=True)
-
-            # add the parsed chunks to the record_buffer
-            self._record_buffer.extend(result)
+        if not self.file_complete:
+            # scan the mapped file for SIO blocks, handing them to the parser through the block queue
+            data = map_file(self._stream_handle)
+            try:
+                self.parse_blocks(SioBlockQueue(data, ntplib.system_to_ntp_time(time.time())))
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
 
         if len(self._record_buffer) < num_records:
             num_to_fetch = len(self._record_buffer)
@@ -166,22 +456,14 @@ class SioParser(BufferLoadingParser):
 
         return return_list
 
-    def read_file(self):
+    def parse_blocks(self, block_queue):
         """
-        This function reads the entire input file.
-        @returns: A string containing the contents of the entire file.
+        Parse the blocks handed out by a block queue, adding the particles to the record buffer
+        @param: block_queue SioBlockQueue of the blocks to parse
         """
-        input_buffer = ''
-
-        while True:
-            # read data in small blocks in order to not block processing
-            next_data = self._stream_handle.read(1024)
-            if next_data != '':
-                input_buffer = input_buffer + next_data
-            else:
-                break
-
-        return input_buffer
+        self._chunker = block_queue
+        self.file_complete = True
+        self._record_buffer.extend(self.parse_chunks())
 
     def sieve_function(self, raw_data):
         """
@@ -193,56 +475,8 @@ class SioParser(BufferLoadingParser):
         @param: raw_data The raw data to search
         @returns: list of matched start,end index found in raw_data
         """
-        return_list = []
-
-        #
-        # Search the entire input buffer to find all possible SIO headers.
-        #
-        for match in SIO_HEADER_MATCHER.finditer(raw_data):
-            #
-            # Calculate the expected end index of the SIO block.
-            # If there are enough bytes to comprise an entire SIO block,
-            # continue processing.
-            # If there are not enough bytes, we're done parsing this input.
-            #
-            data_len = int(match.group(SIO_HEADER_GROUP_DATA_LENGTH), 16)
-            end_packet_idx = match.end(0) + data_len
-
-            if end_packet_idx < len(raw_data):
-                #
-                # Get the last byte of the SIO block
-                # and make sure it matches the expected value.
-                #
-                end_packet = raw_data[end_packet_idx]
-                if end_packet == SIO_BLOCK_END:
-                    #
-                    # Calculate the checksum on the data portion of the
-                    # SIO block (excludes start of header, header,
-                    # and end of header).
-                    #
-                    actual_checksum = SioParser.calc_checksum(
-                        raw_data[match.end(0):end_packet_idx])
-
-                    expected_checksum = match.group(SIO_HEADER_GROUP_CHECKSUM)
-
-                    #
-                    # If the checksums match, add the start,end indices to
-                    # the return list.  The end of SIO block byte is included.
-                    #
-                    if actual_checksum == expected_checksum:
-                        # even if this is not the right instrument, keep track that
-                        # this packet was processed
-                        return_list.append((match.start(0), end_packet_idx+1))
-                    else:
-                        log.debug("Calculated checksum %s != received checksum %s for header %s and packet %d to %d",
-                                  actual_checksum, expected_checksum,
-                                  match.group(0)[1:32],
-                                  match.end(0), end_packet_idx)
-                else:
-                    log.debug('End packet at %d is not x03 for header %s',
-                              end_packet_idx, match.group(0)[1:32])
-
-        return return_list
+        return [(start, header.end(0) + len(block_data) + 1)
+                for header, block_data, start in sio_blocks(raw_data)]
 
     def _yank_particles(self, num_to_fetch):
         """
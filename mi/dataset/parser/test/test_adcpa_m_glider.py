@@ -128,9 +128,9 @@ class AdcpsMGliderParserUnitTestCase(ParserUnitTestCase):
 
             parser = AdcpPd0Parser(self.config_recov, stream_handle, self.exception_callback)
 
-            # try to get 3 particles, should only get 2 back
-            # the second one should correspond to ensemble 3
-            parser.get_records(3)
+            # particles are parsed as they are requested, ask for more than the
+            # file holds so the corrupted 2nd record is reached
+            parser.get_records(10)
 
             log.debug('Exceptions : %s', self.exception_callback_value[0])
 
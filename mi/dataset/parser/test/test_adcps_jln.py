@@ -1,427 +1,535 @@
-#!/usr/bin/env python
-
-"""
-@package mi.dataset.parser.test
-@stream_handle marine-integrations/mi/dataset/parser/test/test_adcps_jln.py
-@author Jeff Roy
-@brief Test code for a adcps_jln data parser
-Parts of this test code were taken from test_adcpa.py
-Due to the nature of the records in PD0 files, (large binary records with hundreds of parameters)
-this code verifies select items in the parsed data particle
-"""
-import copy
-import pprint
-
-from nose.plugins.attrib import attr
-import yaml
-import numpy
-import os
-
-from mi.core.log import get_logger
-log = get_logger()
-
-from mi.idk.config import Config
-from mi.dataset.test.test_parser import ParserUnitTestCase
-from mi.dataset.dataset_parser import DataSetDriverConfigKeys
-from mi.dataset.parser.adcp_pd0 import AdcpPd0Parser
-
-RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset',
-                             'driver', 'adcps_jln', 'stc', 'resource')
-
-
-@attr('UNIT', group='mi')
-class AdcpsJlnParserUnitTestCase(ParserUnitTestCase):
-    """
-    adcps_jln Parser unit test suite
-    """
-
-    def setUp(self):
-        ParserUnitTestCase.setUp(self)
-        self.config = {
-            DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
-                'velocity': 'VelocityEarth',
-                'engineering': 'AdcpsEngineering',
-                'config': 'AdcpsConfig',
-                'bottom_track': 'EarthBottom',
-                'bottom_track_config': 'BottomConfig',
-            }
-        }
-        # Define test data particles and their associated timestamps which will be
-        # compared with returned results
-
-        # test01 data was all manually verified against the IDD
-        # and double checked with PD0decoder_v2 MATLAB tool
-        self.test01 = {'internal_timestamp': 3581719370.030000,
-                       'echo_intensity_beam1': [89, 51, 44, 43, 43, 43, 43, 44, 43, 44, 43, 43, 44, 44, 44,
-                                                43, 43, 44, 43, 44, 44, 43, 43, 44, 44, 44, 44, 44, 44, 44,
-                                                43, 43, 43, 43, 43, 43, 43, 44, 44, 43, 44, 44, 43, 43, 44,
-                                                43, 43, 44, 44, 43, 43, 44, 43, 43, 44],
-                       'correlation_magnitude_beam1': [68, 70, 18, 19, 17, 17, 20, 19, 17, 15, 17, 20, 16,
-                                                       17, 16, 17, 17, 18, 18, 17, 17, 19, 18, 17, 17, 19,
-                                                       19, 17, 16, 16, 18, 19, 19, 17, 19, 19, 19, 18, 20,
-                                                       17, 19, 19, 17, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-                       'percent_good_3beam': [53, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
-                                              0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
-                                              0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-                       'water_velocity_east': [383, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768],
-                       'water_velocity_north': [314, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768],
-                       'water_velocity_up': [459, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                             -32768],
-                       'error_velocity': [80, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
-                                          -32768]}
-        # test02 data was extracted using the PD0decoder_v2 MATLAB tool
-        # ensemble 1 of file ADCP_CCE1T_20.000
-        self.test02 = {'ensemble_number': 1, 'heading': 21348, 'pitch': 4216, 'roll': 3980}
-
-        # test03 data was extracted using the PD0decoder_v2 MATLAB tool
-        # ensemble 20 of file ADCP_CCE1T_20.000
-        self.test03 = {'ensemble_number': 20, 'heading': 538, 'pitch': 147, 'roll': 221}
-
-    def assert_result(self, test, particle):
-        """
-        Suite of tests to run against each returned particle and expected
-        results of the same.  The test parameter should be a dictionary
-        that contains the keys to be tested in the particle
-        the 'internal_timestamp' and 'position' keys are
-        treated differently than others but can be verified if supplied
-        """
-
-        particle_dict = particle.generate_dict()
-
-        # for efficiency turn the particle values list of dictionaries into a dictionary
-        particle_values = {}
-        for param in particle_dict.get('values'):
-            particle_values[param['value_id']] = param['value']
-
-        # compare each key in the test to the data in the particle
-        for key in test:
-            test_data = test[key]
-
-            # get the correct data to compare to the test
-            if key == 'internal_timestamp':
-                particle_data = particle.get_value('internal_timestamp')
-                # the timestamp is in the header part of the particle
-            elif key == 'position':
-                particle_data = self.state_callback_value['position']
-                # position corresponds to the position in the file
-            else:
-                particle_data = particle_values.get(key)
-                # others are all part of the parsed values part of the particle
-
-            if particle_data is None:
-                # generally OK to ignore index keys in the test data, verify others
-                log.warning("\nWarning: assert_result ignoring test key %s, does not exist in particle", key)
-            else:
-                if isinstance(test_data, float):
-                    # slightly different test for these values as they are floats.
-                    compare = numpy.abs(test_data - particle_data) <= 1e-5
-                    self.assertTrue(compare)
-                else:
-                    # otherwise they are all ints and should be exactly equal
-                    self.assertEqual(test_data, particle_data, msg=particle_values)
-
-    def test_simple(self):
-        """
-        Read test data and pull out data particles one at a time.
-        Assert that the results are those we expected.
-        The contents of ADCP_data_20130702.000 are the expected results
-        from the IDD.  These results for the that record were manually verified
-        and are the entire parsed particle is represented in ADCP_data_20130702.yml
-        """
-
-        # ADCP_data_20130702.PD0 has one record in it
-        with open(os.path.join(RESOURCE_PATH, 'ADCP_data_20130702.000'), 'rb') as stream_handle:
-
-            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
-
-            particles = parser.get_records(4)
-
-            # this simple test shows the 2 ways to verify results
-            self.assert_result(self.test01, particles[0])
-
-            self.assert_particles(particles, 'ADCP_data_20130702.yml', RESOURCE_PATH)
-            self.assertEqual(self.exception_callback_value, [])
-
-    def test_get_many(self):
-        """
-        Read test data and pull out multiple data particles at one time.
-        Assert that the results are those we expected.
-        """
-
-        # ADCP_CCE1T_20.000 has 20 records in it
-        with open(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), 'rb') as stream_handle:
-
-            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
-
-            particles = parser.get_records(50)
-
-            self.assert_result(self.test02, particles[0])
-            self.assert_result(self.test03, particles[43])
-
-    def test_bad_data(self):
-        """
-        Ensure that bad data is skipped when it exists.
-        """
-        # ADCP_data_Corrupted.PD0 has one bad record followed by one good in it
-        with open(os.path.join(RESOURCE_PATH, 'ADCP_data_Corrupted.000'), 'rb') as stream_handle:
-
-            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
-
-            particles = parser.get_records(1)
-            self.assert_result(self.test01, particles[0])
-
-    def test_long_stream(self):
-        """
-        Verify an entire file against a yaml result file.
-        """
-        with open(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), 'rb') as stream_handle:
-
-            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
-
-            particles = parser.get_records(47)
-
-            self.assert_particles(particles, 'ADCP_CCE1T_20.yml', RESOURCE_PATH)
-            self.assertEqual(self.exception_callback_value, [])
-
-
-def convert_yml(input_file):
-    earth = [
-        'num_cells',
-        'cell_length',
-        'bin_1_distance',
-        'ensemble_number',
-        'heading',
-        'pitch',
-        'roll',
-        'salinity',
-        'temperature',
-        'transducer_depth',
-        'pressure',
-        'sysconfig_vertical_orientation',
-        'water_velocity_east',
-        'water_velocity_north',
-        'water_velocity_up',
-        'error_velocity',
-        'water_velocity_forward',
-        'water_velocity_starboard',
-        'water_velocity_vertical',
-        'correlation_magnitude_beam1',
-        'correlation_magnitude_beam2',
-        'correlation_magnitude_beam3',
-        'correlation_magnitude_beam4',
-        'echo_intensity_beam1',
-        'echo_intensity_beam2',
-        'echo_intensity_beam3',
-        'echo_intensity_beam4',
-        'percent_good_3beam',
-        'percent_transforms_reject',
-        'percent_bad_beams',
-        'percent_good_4beam',
-    ]
-
-    config = [
-        'firmware_version',
-        'firmware_revision',
-        'data_flag',
-        'lag_length',
-        'num_beams',
-        'num_cells',
-        'pings_per_ensemble',
-        'cell_length',
-        'blank_after_transmit',
-        'signal_processing_mode',
-        'low_corr_threshold',
-        'num_code_repetitions',
-        'percent_good_min',
-        'error_vel_threshold',
-        'time_per_ping_minutes',
-        'time_per_ping_seconds',
-        'heading_alignment',
-        'heading_bias',
-        'reference_layer_start',
-        'reference_layer_stop',
-        'false_target_threshold',
-        'low_latency_trigger',
-        'transmit_lag_distance',
-        'cpu_board_serial_number',
-        'system_bandwidth',
-        'system_power',
-        'serial_number',
-        'beam_angle',
-        'sysconfig_frequency',
-        'sysconfig_beam_pattern',
-        'sysconfig_sensor_config',
-        'sysconfig_head_attached',
-        'sysconfig_vertical_orientation',
-        'sysconfig_beam_angle',
-        'sysconfig_beam_config',
-        'coord_transform_type',
-        'coord_transform_tilts',
-        'coord_transform_beams',
-        'coord_transform_mapping',
-        'sensor_source_speed',
-        'sensor_source_depth',
-        'sensor_source_heading',
-        'sensor_source_pitch',
-        'sensor_source_roll',
-        'sensor_source_conductivity',
-        'sensor_source_temperature',
-        'sensor_source_temperature_eu',
-        'sensor_available_speed',
-        'sensor_available_depth',
-        'sensor_available_heading',
-        'sensor_available_pitch',
-        'sensor_available_roll',
-        'sensor_available_conductivity',
-        'sensor_available_temperature',
-        'sensor_available_temperature_eu',
-    ]
-
-    engineering = [
-        'transmit_pulse_length',
-        'speed_of_sound',
-        'mpt_minutes',
-        'mpt_seconds',
-        'heading_stdev',
-        'pitch_stdev',
-        'roll_stdev',
-        'pressure_variance',
-        'adc_ambient_temp',
-        'adc_attitude',
-        'adc_attitude_temp',
-        'adc_contamination_sensor',
-        'adc_pressure_minus',
-        'adc_pressure_plus',
-        'adc_transmit_current',
-        'adc_transmit_voltage',
-    ]
-
-    stream_map = {
-        'adcp_velocity_earth': ('VelocityEarth', earth),
-        'adcp_config': ('AdcpsConfig', config),
-        'adcp_engineering': ('AdcpsEngineering', engineering),
-    }
-
-    streams = [
-        'adcp_velocity_earth',
-        'adcp_config',
-        'adcp_engineering',
-    ]
-
-    always = streams[:1]
-
-    last = {}
-
-    def create_particle(record, index, stream):
-        klass, fields = stream_map.get(stream)
-        particle = {field: record.get(field) for field in fields if field in record}
-        particle['_index'] = index
-        particle['particle_object'] = klass
-        particle['particle_type'] = stream
-        particle['internal_timestamp'] = record['internal_timestamp']
-
-        if 'time_per_ping_seconds' in fields:
-            seconds = particle['time_per_ping_seconds']
-            int_seconds = int(seconds)
-            hundredths = int(100 * (seconds - int_seconds))
-            particle['time_per_ping_hundredths'] = hundredths
-            particle['time_per_ping_seconds'] = int_seconds
-
-        if 'mpt_seconds' in fields:
-            seconds = particle['mpt_seconds']
-            int_seconds = int(seconds)
-            hundredths = int(100 * (seconds - int_seconds))
-            particle['mpt_hundredths'] = hundredths
-            particle['mpt_seconds'] = int_seconds
-
-        if stream == 'adcp_engineering':
-            bit_result = (
-                record.get('bit_result_demod_1', 0) * 0b10000 +
-                record.get('bit_result_demod_0', 0) * 0b1000 +
-                record.get('bit_result_timing', 0) * 0b10
-            )
-            particle['bit_result'] = bit_result
-
-            esw = (
-                record.get('bus_error_exception', 0) +
-                record.get('address_error_exception', 0) * 0b10 +
-                record.get('illegal_instruction_exception', 0) * 0b100 +
-                record.get('zero_divide_instruction', 0) * 0b1000 +
-                record.get('emulator_exception', 0) * 0b10000 +
-                record.get('unassigned_exception', 0) * 0b100000 +
-                record.get('watchdog_restart_occurred', 0) * 0b1000000 +
-                record.get('battery_saver_power', 0) * 0b10000000 +
-                record.get('pinging', 0) * (0b1 << 8) +
-                record.get('cold_wakeup_occurred', 0) * (0b1000000 << 8) +
-                record.get('unknown_wakeup_occurred', 0) * (0b10000000 << 8) +
-                record.get('clock_read_error', 0) * (0b1 << 16) +
-                record.get('unexpected_alarm', 0) * (0b10 << 16) +
-                record.get('clock_jump_forward', 0) * (0b100 << 16) +
-                record.get('clock_jump_backward', 0) * (0b1000 << 16) +
-                record.get('power_fail', 0) * (0b1000 << 24) +
-                record.get('spurious_dsp_interrupt', 0) * (0b10000 << 24) +
-                record.get('spurious_uart_interrupt', 0) * (0b100000 << 24) +
-                record.get('spurious_clock_interrupt', 0) * (0b1000000 << 24) +
-                record.get('level_7_interrupt', 0) * (0b10000000 << 24)
-            )
-            particle['error_status_word'] = esw
-
-        return particle
-
-    def changed(particle):
-        particle = copy.deepcopy(particle)
-        stream = particle.pop('particle_type')
-        particle.pop('particle_object')
-        particle.pop('_index')
-        particle.pop('internal_timestamp')
-        last_values = last.get(stream)
-        if last_values == particle:
-            return False
-
-        last[stream] = particle
-        return True
-
-    out_records = []
-    records = yaml.load(open(input_file))
-    index = 1
-    for record in records['data']:
-        for stream in streams:
-            particle = create_particle(record, index, stream)
-            if stream in always or changed(particle):
-                out_records.append(particle)
-                index += 1
-
-    records['data'] = out_records
-    yaml.dump(records, open(input_file, 'w'))
-
-
-def convert_all():
-    yml_files = [
-        'ADCP_data_20130702.yml',
-        'ADCP_CCE1T_20.yml',
-    ]
-
-    for f in yml_files:
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@stream_handle marine-integrations/mi/dataset/parser/test/test_adcps_jln.py
+@author Jeff Roy
+@brief Test code for a adcps_jln data parser
+Parts of this test code were taken from test_adcpa.py
+Due to the nature of the records in PD0 files, (large binary records with hundreds of parameters)
+this code verifies select items in the parsed data particle
+"""
+import copy
+import pprint
+import struct
+
+from nose.plugins.attrib import attr
+import yaml
+import numpy
+import os
+
+from mi.core.exceptions import RecoverableSampleException
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser import adcp_pd0
+from mi.dataset.parser.adcp_pd0 import AdcpPd0Parser, AdcpsConfig, AdcpsEngineering, BottomConfig, GliderConfig, \
+    GliderEngineering, VelocityEarth
+from mi.dataset.parser.pd0_parser import AdcpPd0Record, BlockId, PD0ParsingException
+
+RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset',
+                             'driver', 'adcps_jln', 'stc', 'resource')
+GLIDER_RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset',
+                                    'driver', 'moas', 'gl', 'adcpa', 'resource')
+
+
+@attr('UNIT', group='mi')
+class AdcpsJlnParserUnitTestCase(ParserUnitTestCase):
+    """
+    adcps_jln Parser unit test suite
+    """
+
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.config = {
+            DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+                'velocity': 'VelocityEarth',
+                'engineering': 'AdcpsEngineering',
+                'config': 'AdcpsConfig',
+                'bottom_track': 'EarthBottom',
+                'bottom_track_config': 'BottomConfig',
+            }
+        }
+        # Define test data particles and their associated timestamps which will be
+        # compared with returned results
+
+        # test01 data was all manually verified against the IDD
+        # and double checked with PD0decoder_v2 MATLAB tool
+        self.test01 = {'internal_timestamp': 3581719370.030000,
+                       'echo_intensity_beam1': [89, 51, 44, 43, 43, 43, 43, 44, 43, 44, 43, 43, 44, 44, 44,
+                                                43, 43, 44, 43, 44, 44, 43, 43, 44, 44, 44, 44, 44, 44, 44,
+                                                43, 43, 43, 43, 43, 43, 43, 44, 44, 43, 44, 44, 43, 43, 44,
+                                                43, 43, 44, 44, 43, 43, 44, 43, 43, 44],
+                       'correlation_magnitude_beam1': [68, 70, 18, 19, 17, 17, 20, 19, 17, 15, 17, 20, 16,
+                                                       17, 16, 17, 17, 18, 18, 17, 17, 19, 18, 17, 17, 19,
+                                                       19, 17, 16, 16, 18, 19, 19, 17, 19, 19, 19, 18, 20,
+                                                       17, 19, 19, 17, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                       'percent_good_3beam': [53, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                                              0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                                              0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                       'water_velocity_east': [383, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                               -32768, -32768, -32768, -32768, -32768, -32768, -32768],
+                       'water_velocity_north': [314, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                                -32768, -32768, -32768, -32768, -32768, -32768, -32768],
+                       'water_velocity_up': [459, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                             -32768],
+                       'error_velocity': [80, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768, -32768,
+                                          -32768]}
+        # test02 data was extracted using the PD0decoder_v2 MATLAB tool
+        # ensemble 1 of file ADCP_CCE1T_20.000
+        self.test02 = {'ensemble_number': 1, 'heading': 21348, 'pitch': 4216, 'roll': 3980}
+
+        # test03 data was extracted using the PD0decoder_v2 MATLAB tool
+        # ensemble 20 of file ADCP_CCE1T_20.000
+        self.test03 = {'ensemble_number': 20, 'heading': 538, 'pitch': 147, 'roll': 221}
+
+    def assert_result(self, test, particle):
+        """
+        Suite of tests to run against each returned particle and expected
+        results of the same.  The test parameter should be a dictionary
+        that contains the keys to be tested in the particle
+        the 'internal_timestamp' and 'position' keys are
+        treated differently than others but can be verified if supplied
+        """
+
+        particle_dict = particle.generate_dict()
+
+        # for efficiency turn the particle values list of dictionaries into a dictionary
+        particle_values = {}
+        for param in particle_dict.get('values'):
+            particle_values[param['value_id']] = param['value']
+
+        # compare each key in the test to the data in the particle
+        for key in test:
+            test_data = test[key]
+
+            # get the correct data to compare to the test
+            if key == 'internal_timestamp':
+                particle_data = particle.get_value('internal_timestamp')
+                # the timestamp is in the header part of the particle
+            elif key == 'position':
+                particle_data = self.state_callback_value['position']
+                # position corresponds to the position in the file
+            else:
+                particle_data = particle_values.get(key)
+                # others are all part of the parsed values part of the particle
+
+            if particle_data is None:
+                # generally OK to ignore index keys in the test data, verify others
+                log.warning("\nWarning: assert_result ignoring test key %s, does not exist in particle", key)
+            else:
+                if isinstance(test_data, float):
+                    # slightly different test for these values as they are floats.
+                    compare = numpy.abs(test_data - particle_data) <= 1e-5
+                    self.assertTrue(compare)
+                else:
+                    # otherwise they are all ints and should be exactly equal
+                    self.assertEqual(test_data, particle_data, msg=particle_values)
+
+    def test_simple(self):
+        """
+        Read test data and pull out data particles one at a time.
+        Assert that the results are those we expected.
+        The contents of ADCP_data_20130702.000 are the expected results
+        from the IDD.  These results for the that record were manually verified
+        and are the entire parsed particle is represented in ADCP_data_20130702.yml
+        """
+
+        # ADCP_data_20130702.PD0 has one record in it
+        with open(os.path.join(RESOURCE_PATH, 'ADCP_data_20130702.000'), 'rb') as stream_handle:
+
+            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
+
+            particles = parser.get_records(4)
+
+            # this simple test shows the 2 ways to verify results
+            self.assert_result(self.test01, particles[0])
+
+            self.assert_particles(particles, 'ADCP_data_20130702.yml', RESOURCE_PATH)
+            self.assertEqual(self.exception_callback_value, [])
+
+    def test_get_many(self):
+        """
+        Read test data and pull out multiple data particles at one time.
+        Assert that the results are those we expected.
+        """
+
+        # ADCP_CCE1T_20.000 has 20 records in it
+        with open(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), 'rb') as stream_handle:
+
+            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
+
+            particles = parser.get_records(50)
+
+            self.assert_result(self.test02, particles[0])
+            self.assert_result(self.test03, particles[43])
+
+    def test_bad_data(self):
+        """
+        Ensure that bad data is skipped when it exists.
+        """
+        # ADCP_data_Corrupted.PD0 has one bad record followed by one good in it
+        with open(os.path.join(RESOURCE_PATH, 'ADCP_data_Corrupted.000'), 'rb') as stream_handle:
+
+            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
+
+            particles = parser.get_records(1)
+            self.assert_result(self.test01, particles[0])
+
+    def test_long_stream(self):
+        """
+        Verify an entire file against a yaml result file.
+        """
+        with open(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), 'rb') as stream_handle:
+
+            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback)
+
+            particles = parser.get_records(47)
+
+            self.assert_particles(particles, 'ADCP_CCE1T_20.yml', RESOURCE_PATH)
+            self.assertEqual(self.exception_callback_value, [])
+
+    def test_parallel(self):
+        """
+        Verify an entire file decoded in a process pool against the yaml result file, the config and
+        engineering particles are only returned when they change, as in a single process.
+        """
+        batch_size = adcp_pd0.ENSEMBLE_BATCH_SIZE
+        # split the 20 ensembles over several ranges
+        adcp_pd0.ENSEMBLE_BATCH_SIZE = 3
+        try:
+            with open(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), 'rb') as stream_handle:
+
+                parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback, workers=2)
+
+                particles = parser.get_records(47)
+
+                self.assert_particles(particles, 'ADCP_CCE1T_20.yml', RESOURCE_PATH)
+                self.assertEqual(self.exception_callback_value, [])
+        finally:
+            adcp_pd0.ENSEMBLE_BATCH_SIZE = batch_size
+
+    def test_parallel_worker_failure(self):
+        """
+        Verify a range of ensembles which fails in a worker is reported for each of its ensembles through
+        the exception callback, and the other ranges are still returned
+        """
+        def values(particles):
+            return [(particle.type(), particle.generate_dict()['values']) for particle in particles]
+
+        file_path = os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000')
+        with open(file_path, 'rb') as stream_handle:
+            expected = AdcpPd0Parser(self.config, stream_handle, self.exception_callback).get_records(47)
+        # the particles of the first 18 ensembles, up to the velocity particle of the 19th
+        velocity_indices = [index for index, particle in enumerate(expected) if isinstance(particle, VelocityEarth)]
+        expected = expected[:velocity_indices[18]]
+
+        batch_size = adcp_pd0.ENSEMBLE_BATCH_SIZE
+        ensemble_particles = adcp_pd0.ensemble_particles
+
+        def failing_ensemble_particles(data, positions, glider, particle_classes):
+            # the last of the ranges of 3 ensembles holds the last 2 ensembles
+            if len(positions) == 2:
+                raise ValueError('worker failure')
+            return ensemble_particles(data, positions, glider, particle_classes)
+
+        # split the 20 ensembles over several ranges, the workers are forked with the failing decoder
+        adcp_pd0.ENSEMBLE_BATCH_SIZE = 3
+        adcp_pd0.ensemble_particles = failing_ensemble_particles
+        try:
+            with open(file_path, 'rb') as stream_handle:
+                parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback, workers=2)
+                particles = parser.get_records(47)
+        finally:
+            adcp_pd0.ENSEMBLE_BATCH_SIZE = batch_size
+            adcp_pd0.ensemble_particles = ensemble_particles
+
+        self.assertEqual(values(particles), values(expected))
+        self.assertEqual(len(self.exception_callback_value), 2)
+        for exception in self.exception_callback_value:
+            self.assertIsInstance(exception, RecoverableSampleException)
+
+    def assert_change_key(self, file_path, glider, particle_classes):
+        """
+        Change each byte of the leaders of the first ensemble of the file in turn, and verify the particles of
+        each changed ensemble with the same change key have the same values
+        """
+        with open(file_path, 'rb') as stream_handle:
+            data = stream_handle.read()
+        num_bytes = struct.unpack_from('<H', data, 2)[0]
+        ensemble = data[:num_bytes]
+        record = AdcpPd0Record(data[:num_bytes + 2], glider=glider)
+
+        keys = [particle_class.change_key(record) for particle_class in particle_classes]
+        values = [particle_class(record).generate_dict()['values'] for particle_class in particle_classes]
+
+        offsets = sorted(record.offsets) + [num_bytes]
+        for start, end in zip(offsets, offsets[1:]):
+            if struct.unpack_from('<H', ensemble, start)[0] not in (BlockId.FIXED_DATA, BlockId.VARIABLE_DATA,
+                                                                    BlockId.BOTTOM_TRACK):
+                continue
+
+            for position in xrange(start + 2, end):
+                changed = ensemble[:position] + chr(ord(ensemble[position]) ^ 0xFF) + ensemble[position + 1:]
+                checksum = sum(bytearray(changed)) & 0xFFFF
+                try:
+                    changed_record = AdcpPd0Record(changed + struct.pack('<H', checksum), glider=glider)
+                    for particle_class, key, value in zip(particle_classes, keys, values):
+                        if particle_class.change_key(changed_record) == key:
+                            self.assertEqual(particle_class(changed_record).generate_dict()['values'], value)
+                except (PD0ParsingException, ValueError, IndexError, struct.error):
+                    # the changed byte made the ensemble invalid
+                    pass
+
+    def test_change_key(self):
+        """
+        Verify the config and engineering particles are only built from the bytes of their change keys
+        """
+        self.assert_change_key(os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000'), False,
+                               [AdcpsConfig, AdcpsEngineering])
+        self.assert_change_key(os.path.join(GLIDER_RESOURCE_PATH, 'ND161646.PD0'), True,
+                               [GliderConfig, GliderEngineering, BottomConfig])
+
+
+def convert_yml(input_file):
+    earth = [
+        'num_cells',
+        'cell_length',
+        'bin_1_distance',
+        'ensemble_number',
+        'heading',
+        'pitch',
+        'roll',
+        'salinity',
+        'temperature',
+        'transducer_depth',
+        'pressure',
+        'sysconfig_vertical_orientation',
+        'water_velocity_east',
+        'water_velocity_north',
+        'water_velocity_up',
+        'error_velocity',
+        'water_velocity_forward',
+        'water_velocity_starboard',
+        'water_velocity_vertical',
+        'correlation_magnitude_beam1',
+        'correlation_magnitude_beam2',
+        'correlation_magnitude_beam3',
+        'correlation_magnitude_beam4',
+        'echo_intensity_beam1',
+        'echo_intensity_beam2',
+        'echo_intensity_beam3',
+        'echo_intensity_beam4',
+        'percent_good_3beam',
+        'percent_transforms_reject',
+        'percent_bad_beams',
+        'percent_good_4beam',
+    ]
+
+    config = [
+        'firmware_version',
+        'firmware_revision',
+        'data_flag',
+        'lag_length',
+        'num_beams',
+        'num_cells',
+        'pings_per_ensemble',
+        'cell_length',
+        'blank_after_transmit',
+        'signal_processing_mode',
+        'low_corr_threshold',
+        'num_code_repetitions',
+        'percent_good_min',
+        'error_vel_threshold',
+        'time_per_ping_minutes',
+        'time_per_ping_seconds',
+        'heading_alignment',
+        'heading_bias',
+        'reference_layer_start',
+        'reference_layer_stop',
+        'false_target_threshold',
+        'low_latency_trigger',
+        'transmit_lag_distance',
+        'cpu_board_serial_number',
+        'system_bandwidth',
+        'system_power',
+        'serial_number',
+        'beam_angle',
+        'sysconfig_frequency',
+        'sysconfig_beam_pattern',
+        'sysconfig_sensor_config',
+        'sysconfig_head_attached',
+        'sysconfig_vertical_orientation',
+        'sysconfig_beam_angle',
+        'sysconfig_beam_config',
+        'coord_transform_type',
+        'coord_transform_tilts',
+        'coord_transform_beams',
+        'coord_transform_mapping',
+        'sensor_source_speed',
+        'sensor_source_depth',
+        'sensor_source_heading',
+        'sensor_source_pitch',
+        'sensor_source_roll',
+        'sensor_source_conductivity',
+        'sensor_source_temperature',
+        'sensor_source_temperature_eu',
+        'sensor_available_speed',
+        'sensor_available_depth',
+        'sensor_available_heading',
+        'sensor_available_pitch',
+        'sensor_available_roll',
+        'sensor_available_conductivity',
+        'sensor_available_temperature',
+        'sensor_available_temperature_eu',
+    ]
+
+    engineering = [
+        'transmit_pulse_length',
+        'speed_of_sound',
+        'mpt_minutes',
+        'mpt_seconds',
+        'heading_stdev',
+        'pitch_stdev',
+        'roll_stdev',
+        'pressure_variance',
+        'adc_ambient_temp',
+        'adc_attitude',
+        'adc_attitude_temp',
+        'adc_contamination_sensor',
+        'adc_pressure_minus',
+        'adc_pressure_plus',
+        'adc_transmit_current',
+        'adc_transmit_voltage',
+    ]
+
+    stream_map = {
+        'adcp_velocity_earth': ('VelocityEarth', earth),
+        'adcp_config': ('AdcpsConfig', config),
+        'adcp_engineering': ('AdcpsEngineering', engineering),
+    }
+
+    streams = [
+        'adcp_velocity_earth',
+        'adcp_config',
+        'adcp_engineering',
+    ]
+
+    always = streams[:1]
+
+    last = {}
+
+    def create_particle(record, index, stream):
+        klass, fields = stream_map.get(stream)
+        particle = {field: record.get(field) for field in fields if field in record}
+        particle['_index'] = index
+        particle['particle_object'] = klass
+        particle['particle_type'] = stream
+        particle['internal_timestamp'] = record['internal_timestamp']
+
+        if 'time_per_ping_seconds' in fields:
+            seconds = particle['time_per_ping_seconds']
+            int_seconds = int(seconds)
+            hundredths = int(100 * (seconds - int_seconds))
+            particle['time_per_ping_hundredths'] = hundredths
+            particle['time_per_ping_seconds'] = int_seconds
+
+        if 'mpt_seconds' in fields:
+            seconds = particle['mpt_seconds']
+            int_seconds = int(seconds)
+            hundredths = int(100 * (seconds - int_seconds))
+            particle['mpt_hundredths'] = hundredths
+            particle['mpt_seconds'] = int_seconds
+
+        if stream == 'adcp_engineering':
+            bit_result = (
+                record.get('bit_result_demod_1', 0) * 0b10000 +
+                record.get('bit_result_demod_0', 0) * 0b1000 +
+                record.get('bit_result_timing', 0) * 0b10
+            )
+            particle['bit_result'] = bit_result
+
+            esw = (
+                record.get('bus_error_exception', 0) +
+                record.get('address_error_exception', 0) * 0b10 +
+                record.get('illegal_instruction_exception', 0) * 0b100 +
+                record.get('zero_divide_instruction', 0) * 0b1000 +
+                record.get('emulator_exception', 0) * 0b10000 +
+                record.get('unassigned_exception', 0) * 0b100000 +
+                record.get('watchdog_restart_occurred', 0) * 0b1000000 +
+                record.get('battery_saver_power', 0) * 0b10000000 +
+                record.get('pinging', 0) * (0b1 << 8) +
+                record.get('cold_wakeup_occurred', 0) * (0b1000000 << 8) +
+                record.get('unknown_wakeup_occurred', 0) * (0b10000000 << 8) +
+                record.get('clock_read_error', 0) * (0b1 << 16) +
+                record.get('unexpected_alarm', 0) * (0b10 << 16) +
+                record.get('clock_jump_forward', 0) * (0b100 << 16) +
+                record.get('clock_jump_backward', 0) * (0b1000 << 16) +
+                record.get('power_fail', 0) * (0b1000 << 24) +
+                record.get('spurious_dsp_interrupt', 0) * (0b10000 << 24) +
+                record.get('spurious_uart_interrupt', 0) * (0b100000 << 24) +
+                record.get('spurious_clock_interrupt', 0) * (0b1000000 << 24) +
+                record.get('level_7_interrupt', 0) * (0b10000000 << 24)
+            )
+            particle['error_status_word'] = esw
+
+        return particle
+
+    def changed(particle):
+        particle = copy.deepcopy(particle)
+        stream = particle.pop('particle_type')
+        particle.pop('particle_object')
+        particle.pop('_index')
+        particle.pop('internal_timestamp')
+        last_values = last.get(stream)
+        if last_values == particle:
+            return False
+
+        last[stream] = particle
+        return True
+
+    out_records = []
+    records = yaml.load(open(input_file))
+    index = 1
+    for record in records['data']:
+        for stream in streams:
+            particle = create_particle(record, index, stream)
+            if stream in always or changed(particle):
+                out_records.append(particle)
+                index += 1
+
+    records['data'] = out_records
+    yaml.dump(records, open(input_file, 'w'))
+
+
+def convert_all():
+    yml_files = [
+        'ADCP_data_20130702.yml',
+        'ADCP_CCE1T_20.yml',
+    ]
+
+    for f in yml_files:
         convert_yml(os.path.join(RESOURCE_PATH, f))
\ No newline at end of file
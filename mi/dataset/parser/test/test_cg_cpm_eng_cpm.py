@@ -8,6 +8,7 @@
 """
 import os
 import pprint
+from StringIO import StringIO
 import re
 import ntplib
 
@@ -22,7 +23,8 @@ from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.parser.cg_cpm_eng_cpm import CgCpmEngCpmParser, \
     CgCpmEngCpmDataParticleType, CgCpmEngCpmDataParticle, \
-    CgCpmEngCpmRecoveredDataParticle, CgCpmEngCpmTelemeteredDataParticle
+    CgCpmEngCpmRecoveredDataParticle, CgCpmEngCpmTelemeteredDataParticle, \
+    PARAM_REGEX_RULES_AND_VALUES, PARAM_RULE_DISPATCHER, regex_head
 
 from mi.idk.config import Config
 RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi',
@@ -114,3 +116,30 @@ class CgParserUnitTestCase(ParserUnitTestCase):
                 result = self.parser.get_records(1)
 
         log.debug('===== END TEST NO PARTICLES =====')
+
+    def test_dispatcher(self):
+        """
+        Verify that the rules dispatched for a line by its key include the first rule
+        matching it when every rule is tried in turn.
+        """
+        self.assertEqual(regex_head(r'Platform.utime=(?P<x>\d+)'), tuple('Platform') + (None,) + tuple('utime='))
+        self.assertEqual(regex_head(r'sbc.bid?'), tuple('sbc') + (None,) + tuple('bi'))
+
+        with open(os.path.join(RESOURCE_PATH, 'cpm_status.20140817_1255.txt')) as file_handle:
+            lines = file_handle.readlines()
+
+        for line in lines + ['Platform_utime=1408280103.730\n', 'junk\n', '\n']:
+            candidates = PARAM_RULE_DISPATCHER.candidates(line)
+            matching = [index for index, (regex, param_rules_and_values, expected_instances)
+                        in enumerate(PARAM_REGEX_RULES_AND_VALUES) if re.match(regex, line)]
+            self.assertEqual([index for index in candidates if index in matching], matching)
+            self.assertLess(len(candidates), 3)
+
+        # a second instance of a parameter expected once is unexpected data
+        with open(os.path.join(RESOURCE_PATH, 'cpm_status.20140817_1255.txt')) as file_handle:
+            data = file_handle.read()
+        self.parser = CgCpmEngCpmParser(self.config, StringIO(data + lines[1]), self.exception_callback)
+        result = self.parser.get_records(1)
+
+        self.assertEqual(self._exceptions_detected, 1)
+        self.assert_particles(result, 'cpm_status.20140817_1255_recov.yml', RESOURCE_PATH)
@@ -7,6 +7,7 @@
 @brief Test code for a cg_dcl_eng_dcl data parser
 """
 import os
+import time
 
 from nose.plugins.attrib import attr
 
@@ -26,7 +27,8 @@ from mi.dataset.parser.cg_dcl_eng_dcl import CgDclEngDclParser, CgDclEngDclParti
     CgDclEngDclDlogMgrRecoveredDataParticle, CgDclEngDclDlogMgrTelemeteredDataParticle, \
     CgDclEngDclDlogStatusRecoveredDataParticle, CgDclEngDclDlogStatusTelemeteredDataParticle, \
     CgDclEngDclStatusRecoveredDataParticle, CgDclEngDclStatusTelemeteredDataParticle, \
-    CgDclEngDclDlogAarmRecoveredDataParticle, CgDclEngDclDlogAarmTelemeteredDataParticle
+    CgDclEngDclDlogAarmRecoveredDataParticle, CgDclEngDclDlogAarmTelemeteredDataParticle, \
+    CgDclEngDclParserDataParticleKey, channel_list_param, match_record, route_record
 
 from mi.idk.config import Config
 RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi',
@@ -349,3 +351,44 @@ class CgParserUnitTestCase(ParserUnitTestCase):
             self.assertEqual(self._exceptions_detected, 0)
 
             self.assert_particles(particles, 'telem.20140626.syslog.yml', RESOURCE_PATH)
+
+    def test_route_records(self):
+        """
+        Each record is routed by its log type and subsystem tag to the one regex matching it, a record
+        not matched by the regex of its route is invalid, and a corrupted SUPERV record fails fast
+        """
+        superv = '2014/06/26 00:56:51.434 DAT SUPERV dcl: 30.6 112.0 00000000 t 9.6 8.1 0.0 0.0 0.0 h 1.9 ' \
+                 'p 14.6 gf 0 0.0 0.0 0.0 ld 0 0 0 p1 0 0.0 0.0 0 p2 0 0.0 0.0 0 p3 0 0.0 0.0 0 ' \
+                 'p4 0 0.0 0.0 0 p5 0 0.0 0.0 0 p6 0 0.0 0.0 0 p7 0 0.0 0.0 0 p8 0 0.0 0.0 0 hb 0 0 0 ' \
+                 'wake 0 wtc 0 wpc 0 pwr 0 0 0 0.0 0.0 0.0 0.0 0.0 0.0 34e3\n'
+        records = [
+            ('2014/06/26 01:01:48.508 MSG D_STATUS STATUS: GPS=600, NTP=1, PPS=30, SUPERV=152, DLOG_MGR=10\n',
+             'msg_counts_match'),
+            ('2014/06/26 01:00:34.760 ERR DLOGP4 Read port [/dev/ttts5] too many NUL characters\n',
+             'error_match'),
+            ('2014/06/26 01:01:48.512 DAT D_GPS 2014/06/26 01:01:47.845 GPS 44.658727 -124.095543 0.50 335.20 '
+             '2 9 0.90 5.70 260614 010147 4439.5236 N 12405.7326 W\n', 'gps_match'),
+            (superv, 'superv_match'),
+        ]
+        for line, name in records:
+            self.assertEqual(route_record(line).name, name)
+            record_type, match, invalid_message = match_record(line)
+            self.assertEqual(record_type.name, name)
+            self.assertIsNone(invalid_message)
+
+        # a misspelled tag has no route, a bad log type is not a record
+        line = '2014/09/15 00:04:20.019 MSG D_STTUS STATUS: GPS=601, NTP=1, PPS=30, SUPERV=143, DLOG_MGR=10\n'
+        self.assertIsNone(route_record(line))
+        self.assertEqual(match_record(line), (None, None, None))
+        self.assertEqual(match_record('2014/06/26 00:56:51.434 XYZ SUPERV dcl:\n'), (None, None, None))
+
+        start = time.time()
+        record_type, match, invalid_message = match_record(superv.replace('p8 0 0.0 0.0 0', 'p8 0 0.0 0.0 x'))
+        self.assertLess(time.time() - start, 1.0)
+        self.assertIsNone(record_type)
+        self.assertEqual(invalid_message, 'Invalid DAT Log record, Line: ')
+
+        self.assertEqual(channel_list_param('channel_1_state'), CgDclEngDclParserDataParticleKey.CHANNEL_STATE)
+        self.assertEqual(channel_list_param('channel_7_error_status'),
+                         CgDclEngDclParserDataParticleKey.CHANNEL_ERROR_STATUS)
+        self.assertIsNone(channel_list_param('wake_code'))
@@ -20,6 +20,7 @@ from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.dataset.parser.cg_stc_eng_stc import CgStcEngStcParser, CgStcEngStcParserDataParticle
 from mi.dataset.parser.cg_stc_eng_stc import CgStcEngStcParserDataParticleKey
+from mi.dataset.param_dict import DatasetParameterSchema
 
 from mi.idk.config import Config
 RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi',
@@ -249,6 +250,28 @@ class CgParserUnitTestCase(ParserUnitTestCase):
                                                                               cdict.get('value'),
                                                                               rdict.get('value')))
 
+    def test_param_schema(self):
+        """
+        Ensure the compiled parameters give the same values and encoding errors as the param_dict,
+        when keys are moved, repeated, or found in the middle of a line before their own line
+        """
+        schema = self.particle_a._get_param_schema()
+        self.assertTrue(CgStcEngStcParserDataParticle._param_schema is schema)
+        self.assertEqual(DatasetParameterSchema.literal_key(re.compile(r'GPS\.lat=(.+)')), 'GPS.lat=')
+        self.assertEqual(DatasetParameterSchema.literal_key(re.compile(r'GPS.lat=(.+)')), None)
+
+        data = self.particle_a.raw_data
+        lines = data.splitlines(True)
+        for test_data in [data,
+                          open(os.path.join(RESOURCE_PATH, 'stc_status_bad_encode.txt')).read(),
+                          ''.join(reversed(lines)),
+                          data + 'GPS.lat=1.5\nSTATUS.err_cnts=C_GPS=9\n',
+                          'junk GPS.lat=2.5\nnote STATUS.last_err.C_GPS=x\n' + data,
+                          data.replace('\n', '\r')]:
+            params = self.particle_a._build_param_dict()
+            params.update(test_data)
+            self.assertEqual(schema.extract(test_data), (params.get_all(), params.get_encoding_errors()))
+
     def test_bad_data(self):
         """
         Ensure that the missing timestamp field causes a sample exception
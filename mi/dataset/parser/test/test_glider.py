@@ -11,13 +11,15 @@ import os
 from StringIO import StringIO
 from nose.plugins.attrib import attr
 
-from mi.core.exceptions import ConfigurationException
+from mi.core.exceptions import ConfigurationException, DatasetParserException
 from mi.core.log import get_logger
 log = get_logger()
 
 from mi.dataset.test.test_parser import ParserUnitTestCase, BASE_RESOURCE_PATH
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
-from mi.dataset.parser.glider import GliderParser, GliderEngineeringParser
+from mi.dataset.parser.glider import GliderParser, GliderEngineeringParser, GliderMultiStreamParser
+from mi.dataset.parser import glider
+from mi.dataset.parser.glider import GliderColumns, ColumnType
 from mi.dataset.parser.glider import CtdgvRecoveredDataParticle, CtdgvTelemeteredDataParticle, CtdgvParticleKey
 from mi.dataset.parser.glider import DostaTelemeteredDataParticle, DostaTelemeteredParticleKey
 from mi.dataset.parser.glider import DostaRecoveredDataParticle, DostaRecoveredParticleKey
@@ -828,4 +830,207 @@ class ENGRecoveredGliderTest(GliderParserUnitTestCase):
             parser = GliderEngineeringParser(self.config, file_handle, self.exception_callback)
             records = parser.get_records(240)
             self.assert_(len(records) > 3)
-            self.assertEquals(self.exception_callback_value, [])
\ No newline at end of file
+            self.assertEquals(self.exception_callback_value, [])
+
+
+@attr('UNIT', group='mi')
+class GliderMultiStreamTest(GliderParserUnitTestCase):
+    """
+    Test cases for parsing several glider streams in one pass
+    """
+    config = {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+        DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+            'ctdgv': 'CtdgvTelemeteredDataParticle',
+            'dosta': 'DostaTelemeteredDataParticle',
+            EngineeringClassKey.METADATA: 'EngineeringMetadataDataParticle',
+            EngineeringClassKey.DATA: 'EngineeringTelemeteredDataParticle',
+            EngineeringClassKey.SCIENCE: 'EngineeringScienceTelemeteredDataParticle'
+        }
+    }
+
+    resource_path = os.path.join(BASE_RESOURCE_PATH, 'moas', 'gl', 'engineering', 'resource')
+
+    def test_multi_stream_particles(self):
+        """
+        Verify each row produces a particle for each stream with data in the row, after the metadata particle
+        """
+        self.set_data(HEADER, CTDGV_RECORD, DOSTA_RECORD)
+        self.parser = GliderMultiStreamParser(self.config, self.test_data, self.exception_callback)
+
+        self.assert_generate_particle(EngineeringMetadataDataParticle)
+        self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3683})
+        self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+        self.assert_generate_particle(DostaTelemeteredDataParticle, {DostaTelemeteredParticleKey.SCI_OXY4_OXYGEN: 242.217})
+        self.assert_generate_particle(DostaTelemeteredDataParticle, {DostaTelemeteredParticleKey.SCI_OXY4_OXYGEN: 242.141})
+        self.assert_no_more_data()
+        self.assertEquals(self.exception_callback_value, [])
+
+    def test_matches_single_stream(self):
+        """
+        Verify a real file produces the same particles as parsing it separately for each stream
+        """
+        file_path = os.path.join(self.resource_path, 'unit_363_2013_245_6_6.mrg')
+
+        with open(file_path, 'rU') as file_handle:
+            parser = GliderMultiStreamParser(self.config, file_handle, self.exception_callback)
+            records = parser.get_records(10000)
+
+        expected = []
+        with open(file_path, 'rU') as file_handle:
+            parser = GliderEngineeringParser(ENGGliderTest.config, file_handle, self.exception_callback)
+            expected.extend(parser.get_records(10000))
+        for particle_class in ['CtdgvTelemeteredDataParticle', 'DostaTelemeteredDataParticle']:
+            config = {DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+                      DataSetDriverConfigKeys.PARTICLE_CLASS: particle_class}
+            with open(file_path, 'rU') as file_handle:
+                parser = GliderParser(config, file_handle, self.exception_callback)
+                expected.extend(parser.get_records(10000))
+
+        self.assertEqual(len(records), len(expected))
+        for particle_class in GliderMultiStreamParser(self.config, StringIO(HEADER), None).particle_classes:
+            stream = particle_class._data_particle_type
+            self.assertEqual([particle.generate_dict()['values'] for particle in records if particle.type() == stream],
+                             [particle.generate_dict()['values'] for particle in expected if particle.type() == stream])
+        self.assertEquals(self.exception_callback_value, [])
+
+    def test_bad_config(self):
+        """
+        Test that a missing or unknown particle class causes an exception
+        """
+        self.set_data(HEADER, CTDGV_RECORD)
+        with self.assertRaises(ConfigurationException):
+            GliderMultiStreamParser({}, self.test_data, self.exception_callback)
+
+        bad_config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+            DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {'ctdgv': 'CtdgvDataParticle'}
+        }
+        with self.assertRaises(ConfigurationException):
+            GliderMultiStreamParser(bad_config, self.test_data, self.exception_callback)
+
+
+
+@attr('UNIT', group='mi')
+class GliderColumnarTest(GliderParserUnitTestCase):
+    """
+    Test cases for parsing glider data rows into columns
+    """
+    config = ENGGliderTest.config
+
+    def test_eng_particle(self):
+        """
+        Verify the columnar engineering particles, including the latitude encoding
+        """
+        self.set_data(HEADER4, ENGSCI_BAD_LAT_RECORD)
+        self.parser = GliderEngineeringParser(self.config, self.test_data, self.exception_callback, columnar=True)
+
+        record_1 = {EngineeringTelemeteredParticleKey.M_BATTPOS: 0.703717,
+                    EngineeringTelemeteredParticleKey.M_HEADING: 5.05447,
+                    EngineeringTelemeteredParticleKey.C_WPT_LAT: None,
+                    EngineeringTelemeteredParticleKey.C_WPT_LON: -126.0}
+        record_2 = {EngineeringTelemeteredParticleKey.M_BATTPOS: 0.695632,
+                    EngineeringTelemeteredParticleKey.M_HEADING: 5.05447,
+                    EngineeringTelemeteredParticleKey.C_WPT_LAT: 0.5,
+                    EngineeringTelemeteredParticleKey.C_WPT_LON: -126.0}
+
+        self.assert_generate_particle(EngineeringMetadataDataParticle)
+        self.assert_generate_particle(EngineeringTelemeteredDataParticle, record_1)
+        self.assert_generate_particle(EngineeringScienceTelemeteredDataParticle)
+        self.assert_generate_particle(EngineeringTelemeteredDataParticle, record_2)
+        self.assert_generate_particle(EngineeringScienceTelemeteredDataParticle)
+        self.assert_no_more_data()
+
+    def test_column_types(self):
+        """
+        Verify numeric columns come from the units and bytes rows, int and float columns from the way
+        their values are printed, with the per value encoding as a fallback
+        """
+        columns = GliderColumns(['m_int', 'm_frac', 'm_float', 'm_count', 'm_time', 'm_gps_lat', 'm_text', 'm_inf'],
+                                ['enum', 'nodim', 'm', 'nodim', 'timestamp', 'lat', 'nodim', 'nodim'],
+                                ['1', '2', '4', '4', '1', '8', '4', '4'])
+        self.assertEqual([index for index, column_type in enumerate(columns.types)
+                          if column_type == ColumnType.STRING], [5])
+
+        data_records = ['1 2.0 3e1 4 4.5 5011.2933 abc inf\n', 'NaN 2.5 NaN 6 6 NaN 7 8\n']
+        columns.load(data_records, [data_record.split() for data_record in data_records])
+
+        self.assertEqual(columns.types, [ColumnType.INT, ColumnType.FLOAT, ColumnType.FLOAT, ColumnType.INT,
+                                         ColumnType.STRING, ColumnType.STRING, ColumnType.STRING, ColumnType.STRING])
+
+        row = columns.row(0)
+        self.assertEqual([row.get(label) for label in columns.labels],
+                         [1, 2.0, 30.0, 4, '4.5', '5011.2933', 'abc', 'inf'])
+        self.assertIsInstance(row['m_int'], int)
+        self.assertIsInstance(row['m_frac'], float)
+        self.assertIsInstance(row['m_float'], float)
+        self.assertIsInstance(row['m_count'], int)
+        self.assertIsNone(row.get('m_missing'))
+        with self.assertRaises(KeyError):
+            row['m_missing']
+
+        row = columns.row(1)
+        self.assertEqual([row.get(label) for label in columns.labels], [None, 2.5, None, 6, '6', 'NaN', '7', '8'])
+        self.assertFalse(row.has_value('m_int'))
+        self.assertFalse(row.has_value('m_gps_lat'))
+        self.assertTrue(row.has_value('m_frac'))
+
+    def test_matches_dictionary(self):
+        """
+        Verify real files produce the same particles as when parsing each row into a dictionary
+        """
+        for resource in [os.path.join('engineering', 'resource', 'unit_363_2013_245_6_6.mrg'),
+                         os.path.join('engineering', 'resource', 'unit_247_2012_051_0_0-engDataOnly.mrg'),
+                         os.path.join('flord_m', 'resource', 'unit_247_2012_051_0_0-sciDataOnly.mrg')]:
+            file_path = os.path.join(BASE_RESOURCE_PATH, 'moas', 'gl', resource)
+
+            particles = []
+            exceptions = []
+            # columnar mode is also run with a few rows per chunk, so the files span several chunks
+            for columnar, chunk_rows in [(False, None), (True, glider.COLUMNS_CHUNK_ROWS), (True, 7)]:
+                self.exception_callback_value = []
+                default_chunk_rows, glider.COLUMNS_CHUNK_ROWS = glider.COLUMNS_CHUNK_ROWS, chunk_rows
+                try:
+                    with open(file_path, 'rU') as file_handle:
+                        parser = GliderEngineeringParser(self.config, file_handle, self.exception_callback,
+                                                         columnar)
+                        particles.append([(particle.type(), [(value['value_id'], value['value'], type(value['value']))
+                                                             for value in particle.generate_dict()['values']])
+                                          for particle in parser.get_records(10000)])
+                finally:
+                    glider.COLUMNS_CHUNK_ROWS = default_chunk_rows
+                exceptions.append(len(self.exception_callback_value))
+
+            self.assertEqual(particles[0], particles[1])
+            self.assertEqual(particles[0], particles[2])
+            self.assertEqual(exceptions[0], exceptions[1])
+            self.assertEqual(exceptions[0], exceptions[2])
+
+    def test_science_columns(self):
+        """
+        Verify only the rows with data in the science parameter columns of the particle class produce particles
+        """
+        for columnar in [False, True]:
+            self.set_data(HEADER, CTDGV_RECORD, DOSTA_RECORD)
+            self.parser = GliderParser(CtdgvTelemeteredGliderTest.config, self.test_data, self.exception_callback,
+                                       columnar=columnar)
+
+            # sci_water_cond, sci_water_pressure and sci_water_temp, sci_ctd41cp_timestamp is not in the file
+            self.assertEqual(self.parser._science_column_indices(CtdgvTelemeteredDataParticle), (26, 27, 28))
+
+            self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3683})
+            self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+            self.assert_no_more_data()
+
+    def test_short_row(self):
+        """
+        Verify the rows before a row with missing values produce particles before the exception is raised
+        """
+        self.set_data(HEADER, CTDGV_RECORD, "\n1 2 3")
+        self.parser = GliderParser(CtdgvTelemeteredGliderTest.config, self.test_data, self.exception_callback,
+                                   columnar=True)
+
+        self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3683})
+        self.assert_generate_particle(CtdgvTelemeteredDataParticle, {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+        with self.assertRaises(DatasetParserException):
+            self.parser.get_records(1)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_hex_decoder.py
+@brief Test code for the decoding of ascii hex records
+"""
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.parser.hex_decoder import HexField, HexRecordLayout, hex_values, hex_byte_sum
+
+
+@attr('UNIT', group='mi')
+class HexDecoderUnitTestCase(ParserUnitTestCase):
+
+    def test_layout(self):
+        """
+        The fields of a record are decoded at once as int(x, 16) would, whatever their alignment
+        """
+        record = 'xx0A1BFFFE12345678C40100'
+        layout = HexRecordLayout([
+            HexField('id', 2, 2),
+            HexField('value', 4, 2),
+            HexField('signed', 6, 4, signed=True),
+            HexField('odd', 10, 5),
+            HexField('unaligned', 15, 3),
+            HexField('array', 18, 2, count=2, signed=True),
+            HexField('little', 20, 4, little_endian=True)
+        ])
+
+        self.assertEqual(layout.decode(record), {
+            'id': 0x0A,
+            'value': 0x1B,
+            'signed': -2,
+            'odd': 0x12345,
+            'unaligned': 0x678,
+            'array': [-60, 1],
+            'little': 0x0001
+        })
+
+    def test_invalid(self):
+        """
+        A value which is not hex is an error, or None when not strict
+        """
+        layout = HexRecordLayout([HexField('first', 0, 4), HexField('second', 4, 2, count=3)])
+
+        with self.assertRaises(ValueError):
+            layout.decode('0102030g05')
+        with self.assertRaises(ValueError):
+            layout.decode('010203')
+
+        self.assertEqual(layout.decode('0102030g05', strict=False),
+                         {'first': 0x0102, 'second': [0x03, None, 0x05]})
+
+        with self.assertRaises(ValueError):
+            HexField('array', 0, 3, count=2)
+        with self.assertRaises(ValueError):
+            HexRecordLayout([HexField('first', 0, 1), HexField('wide', 1, 16)])
+
+    def test_hex_values(self):
+        """
+        Arrays of values are decoded, leaving out a partial value, and bytes are summed
+        """
+        self.assertEqual(hex_values('0001FFFF7FFF8000', 4, signed=True), [1, -1, 32767, -32768])
+        self.assertEqual(hex_values('000100020', 4), [1, 2])
+        self.assertEqual(hex_values(''), [])
+        self.assertEqual(hex_values('01zz', strict=False), [1, None])
+
+        self.assertEqual(hex_byte_sum('FF01A'), 0xFF + 0x01 + 0x0A)
+        self.assertEqual(hex_byte_sum(''), 0)
+        with self.assertRaises(ValueError):
+            hex_byte_sum('0G')
@@ -32,9 +32,11 @@ Files used for testing:
 """
 
 import os
+from StringIO import StringIO
 from nose.plugins.attrib import attr
 
 from mi.core.log import get_logger; log = get_logger()
+from mi.core.exceptions import UnexpectedDataException
 
 from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
@@ -214,4 +216,46 @@ class MetbkADclParserUnitTestCase(ParserUnitTestCase):
         self.assertListEqual(self.exception_callback_value, [])
         in_file.close()
 
-        log.debug('===== END TEST SIMPLE =====')
\ No newline at end of file
+        log.debug('===== END TEST SIMPLE =====')
+
+    def test_line_mode(self):
+        """
+        Lines are read straight from the stream with the same results as with the chunker,
+        unknown lines are reported and a last line without a newline is left out
+        """
+        in_file = self.open_file(FILE_4_9)
+        lines = in_file.readlines()
+        in_file.close()
+        data = ''.join(lines) + 'junk line\n\n' + lines[-1] + lines[-1].rstrip()
+
+        results = []
+        for line_mode in (True, False):
+            self.exception_callback_value = []
+            parser = self.create_parser(TELEMETERED_PARTICLE_CLASS, StringIO(data))
+            parser._line_mode = line_mode
+            particles = parser.get_records(TOTAL_RECORDS_FILE_4_9 + 10)
+            results.append(([particle.generate_dict()['values'] for particle in particles],
+                            [str(exception) for exception in self.exception_callback_value]))
+
+        self.assertEqual(results[0], results[1])
+        particle_values, exceptions = results[0]
+        self.assertEqual(len(particle_values), RECORDS_FILE_4_9 + 1)
+        self.assertEqual(len(exceptions), EXCEPTIONS_FILE_4_0 + 2)
+        self.assertIsInstance(self.exception_callback_value[-1], UnexpectedDataException)
+
+    def test_line_mode_incremental(self):
+        """
+        Only the lines needed for the requested particles are read in line mode
+        """
+        in_file = self.open_file(FILE_4_9)
+        data = in_file.read()
+        in_file.close()
+
+        parser = self.create_parser(TELEMETERED_PARTICLE_CLASS, StringIO(data))
+        self.assertEqual(len(parser.get_records(1)), 1)
+        self.assertLess(parser._position, len(data))
+        self.assertFalse(parser.file_complete)
+
+        particles = parser.get_records(TOTAL_RECORDS_FILE_4_9)
+        self.assertEqual(len(particles), RECORDS_FILE_4_9 - 1)
+        self.assertTrue(parser.file_complete)
@@ -17,6 +17,7 @@ Files used for testing:
 """
 
 import os
+import re
 from nose.plugins.attrib import attr
 
 from mi.core.log import get_logger
@@ -27,6 +28,7 @@ from mi.core.exceptions import UnexpectedDataException
 from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 
+from mi.dataset.parser.dcl_file_common import MatcherDispatcher
 from mi.dataset.parser.pco2a_a_dcl import Pco2aADclParser
 from mi.dataset.driver.pco2a_a.dcl.pco2a_a_dcl_driver import \
     MODULE_NAME, RECOVERED_PARTICLE_CLASSES, TELEMETERED_PARTICLE_CLASSES
@@ -232,3 +234,32 @@ class Pco2aADclParserUnitTestCase(ParserUnitTestCase):
 
         in_file.close()
         log.debug('===== END TEST failure verify_parser RECOVERED =====')
+
+    def test_dispatcher(self):
+        """
+        The air, water and metadata matchers are combined so a record is matched once,
+        with the same results as trying each particle class in turn
+        """
+        results = []
+        for dispatch in (True, False):
+            self.exception_callback_value = []
+            in_file = self.open_file(FILE_FAILURE)
+            parser = self.create_parser(TELEMETERED_PARTICLE_CLASSES, in_file)
+            if not dispatch:
+                parser._build_dispatcher = lambda: None
+            particles = parser.get_records(RECORDS)
+            in_file.close()
+            self.assertEqual(parser._dispatcher is not None, dispatch)
+            results.append(([(type(particle), particle.generate_dict()['values']) for particle in particles],
+                            [str(exception) for exception in self.exception_callback_value]))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[0][1]), 37)
+
+        dispatcher = MatcherDispatcher.build([re.compile(r'(a)(b)?c'), re.compile(r'a(b)'), re.compile(r'x')])
+        self.assertEqual(dispatcher.match('abc'), (0, ('a', 'b')))
+        self.assertEqual(dispatcher.match('abd'), (1, ('b',)))
+        self.assertEqual(dispatcher.match('x'), (2, ()))
+        self.assertEqual(dispatcher.match('y'), (None, None))
+        # backreferences would refer to the groups of the combined pattern
+        self.assertIsNone(MatcherDispatcher.build([re.compile(r'(a)\1'), re.compile(r'x')]))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_pd0_index.py
+@brief Test code for the PD0 ensemble index
+"""
+import os
+import shutil
+import tempfile
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser.adcp_pd0 import AdcpPd0Parser
+from mi.dataset.parser.pd0_index import AdcpPd0Index
+from mi.dataset.parser.pd0_parser import find_ensembles
+
+RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver', 'adcps_jln', 'stc', 'resource')
+
+ADCPS_FILE = os.path.join(RESOURCE_PATH, 'ADCP_CCE1T_20.000')
+
+
+@attr('UNIT', group='mi')
+class AdcpPd0IndexUnitTestCase(ParserUnitTestCase):
+
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.config = {
+            DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+                'velocity': 'VelocityEarth',
+                'engineering': 'AdcpsEngineering',
+                'config': 'AdcpsConfig',
+                'bottom_track': 'EarthBottom',
+                'bottom_track_config': 'BottomConfig',
+            }
+        }
+        with open(ADCPS_FILE, 'rb') as stream_handle:
+            self.data = stream_handle.read()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def velocity_particles(self, index=None):
+        with open(ADCPS_FILE, 'rb') as stream_handle:
+            parser = AdcpPd0Parser(self.config, stream_handle, self.exception_callback, index=index)
+            return [particle for particle in parser.get_records(100)
+                    if particle.type() == 'adcp_velocity_earth']
+
+    def test_build(self):
+        """
+        The index holds each ensemble with the ensemble number and time of its particles
+        """
+        index = AdcpPd0Index.from_file(ADCPS_FILE)
+        positions = [position for position, length in find_ensembles(self.data)]
+
+        self.assertEqual(index.offsets.tolist(), positions)
+        self.assertEqual(index.lengths.tolist(), [positions[1] - positions[0]] * len(positions))
+        self.assertEqual(index.ensemble_numbers.tolist(), range(1, 21))
+
+        particles = self.velocity_particles()
+        self.assertEqual(index.rtc_times.tolist(), [particle.get_value('internal_timestamp')
+                                                    for particle in particles])
+
+    def test_resynchronize(self):
+        """
+        The search for headers skips leading garbage and ensembles with a bad checksum
+        """
+        length = len(self.data) / 20
+        corrupt = 3 * length + 100
+        data = 'garbage\x7f\x7f' + self.data[:corrupt] + chr(ord(self.data[corrupt]) ^ 0xFF) + \
+            self.data[corrupt + 1:] + '\x7f\x7f\x10\x00'
+        index = AdcpPd0Index.build(data)
+
+        self.assertEqual(index.ensemble_numbers.tolist(), range(1, 4) + range(5, 21))
+        self.assertEqual(index.offsets[0], 9)
+
+    def test_select(self):
+        """
+        Ensembles are selected by position, ensemble number and time, and only those are parsed
+        """
+        index = AdcpPd0Index.from_file(ADCPS_FILE)
+
+        self.assertEqual(index[5:8].ensemble_numbers.tolist(), [6, 7, 8])
+        self.assertEqual(index.ensemble_range(10, 12).ensemble_numbers.tolist(), [10, 11, 12])
+        self.assertEqual([len(part) for part in index.split(3)], [7, 7, 6])
+        self.assertEqual(AdcpPd0Index.build('').offsets.tolist(), [])
+
+        window = index.time_window(index.rtc_times[4], index.rtc_times[7])
+        self.assertEqual(window.ensemble_numbers.tolist(), [5, 6, 7])
+
+        particles = self.velocity_particles(window)
+        self.assertEqual([particle.get_value('internal_timestamp') for particle in particles],
+                         window.rtc_times.tolist())
+        self.assertEqual(self.exception_callback_value, [])
+
+    def test_persist(self):
+        """
+        A saved index is loaded until the file changes
+        """
+        file_path = os.path.join(self.temp_dir, 'ADCP_CCE1T_20.000')
+        shutil.copy(ADCPS_FILE, file_path)
+        self.assertIsNone(AdcpPd0Index.load(file_path))
+
+        index = AdcpPd0Index.from_file(file_path, persist=True)
+        self.assertTrue(os.path.exists(AdcpPd0Index.index_path(file_path)))
+        self.assertEqual(AdcpPd0Index.load(file_path), index)
+
+        with open(file_path, 'ab') as stream_handle:
+            stream_handle.write(self.data[:len(self.data) / 20])
+        self.assertIsNone(AdcpPd0Index.load(file_path))
+        self.assertEqual(len(AdcpPd0Index.from_file(file_path)), 21)
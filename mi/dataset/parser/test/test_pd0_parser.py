@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_pd0_parser.py
+@brief Test code for the bulk decoding of PD0 ensembles
+"""
+import os
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.parser.pd0_parser import AdcpPd0Record, AdcpPd0Ensembles, ChecksumException, find_ensembles, \
+    PD0ParsingException
+
+DRIVER_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver')
+GLIDER_RESOURCE_PATH = os.path.join(DRIVER_PATH, 'moas', 'gl', 'adcpa', 'resource')
+ADCPS_RESOURCE_PATH = os.path.join(DRIVER_PATH, 'adcps_jln', 'stc', 'resource')
+
+
+@attr('UNIT', group='mi')
+class AdcpPd0EnsemblesUnitTestCase(ParserUnitTestCase):
+
+    @staticmethod
+    def read_ensembles(file_path):
+        with open(file_path, 'rb') as stream_handle:
+            data = stream_handle.read()
+        positions = [position for position, length in find_ensembles(data)
+                     if length is not None and position + length <= len(data)]
+        return data, positions
+
+    def assert_records_match(self, file_path, glider):
+        """
+        Every bulk decoded record holds the same values as the AdcpPd0Record decoded from its bytes
+        """
+        data, positions = self.read_ensembles(file_path)
+        ensembles = AdcpPd0Ensembles(data, positions, glider)
+
+        self.assertEqual(len(ensembles), len(positions))
+        self.assertEqual(sum(len(group) for group in ensembles.groups), len(positions))
+
+        for index, position in enumerate(positions):
+            num_bytes = ensembles.record(index).header.num_bytes
+            expected = AdcpPd0Record(data[position:position + num_bytes + 2], glider=glider)
+            self.assertEqual(ensembles.record(index).__dict__, expected.__dict__)
+
+    def test_glider_records(self):
+        """
+        Glider ensembles with bottom track data decode the same in bulk
+        """
+        self.assert_records_match(os.path.join(GLIDER_RESOURCE_PATH, 'ND161646.PD0'), True)
+
+    def test_adcps_records(self):
+        """
+        ADCPS ensembles decode the same in bulk
+        """
+        self.assert_records_match(os.path.join(ADCPS_RESOURCE_PATH, 'ADCP_CCE1T_20.000'), False)
+
+    def test_beam_matrices(self):
+        """
+        The cell data of a group is available as per beam matrices with a row per ensemble
+        """
+        data, positions = self.read_ensembles(os.path.join(ADCPS_RESOURCE_PATH, 'ADCP_CCE1T_20.000'))
+        ensembles = AdcpPd0Ensembles(data, positions)
+
+        self.assertEqual(len(ensembles.groups), 1)
+        group = ensembles.groups[0]
+        self.assertEqual(group.velocities.beam1.shape, (len(positions), group.number_of_cells))
+        self.assertEqual(group.fixed_data['number_of_cells'].tolist(), [group.number_of_cells] * len(positions))
+
+        for row in xrange(len(group)):
+            record = ensembles.record(row)
+            self.assertEqual(group.velocities.beam1[row].tolist(), record.velocities.beam1)
+            self.assertEqual(group.velocities.beam4[row].tolist(), record.velocities.beam4)
+            self.assertEqual(group.percent_good.beam3[row].tolist(), record.percent_good.beam3)
+            self.assertEqual(group.variable_data['heading'][row], record.variable_data.heading)
+
+    def test_bad_checksum(self):
+        """
+        An ensemble with a bad checksum is left out of its group and fails when its record is requested
+        """
+        data, positions = self.read_ensembles(os.path.join(ADCPS_RESOURCE_PATH, 'ADCP_CCE1T_20.000'))
+        num_bytes = positions[1] - positions[0] - 2
+        # flip a byte of the second ensemble's velocity data
+        corrupt = positions[1] + num_bytes - 10
+        data = data[:corrupt] + chr(ord(data[corrupt]) ^ 0xFF) + data[corrupt + 1:]
+        ensembles = AdcpPd0Ensembles(data, positions)
+
+        self.assertEqual(sum(len(group) for group in ensembles.groups), len(positions) - 1)
+        self.assertEqual(ensembles.record(0).header.num_bytes, num_bytes)
+        with self.assertRaises(ChecksumException):
+            ensembles.record(1)
+        self.assertEqual(ensembles.record(2).__dict__,
+                         AdcpPd0Record(data[positions[2]:positions[2] + num_bytes + 2]).__dict__)
+
+    def test_stray_header_id(self):
+        """
+        Stray header IDs without any data types or too short for a header are left to AdcpPd0Record
+        and fail when their record is requested, the ensembles around them still decode
+        """
+        data, positions = self.read_ensembles(os.path.join(ADCPS_RESOURCE_PATH, 'ADCP_CCE1T_20.000'))
+        ensemble = data[positions[0]:positions[1]]
+        data = ensemble + '\x7f\x7f\x06\x00\x00\x00\x00\x00' + '\x7f\x7f\x04\x00\x00\x00' + ensemble + \
+            '\x7f\x7f\x02\x00'
+        positions = [position for position, length in find_ensembles(data)
+                     if length is not None and position + length <= len(data)]
+        self.assertEqual(len(positions), 5)
+
+        ensembles = AdcpPd0Ensembles(data, positions)
+
+        self.assertEqual(sum(len(group) for group in ensembles.groups), 2)
+        expected = AdcpPd0Record(ensemble).__dict__
+        self.assertEqual(ensembles.record(0).__dict__, expected)
+        self.assertEqual(ensembles.record(3).__dict__, expected)
+        for index in (1, 2, 4):
+            with self.assertRaises(PD0ParsingException):
+                ensembles.record(index)
+
+    def test_find_ensembles(self):
+        """
+        Bytes without the header ID are stepped over two at a time and the ensemble lengths are read
+        from the header
+        """
+        data, positions = self.read_ensembles(os.path.join(ADCPS_RESOURCE_PATH, 'ADCP_CCE1T_20.000'))
+        ensemble = data[positions[0]:positions[1]]
+
+        found = list(find_ensembles('abcd' + ensemble + ensemble[:10]))
+        self.assertEqual(found, [(0, None), (2, None), (4, len(ensemble)), (4 + len(ensemble), len(ensemble))])
+        self.assertEqual(list(find_ensembles('\x7f\x7f\x10')), [(0, 4)])
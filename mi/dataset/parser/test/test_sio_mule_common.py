@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_sio_mule_common.py
+@brief Test code for the common SIO block handling
+"""
+import os
+import random
+import shutil
+import tempfile
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser.utilities import map_file
+from mi.dataset.parser.sio_mule_common import SioParser, SioBlockQueue, SioMuleDemultiplexer, SIO_HEADER_MATCHER, \
+    SIO_HEADER_GROUP_ID, SIO_HEADER_GROUP_DATA_LENGTH, SIO_HEADER_GROUP_CHECKSUM, calc_checksums, sio_blocks
+from mi.dataset.parser.ctdpf_ckl_wfp_sio import CtdpfCklWfpSioParser
+from mi.dataset.parser.dosta_ln_wfp_sio import DostaLnWfpSioParser
+from mi.dataset.parser.sio_eng_sio import SioEngSioParser
+
+RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver', 'dosta_ln', 'wfp_sio', 'resource')
+
+# parsers of the instruments of the node58p1.dat mule file, with the instrument IDs of their blocks
+MULE_PARSERS = [
+    (['WE'], DostaLnWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.dosta_ln_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'DostaLnWfpSioDataParticle'
+    }),
+    (['WC'], CtdpfCklWfpSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.ctdpf_ckl_wfp_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: ['CtdpfCklWfpSioDataParticle', 'CtdpfCklWfpSioMetadataParticle']
+    }),
+    (['CS'], SioEngSioParser, {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.sio_eng_sio',
+        DataSetDriverConfigKeys.PARTICLE_CLASS: 'SioEngSioTelemeteredDataParticle'
+    }),
+]
+
+
+def bitwise_checksum(data):
+    """
+    The SIO checksum calculated a bit at a time
+    """
+    crc = 0xFFFF
+    for byte in bytearray(data):
+        crc ^= byte
+        for _ in xrange(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+    return '%04X' % (~crc & 0xFFFF)
+
+
+def sio_block(instrument_id, data, block_number=0, checksum=None):
+    """
+    Build an SIO block around data
+    """
+    if checksum is None:
+        checksum = bitwise_checksum(data)
+    return '\x01%s1236801_%04Xu51EC760A_%02X_%s\x02%s\x03' % (instrument_id, len(data), block_number, checksum, data)
+
+
+def particle_dicts(particles):
+    """
+    The contents of particles, without the driver timestamp which changes with each parse
+    """
+    dicts = [particle.generate_dict() for particle in particles]
+    for particle_dict in dicts:
+        particle_dict.pop('driver_timestamp')
+    return dicts
+
+
+@attr('UNIT', group='mi')
+class SioMuleCommonUnitTestCase(ParserUnitTestCase):
+
+    def test_checksum(self):
+        """
+        The table and batched checksums match the bitwise checksum
+        """
+        rand = random.Random(15)
+        data = ''.join(chr(rand.randrange(256)) for _ in xrange(20000))
+        blocks = [(0, 0), (5, 6)]
+        for _ in xrange(100):
+            start = rand.randrange(len(data))
+            blocks.append((start, min(len(data), start + rand.choice([rand.randrange(40), rand.randrange(2000)]))))
+
+        expected = [bitwise_checksum(data[start:end]) for start, end in blocks]
+        self.assertEqual([SioParser.calc_checksum(data[start:end]) for start, end in blocks], expected)
+        self.assertEqual(calc_checksums(data, blocks), expected)
+        self.assertEqual(calc_checksums(data, blocks[:3]), expected[:3])
+        self.assertEqual(calc_checksums(data, []), [])
+        self.assertEqual(SioParser.calc_checksum(''), '0000')
+
+    def test_node_file(self):
+        """
+        The batched checksums of the blocks of a node file match the bitwise checksums
+        """
+        with open(os.path.join(RESOURCE_PATH, 'node58p1.dat'), 'rb') as stream_handle:
+            data = stream_handle.read()
+
+        matches = [match for match in SIO_HEADER_MATCHER.finditer(data)][:300]
+        blocks = [(match.end(0), match.end(0) + int(match.group(SIO_HEADER_GROUP_DATA_LENGTH), 16))
+                  for match in matches]
+        checksums = calc_checksums(data, blocks)
+
+        self.assertEqual(checksums, [bitwise_checksum(data[start:end]) for start, end in blocks])
+        self.assertEqual(checksums[0], matches[0].group(SIO_HEADER_GROUP_CHECKSUM))
+
+    def test_blocks(self):
+        """
+        The block reader yields the good blocks with their header, data and index, skipping
+        blocks with a bad checksum or end byte and headers within the data of a good block
+        """
+        inner = sio_block('DO', 'inner')
+        blocks = [sio_block('FL', 'first'), sio_block('CT', 'bad', checksum='0000'),
+                  sio_block('DO', inner), sio_block('PH', 'end')[:-1] + 'x', sio_block('WE', '\x03\x01data')]
+        data = 'junk' + blocks[0] + blocks[1] + blocks[2] + blocks[3] + 'junk' + blocks[4]
+
+        found = list(sio_blocks(data, batch=2))
+        self.assertEqual([header.group(SIO_HEADER_GROUP_ID) for header, block_data, start in found],
+                         ['FL', 'DO', 'WE'])
+        self.assertEqual([block_data.tobytes() for header, block_data, start in found],
+                         ['first', inner, '\x03\x01data'])
+        self.assertEqual([start for header, block_data, start in found],
+                         [4, data.index(blocks[2]), data.index(blocks[4])])
+
+        parser = SioParser({}, None, self.exception_callback)
+        self.assertEqual(parser.sieve_function(data), [(start, start + len(block)) for (header, block_data, start),
+                                                       block in zip(found, [blocks[0], blocks[2], blocks[4]])])
+
+    def test_block_queue(self):
+        """
+        The block queue hands out the blocks of a mapped file and the non data between them
+        """
+        blocks = [sio_block('FL', 'first'), sio_block('CT', 'second'), sio_block('DO', 'third')]
+        temp_dir = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(temp_dir, 'node.dat')
+            with open(file_path, 'wb') as node_file:
+                node_file.write('junk' + blocks[0] + blocks[1] + 'gap' + blocks[2] + 'tail')
+
+            with open(file_path, 'rb') as stream_handle:
+                data = map_file(stream_handle)
+                queue = SioBlockQueue(data, 1.0)
+                chunks = []
+                non_data = []
+                while True:
+                    (timestamp, chunk, start, end) = queue.get_next_non_data_with_index(clean=False)
+                    if chunk is not None:
+                        non_data.append((chunk, start, end))
+                    (timestamp, chunk, start, end) = queue.get_next_data_with_index()
+                    if chunk is None:
+                        break
+                    chunks.append((chunk, start, end))
+                data.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual([chunk for chunk, start, end in chunks], blocks)
+        self.assertEqual(non_data, [('junk', 0, 4), ('gap', chunks[1][2], chunks[2][1])])
+
+    def test_demultiplexer(self):
+        """
+        The blocks of a mule file are read once and routed by instrument ID, and each parser
+        returns the particles it returns reading the file on its own
+        """
+        file_path = os.path.join(RESOURCE_PATH, 'node58p1.dat')
+        expected = []
+        for instrument_ids, parser_class, config in MULE_PARSERS:
+            with open(file_path, 'rb') as stream_handle:
+                parser = parser_class(config, stream_handle, self.exception_callback)
+                expected.extend(particle_dicts(parser.get_records(10000)))
+
+        self.exception_callback_value = []
+        with open(file_path, 'rb') as stream_handle:
+            demultiplexer = SioMuleDemultiplexer(stream_handle)
+            for instrument_ids, parser_class, config in MULE_PARSERS:
+                demultiplexer.register(parser_class(config, stream_handle, self.exception_callback), instrument_ids)
+
+            particles = []
+            records = demultiplexer.get_records(100)
+            while records:
+                self.assertLessEqual(len(records), 100)
+                particles.extend(records)
+                records = demultiplexer.get_records(100)
+
+        self.assertEqual(particle_dicts(particles), expected)
+        self.assertEqual(set(particle.type() for particle in particles),
+                         set(['dosta_ln_wfp_instrument', 'ctdpf_ckl_wfp_instrument',
+                              'ctdpf_ckl_wfp_sio_mule_metadata', 'sio_eng_control_status']))
+        # the sio_eng parser only gets its own blocks, so no unexpected blocks are reported
+        self.assertEqual(self.exception_callback_value, [])
@@ -15,7 +15,7 @@ import os
 import re
 
 from nose.plugins.attrib import attr
-from mi.core.exceptions import ConfigurationException
+from mi.core.exceptions import ConfigurationException, RecoverableSampleException
 
 from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
@@ -190,6 +190,11 @@ class VelptAbParserUnitTestCase(ParserUnitTestCase):
 
             self.assert_particles(particles, 'VELPT_SN_11402_2014-07-02.yml', RESOURCE_PATH)
 
+            # Each run of extra bytes is reported once
+            self.assertEqual(len(self.exception_callback_value), 2)
+            for exception in self.exception_callback_value:
+                self.assertIsInstance(exception, RecoverableSampleException)
+
         log.debug('===== END TEST INVALID SYNC BYTE =====')
 
     def test_invalid_record_id(self):
@@ -213,6 +218,10 @@ class VelptAbParserUnitTestCase(ParserUnitTestCase):
 
             self.assert_particles(particles, 'bad_id_VELPT_SN_11402_2014-07-02.yml', RESOURCE_PATH)
 
+            # The record with the invalid ID is skipped with a single exception
+            self.assertEqual(len(self.exception_callback_value), 1)
+            self.assertIsInstance(self.exception_callback_value[0], RecoverableSampleException)
+
         log.debug('===== END TEST INVALID RECORD ID =====')
 
     def test_truncated_file(self):
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_zplsc_raw.py
+@brief Test code for the EK60 *.raw file reader
+"""
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.parser.utilities import map_file
+from mi.dataset.parser.zplsc_raw import CONFIG_HEADER_SIZE, CONFIG_TRANSDUCER_SIZE, SAMPLE_HEADER_SIZE, \
+    walk_datagrams, sample_offsets, read_sample_headers, read_power_data, read_power_matrix, read_config_header
+
+# internal time of the first ping, 100 nanosecond intervals since 1601
+PING_TIME = 30000000 << 32
+
+
+def datagram(datagram_type, body, internal_time=0):
+    """
+    Build a datagram with its header and lengths
+    """
+    content = struct.pack('<4sll', datagram_type, internal_time & 0xFFFFFFFF, internal_time >> 32) + body
+    return struct.pack('<l', len(content)) + content + struct.pack('<l', len(content))
+
+
+def sample_datagram(channel, internal_time, power):
+    """
+    Build a sample datagram holding power data only
+    """
+    fields = struct.pack('<2h12f2h2f2l', channel, 1, 1.5, 38000.0 * channel, 500.0, 0.001, 2425.0, 0.000256,
+                         1500.0, 0.01, 0.0, 0.0, 0.0, 10.0, 0, 0, 0.0, 0.0, 0, len(power))
+    return datagram('RAW0', fields + struct.pack('<%dh' % len(power), *power), internal_time)
+
+
+def config_datagram(transducer_count):
+    header = struct.pack('<128s128s128s30s98sl', 'survey', 'transect', 'sounder', '2.2', '', transducer_count)
+    return datagram('CON0', header + '\x00' * CONFIG_TRANSDUCER_SIZE * transducer_count)
+
+
+@attr('UNIT', group='mi')
+class ZplscRawUnitTestCase(ParserUnitTestCase):
+
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.config = config_datagram(2)
+        self.samples = [sample_datagram(channel, PING_TIME + ping, [ping * 10 + channel] * 5)
+                        for ping in xrange(3) for channel in (1, 2)]
+        self.data = self.config + datagram('NME0', '$GPGGA,,,,*00') + ''.join(self.samples)
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_walk(self):
+        """
+        The datagrams are found by their lengths and the sample headers and power data read at their offsets
+        """
+        self.assertEqual([datagram_type for offset, datagram_type in walk_datagrams(self.data)],
+                         ['CON0', 'NME0'] + ['RAW0'] * 6)
+
+        offsets = sample_offsets(self.data, len(self.config))
+        headers = read_sample_headers(self.data, offsets)
+        self.assertEqual(offsets[0], len(self.data) - sum(len(sample) for sample in self.samples))
+        self.assertEqual(headers['channel_number'].tolist(), [1, 2] * 3)
+        self.assertEqual(headers['low_date_time'].tolist(), [(PING_TIME + ping) & 0xFFFFFFFF
+                                                            for ping in xrange(3) for channel in (1, 2)])
+        self.assertEqual(headers['frequency'].tolist(), [38000.0, 76000.0] * 3)
+        self.assertEqual(headers['count'].tolist(), [5] * 6)
+        self.assertEqual(read_power_data(self.data, offsets[3], 5).tolist(), [12] * 5)
+
+        self.assertEqual(len(read_sample_headers(self.data, sample_offsets(self.config))), 0)
+        self.assertEqual(read_config_header(self.data[16:16 + CONFIG_HEADER_SIZE])['transducer_count'], 2)
+        self.assertEqual(SAMPLE_HEADER_SIZE, 88)
+
+    def test_resynchronize(self):
+        """
+        A datagram with mismatching lengths is skipped by searching for the next datagram type
+        """
+        corrupt = self.samples[1][:-4] + struct.pack('<l', 7)
+        data = self.config + self.samples[0] + corrupt + 'junk' + ''.join(self.samples[2:])
+        headers = read_sample_headers(data, sample_offsets(data))
+
+        self.assertEqual(headers['channel_number'].tolist(), [1, 1, 2, 1, 2])
+        self.assertEqual(headers['low_date_time'].tolist()[1], (PING_TIME + 1) & 0xFFFFFFFF)
+
+    def test_mapped_file(self):
+        """
+        The reader works on a memory map of the file
+        """
+        file_path = os.path.join(self.temp_dir, 'OOI-D20141212-T152500.raw')
+        with open(file_path, 'wb') as raw_file:
+            raw_file.write(self.data)
+
+        with open(file_path, 'rb') as stream_handle:
+            data = map_file(stream_handle)
+            offsets = sample_offsets(data)
+            headers = read_sample_headers(data, offsets)
+            power = np.concatenate([read_power_data(data, offset, 5) for offset in offsets])
+            data.close()
+
+        self.assertEqual(headers['channel_number'].tolist(), [1, 2] * 3)
+        self.assertEqual(power.reshape(6, 5)[:, 0].tolist(), [ping * 10 + channel
+                                                              for ping in xrange(3) for channel in (1, 2)])
+
+    def test_power_matrix(self):
+        """
+        The power data of the pings of a channel is read into one matrix, padding shorter pings
+        """
+        data = self.data + sample_datagram(1, PING_TIME + 3, [7] * 3)
+        offsets = sample_offsets(data)
+        headers = read_sample_headers(data, offsets)
+        rows = headers['channel_number'] == 1
+        power = read_power_matrix(data, offsets[rows], headers['count'][rows])
+
+        self.assertEqual(power.dtype, np.float32)
+        self.assertEqual(power.shape, (4, 5))
+        self.assertEqual(power[:3].tolist(), [[ping * 10 + 1] * 5 for ping in xrange(3)])
+        self.assertEqual(power[3, :3].tolist(), [7] * 3)
+        self.assertTrue(np.isnan(power[3, 3:]).all())
+        self.assertEqual(read_power_matrix(data, offsets[:0], headers['count'][:0]).shape, (0, 0))
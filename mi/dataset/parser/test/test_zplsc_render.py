@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test
+@file mi/dataset/parser/test/test_zplsc_render.py
+@brief Test code for the zplsc echogram rendering
+"""
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+from nose.plugins.attrib import attr
+
+from mi.core.exceptions import ConfigurationException
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.idk.config import Config
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser.test.test_zplsc_raw import PING_TIME, config_datagram, sample_datagram
+from mi.dataset.parser.zplsc_b import ZplscBParser
+from mi.dataset.parser.zplsc_c_dcl import ZplscCDclParser
+from mi.dataset.parser.zplsc_render import EchogramRenderer, JET, PNG_SIGNATURE, colorize, decimate, write_png, \
+    shared_renderer, shutdown_shared_renderer, ECHOGRAM_WIDTH
+
+ZPLSC_C_RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver', 'zplsc_c', 'dcl', 'resource')
+
+
+def read_png(filename):
+    """
+    Read an 8 bit rgb PNG without filtering, as written by write_png
+    @return: array of shape (height, width, 3)
+    """
+    with open(filename, 'rb') as png_file:
+        data = png_file.read()
+    assert data.startswith(PNG_SIGNATURE)
+
+    position = len(PNG_SIGNATURE)
+    chunks = {}
+    while position < len(data):
+        length, = struct.unpack_from('>I', data, position)
+        chunk_type = data[position + 4:position + 8]
+        chunk = data[position + 8:position + 8 + length]
+        crc, = struct.unpack_from('>I', data, position + 8 + length)
+        assert crc == zlib.crc32(chunk_type + chunk) & 0xFFFFFFFF
+        chunks[chunk_type] = chunk
+        position += length + 12
+
+    width, height = struct.unpack_from('>II', chunks['IHDR'])
+    scanlines = np.frombuffer(zlib.decompress(chunks['IDAT']), dtype=np.uint8).reshape(height, width * 3 + 1)
+    return scanlines[:, 1:].reshape(height, width, 3)
+
+
+def particle_values(particle):
+    return dict((value['value_id'], value['value']) for value in particle.generate_dict()['values'])
+
+
+@attr('UNIT', group='mi')
+class ZplscRenderUnitTestCase(ParserUnitTestCase):
+
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.temp_dir = tempfile.mkdtemp()
+        self.renderer = EchogramRenderer(workers=1, raster=True)
+
+    def tearDown(self):
+        self.renderer.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_png(self):
+        """
+        The rgb image is written as a PNG, and values are mapped to colors with nan in white
+        """
+        values = np.array([[-180, -120], [-59, np.nan]], dtype=np.float32)
+        rgb = colorize(values)
+        self.assertEqual(rgb[0, 0].tolist(), JET[0].tolist())
+        self.assertEqual(rgb[1, 0].tolist(), JET[-1].tolist())
+        self.assertEqual(rgb[1, 1].tolist(), [255, 255, 255])
+        self.assertEqual(colorize(values, None)[1, 0].tolist(), JET[-1].tolist())
+
+        filename = os.path.join(self.temp_dir, 'image.png')
+        write_png(filename, rgb)
+        self.assertEqual(read_png(filename).tolist(), rgb.tolist())
+
+    def test_decimate(self):
+        """
+        The pings are decimated to no more than the image width
+        """
+        power = np.arange(50).reshape(10, 5)
+        times = np.arange(10)
+        self.assertEqual(decimate(power, times, None)[1].tolist(), range(10))
+        self.assertEqual(decimate(power, times, 4)[1].tolist(), [0, 3, 6, 9])
+        self.assertEqual(decimate(power, times, 4)[0].shape, (4, 5))
+
+    def test_shared_renderer(self):
+        """
+        The shared renderer is kept until it is shut down, a new one is started after that
+        """
+        renderer = shared_renderer()
+        self.assertIs(shared_renderer(), renderer)
+        self.assertEqual(shutdown_shared_renderer(), [])
+        self.assertIsNone(renderer._pool)
+        self.assertIsNot(shared_renderer(), renderer)
+        self.assertEqual(shutdown_shared_renderer(), [])
+        self.assertEqual(shutdown_shared_renderer(), [])
+
+    def test_shared_renderer_settings(self):
+        """
+        The shared renderer decimates and writes rasters by default, and is configured by the latest call
+        """
+        renderer = shared_renderer()
+        self.assertEqual(renderer.width, ECHOGRAM_WIDTH)
+        self.assertTrue(renderer.raster)
+
+        filename = os.path.join(self.temp_dir, 'shared.png')
+        power = np.arange(ECHOGRAM_WIDTH * 3 * 2, dtype=np.float32).reshape(ECHOGRAM_WIDTH * 3, 2) - 180
+        renderer.submit(power, np.arange(ECHOGRAM_WIDTH * 3), 38000, 0.2, 'shared', filename)
+        self.assertEqual(shutdown_shared_renderer(), [filename])
+        self.assertEqual(read_png(filename).shape, (2, ECHOGRAM_WIDTH, 3))
+
+        renderer = shared_renderer(width=None, raster=False)
+        self.assertIsNone(renderer.width)
+        self.assertFalse(renderer.raster)
+        self.assertIs(shared_renderer(width=10), renderer)
+        self.assertEqual(renderer.width, 10)
+        self.assertTrue(renderer.raster)
+        self.assertEqual(shutdown_shared_renderer(), [])
+
+    def test_zplsc_b(self):
+        """
+        The echogram of each channel of a raw file is queued to the renderer
+        """
+        self.renderer.width = 2
+        file_path = os.path.join(self.temp_dir, 'OOI-D20141212-T152500.raw')
+        with open(file_path, 'wb') as raw_file:
+            raw_file.write(config_datagram(2))
+            for ping in xrange(3):
+                for channel in (1, 2):
+                    raw_file.write(sample_datagram(channel, PING_TIME + ping, [-5000 * channel] * 4))
+
+        with open(file_path, 'rb') as stream_handle:
+            parser = ZplscBParser({}, stream_handle, self.exception_callback, self.temp_dir, self.renderer)
+            particles = parser.get_records(1)
+
+        self.assertEqual(len(particles), 1)
+        self.assertEqual(particle_values(particles[0])['zplsc_channel'], [1, 2])
+
+        rendered = self.renderer.wait()
+        output_path = os.path.join(self.temp_dir, '2014', '12', '12')
+        self.assertEqual(rendered, [os.path.join(output_path, 'OOI-D20141212-T152500_38k.png'),
+                                    os.path.join(output_path, 'OOI-D20141212-T152500_76k.png')])
+        # the 3 pings are decimated to 2, with the 4 samples of a ping in a column
+        image = read_png(rendered[0])
+        self.assertEqual(image.shape, (4, 2, 3))
+        expected = colorize(np.float32([[-5000 * 10 * np.log10(2) / 256]]))
+        self.assertEqual(image[0, 0].tolist(), expected[0, 0].tolist())
+
+    def test_zplsc_c(self):
+        """
+        The echogram raster of each frequency of a zplsc_c file is queued to the renderer
+        """
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.zplsc_c_dcl',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: 'ZplscCInstrumentDataParticle'}
+
+        with open(os.path.join(ZPLSC_C_RESOURCE_PATH, '20150407.zplsc_var_channels.log'), 'rb') as stream_handle:
+            parser = ZplscCDclParser(config, stream_handle, self.exception_callback, self.temp_dir, self.renderer)
+            particles = parser.get_records(100)
+
+        rendered = self.renderer.wait()
+        self.assertEqual([os.path.basename(filename) for filename in rendered],
+                         ['20150407.zplsc_var_channels_38k.png', '20150407.zplsc_var_channels_125k.png',
+                          '20150407.zplsc_var_channels_200k.png', '20150407.zplsc_var_channels_455k.png'])
+
+        # the bursts with 38k values, bursts without bins are left out
+        bursts = [values['zplsc_c_values_channel_%d' % channel] for values in map(particle_values, particles)
+                  for channel in xrange(1, 5) if values['zplsc_c_frequency_channel_%d' % channel] == 38 and
+                  values['zplsc_c_values_channel_%d' % channel] is not None]
+        image = read_png(rendered[0])
+        self.assertEqual(image.shape[1], len(bursts))
+        self.assertEqual(image.shape[0], max(len(burst) for burst in bursts))
+
+    def test_zplsc_c_no_output_path(self):
+        """
+        A renderer without an output file path is rejected rather than writing to the working directory
+        """
+        with open(os.path.join(ZPLSC_C_RESOURCE_PATH, '20150407.zplsc_var_channels.log'), 'rb') as stream_handle:
+            with self.assertRaises(ConfigurationException):
+                ZplscCDclParser({}, stream_handle, self.exception_callback, None, self.renderer)
@@ -12,25 +12,27 @@ __author__ = 'Joe Padula'
 __license__ = 'Apache 2.0'
 
 from datetime import datetime
+import mmap
 import ntplib
-import calendar
 
 from mi.core.log import get_logger
 log = get_logger()
 
-# Format of DCL Controller Timestamp in records
-# Example: 2014/08/17 00:57:10.648
-ZULU_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+from mi.core.timestamp import ZULU_TIMESTAMP_FORMAT, DCL_CONTROLLER_TIMESTAMP_FORMAT, \
+    formatted_timestamp_to_unix_time, formatted_timestamps_to_ntp_time
+from mi.dataset.parser.hex_decoder import hex_byte_sum
 
-# Format of DCL Controller Timestamp in records
-# Example: 2014/08/17 00:57:10.648
-DCL_CONTROLLER_TIMESTAMP_FORMAT = "%Y/%m/%d %H:%M:%S.%f"
 
 def formatted_timestamp_utc_time(timestamp_str, format_str):
+    """
+    Converts a formatted timestamp string to UTC time.
+    :param timestamp_str: a timestamp string
+    :param format_str: the strptime format of the timestamp string
+    :return: UTC time in seconds and microseconds precision
+    """
 
-    dt = datetime.strptime(timestamp_str, format_str)
+    return formatted_timestamp_to_unix_time(timestamp_str, format_str)
 
-    return calendar.timegm(dt.timetuple()) + (dt.microsecond / 1000000.0)
 
 def zulu_timestamp_to_utc_time(zulu_timestamp_str):
     """
@@ -55,6 +57,10 @@ def zulu_timestamp_to_ntp_time(zulu_timestamp_str):
     return float(ntplib.system_to_ntp_time(utc_time))
 
 
+# NTP time of Jan 1, 2000
+NTP_TIME_2000 = zulu_timestamp_to_ntp_time("2000-01-01T00:00:00.00Z")
+
+
 def time_2000_to_ntp_time(time_2000):
     """
     This function calculates and returns a timestamp in epoch 1900
@@ -64,7 +70,7 @@ def time_2000_to_ntp_time(time_2000):
     Returns:
       timestamp in number of seconds since Jan 1, 1900
     """
-    return time_2000 + zulu_timestamp_to_ntp_time("2000-01-01T00:00:00.00Z")
+    return time_2000 + NTP_TIME_2000
 
 
 def dcl_controller_timestamp_to_utc_time(dcl_controller_timestamp_str):
@@ -74,7 +80,6 @@ def dcl_controller_timestamp_to_utc_time(dcl_controller_timestamp_str):
     :return: UTC time in seconds and microseconds precision
     """
 
-
     return formatted_timestamp_utc_time(dcl_controller_timestamp_str,
                                         DCL_CONTROLLER_TIMESTAMP_FORMAT)
 
@@ -91,6 +96,17 @@ def dcl_controller_timestamp_to_ntp_time(dcl_controller_timestamp_str):
     return float(ntplib.system_to_ntp_time(utc_time))
 
 
+def dcl_controller_timestamps_to_ntp_time(dcl_controller_timestamp_strs):
+    """
+    Converts an array of DCL controller timestamp strings to NTP times.
+    :param dcl_controller_timestamp_strs: sequence or array of DCL controller timestamp strings
+    :return: array of NTP times (float64) in seconds and microseconds precision
+    """
+
+    return formatted_timestamps_to_ntp_time(dcl_controller_timestamp_strs,
+                                            DCL_CONTROLLER_TIMESTAMP_FORMAT)
+
+
 def mac_timestamp_to_utc_timestamp(mac_timestamp):
     """
     :param mac_timestamp: A mac based timestamp
@@ -153,12 +169,22 @@ def sum_hex_digits(ascii_hex_str):
     if len_of_ascii_hex % 2 != 0:
         raise ValueError("The ASCII Hex string is not divisible by 2.")
 
-    x = 0
+    # Return the summation of the bytes as hex
+    return hex(hex_byte_sum(ascii_hex_str))
 
-    # Iterate through each byte of ascii hex
-    for index in range(0, len_of_ascii_hex, 2):
-        # Convert each byte to an int and add it to the existing summation
-        x += int(ascii_hex_str[index:index+2], 16)
 
-    # Return the resultant summation as hex
-    return hex(x)
\ No newline at end of file
+def map_file(stream_handle):
+    """
+    Get the contents of a file as a read only memory map, so it can be searched and sliced without reading it
+    in small pieces. Streams which cannot be mapped, such as a StringIO, an empty file or a file not positioned
+    at the start, are read instead.
+    :param stream_handle: The handle of the file
+    :return: mmap or string holding the contents of the file, a mmap should be closed when done
+    """
+    try:
+        if stream_handle.tell() == 0:
+            return mmap.mmap(stream_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, IOError, ValueError, mmap.error):
+        pass
+
+    return stream_handle.read()
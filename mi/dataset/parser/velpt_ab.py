@@ -8,12 +8,19 @@
 Release notes:
 
 initial release
+
+The file is memory mapped and scanned for the sync byte followed by a known record ID with find, the
+record checksum is summed as little endian words with numpy, and a run of bytes which do not start a
+record is skipped with a single warning instead of one for each byte.
 """
 __author__ = 'Chris Goodrich'
 __license__ = 'Apache 2.0'
 
+import mmap
 import struct
 
+import numpy as np
+
 from mi.core.exceptions import RecoverableSampleException
 from mi.core.log import get_logger
 log = get_logger()
@@ -22,6 +29,7 @@ from mi.dataset.dataset_parser import SimpleParser
 from mi.dataset.dataset_parser import DataSetDriverConfigKeys
 from mi.core.common import BaseEnum
 from mi.core.exceptions import ConfigurationException
+from mi.dataset.parser.utilities import map_file
 
 """
 Sample Aquadopp Velocity Data Record (42 bytes)
@@ -146,6 +154,17 @@ class VelptAbParser(SimpleParser):
     HEAD_CONFIGURATION_ID = b'\x04'
     USER_CONFIGURATION_ID = b'\x00'
 
+    RECORD_IDS = (VELOCITY_DATA_ID, DIAGNOSTIC_HEADER_ID, DIAGNOSTIC_DATA_ID,
+                  HARDWARE_CONFIGURATION_ID, HEAD_CONFIGURATION_ID, USER_CONFIGURATION_ID)
+
+    # The sync byte, ID byte and record size in words precede the record data,
+    # a record is at least those and its checksum
+    RECORD_HEADER_SIZE = 4
+    MIN_RECORD_SIZE = 6
+
+    # 46476 is the base value of the checksum given in the IDD as 0xB58C
+    CHECKSUM_BASE = 46476
+
     # This is used if the Diagnostics Header record is
     # bad or not present. The number of diagnostics records
     # expected is defaulted to 20 as that number seems common
@@ -192,6 +211,7 @@ class VelptAbParser(SimpleParser):
         self._instrument_metadata_dict = {}
         self._diagnostics_header_record = ''
         self._file_handle = file_handle
+        self._position = 0
 
         # Obtain the particle classes dictionary from the config data
         if DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT in config:
@@ -268,11 +288,9 @@ class VelptAbParser(SimpleParser):
         :record_checksum: the checksum from the record
         :return: boolean
         """
-        # 46476 is the base value of the checksum given in the IDD as 0xB58C
-        self._calculated_checksum = 46476
-
-        for x in range(0, length-3, 2):
-            self._calculated_checksum += struct.unpack('<H', record[x:x+2])[0]
+        # The checksum is the sum of the little endian words of the record before the checksum
+        words = np.frombuffer(record, dtype='<u2', count=(length - 2) // 2)
+        self._calculated_checksum = self.CHECKSUM_BASE + int(words.sum(dtype=np.uint64))
 
         # Modulo 65536 is applied to the checksum to keep it a 16 bit value
         self._calculated_checksum %= 65536
@@ -282,94 +300,100 @@ class VelptAbParser(SimpleParser):
         else:
             return False
 
-    def load_record(self, fh):
+    def find_record(self, data, position):
+        """
+        Find the next record start, a sync byte followed by a known record ID and a valid record size.
+        :param data: The mapped file
+        :param position: The position the search starts from
+        :return: position of the record start, or -1 if there is none
+        """
+        position = data.find(self.SYNC_MARKER, position)
+        while position != -1:
+            if data[position + 1:position + 2] in self.RECORD_IDS:
+                # A record header cut short by the end of the file is a record start, found to be malformed
+                if position + self.RECORD_HEADER_SIZE > len(data) or \
+                        struct.unpack_from('<H', data, position + 2)[0]*2 >= self.MIN_RECORD_SIZE:
+                    return position
+            position = data.find(self.SYNC_MARKER, position + 1)
+        return position
+
+    def skip_invalid_bytes(self, data, record_start):
+        """
+        Skip the bytes from the current position up to the next record start,
+        issuing one warning for all of them.
+        :param data: The mapped file
+        :param record_start: The position of the next record start, -1 if there is none
+        """
+        skip_to = len(data) if record_start == -1 else record_start
+        log.warning('Found %d invalid bytes at %d, skipping to next record',
+                    skip_to - self._position, self._position)
+        self._exception_callback(
+            RecoverableSampleException('Found %d invalid bytes, skipping to next record' % (skip_to - self._position)))
+        self._position = skip_to
+
+    def load_record(self, data):
         """
-        Attempt to load a data record.
-        :param fh: The file handle
+        Attempt to load a data record from the current position of the mapped file.
+        :param data: The mapped file
         :return: boolean indicating success or failure
         """
-        record_start = 0
+        record_start = self.find_record(data, self._position)
 
-        # Assume the operation will be successful
-        status = True
-
-        # Read the Sync byte
-        sync_byte = fh.read(1)
+        # Skip any bytes before the record start
+        if record_start != self._position and self._position < len(data):
+            self.skip_invalid_bytes(data, record_start)
 
-        # If the first byte is a valid sync byte
-        # determine the record type and the record length.
-        if sync_byte == self.SYNC_MARKER:
+        if record_start == -1:  # Found the end of the file
+            self._end_of_file = True
+            return False
 
-            # Need to capture the record start address for reading the entire record later
-            record_start = fh.tell() - 1
+        # Determine the record type and the record length.
+        self.good_record_type(data[record_start + 1:record_start + 2])
 
-            # Get the ID byte and see if it's a valid record
-            id_byte = fh.read(1)
+        record_length = 0
+        if record_start + self.RECORD_HEADER_SIZE <= len(data):
+            record_length = struct.unpack_from('<H', data, record_start + 2)[0]*2
 
-            if not self.good_record_type(id_byte):
-                status = False
-                log.warning('Found invalid ID byte: %d, at %d skipping to next byte',
-                            struct.unpack('B', id_byte)[0], fh.tell()-1)
-                self._exception_callback(
-                    RecoverableSampleException('Found Invalid ID Byte, skipping to next byte'))
-
-        elif sync_byte == '':  # Found the end of the file
+        # If the whole record is not there we found a malformed record at the end of the file.
+        if not record_length or record_start + record_length > len(data):
             self._end_of_file = True
-            status = False
-        else:
-            status = False
-            log.warning('Found invalid sync byte: %d at %d , skipping to next byte',
-                        struct.unpack('B', sync_byte)[0], fh.tell()-1)
+            log.warning('Last record in file was malformed')
             self._exception_callback(
-                RecoverableSampleException('Found Invalid Sync Byte, skipping to next byte'))
-
-        # If the record is valid, read it
-        if status:
-            record_length = struct.unpack('<H', fh.read(2))[0]*2
-            fh.seek(record_start, 0)
-            self._current_record = fh.read(record_length)
+                RecoverableSampleException('Last record in file malformed, no particle generated'))
+            return False
 
-            # If the length of what was read matches what we asked for,
-            # update the next record start position. Otherwise we found
-            # a malformed record at the end of the file. 
-            if len(self._current_record) == record_length:
+        self._current_record = data[record_start:record_start + record_length]
+        self._position = record_start + record_length
 
-                # Check that the checksum of this record is good
-                stored_checksum = struct.unpack('<H', self._current_record[(record_length-2):record_length])[0]
+        # Check that the checksum of this record is good
+        stored_checksum = struct.unpack_from('<H', self._current_record, record_length - 2)[0]
 
-                if self._bad_checksum(self._current_record, record_length, stored_checksum):
+        if self._bad_checksum(self._current_record, record_length, stored_checksum):
 
-                    # Did the checksum fail on a config record?
-                    # If so, don't try to generate that part of
-                    # the instrument metadata particle
-                    self._build_hardware_config_data = False
-                    self._build_head_config_data = False
-                    self._build_user_config_data = False
+            # Did the checksum fail on a config record?
+            # If so, don't try to generate that part of
+            # the instrument metadata particle
+            self._build_hardware_config_data = False
+            self._build_head_config_data = False
+            self._build_user_config_data = False
 
-                    # Did the checksum fail on a diagnostic header record?
-                    if self._diagnostic_header:
-                        self._total_diagnostic_records = self.DEFAULT_DIAGNOSTICS_COUNT  # Use the default diag count
-                        self._bad_diagnostic_header = True
-                        self._sending_diagnostics = True  # The header is bad, the records may be okay
-                        log.warning('Diagnostic Header Invalid')
-                        self._exception_callback(
-                            RecoverableSampleException('Diagnostic Header Invalid, no particle generated'))
-
-                    log.warning('Invalid checksum: %d, expected %d - record will not be processed',
-                                stored_checksum, self._calculated_checksum)
-                    self._exception_callback(
-                        RecoverableSampleException('Invalid checksum, no particle generated'))
+            # Did the checksum fail on a diagnostic header record?
+            if self._diagnostic_header:
+                self._total_diagnostic_records = self.DEFAULT_DIAGNOSTICS_COUNT  # Use the default diag count
+                self._bad_diagnostic_header = True
+                self._sending_diagnostics = True  # The header is bad, the records may be okay
+                log.warning('Diagnostic Header Invalid')
+                self._exception_callback(
+                    RecoverableSampleException('Diagnostic Header Invalid, no particle generated'))
 
-                    status = False
+            log.warning('Invalid checksum: %d, expected %d - record will not be processed',
+                        stored_checksum, self._calculated_checksum)
+            self._exception_callback(
+                RecoverableSampleException('Invalid checksum, no particle generated'))
 
-            else:
-                self._end_of_file = True
-                status = False
-                log.warning('Last record in file was malformed')
-                self._exception_callback(
-                    RecoverableSampleException('Last record in file malformed, no particle generated'))
+            return False
 
-        return status
+        return True
 
     def build_instrument_metadata_particle(self, timestamp):
         """
@@ -539,10 +563,25 @@ class VelptAbParser(SimpleParser):
         """
         Parser for velpt_ab data.
         """
+        data = map_file(self._file_handle)
+        try:
+            self._parse_records(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+        log.debug('File has been completely processed')
+
+    def _parse_records(self, data):
+        """
+        Parse the records of the mapped file.
+        :param data: The mapped file
+        """
+        self._position = 0
         while not self._end_of_file:
 
             # Determine the type of record and load it for processing.
-            good_record = self.load_record(self._file_handle)
+            good_record = self.load_record(data)
 
             # Sequence through the various expected record types
             if good_record:
@@ -588,5 +627,3 @@ class VelptAbParser(SimpleParser):
                     self._user_config_dict_generated = True
                     self._build_user_config_data = False
                     self._build_config_metadata = True
-
-        log.debug('File has been completely processed')
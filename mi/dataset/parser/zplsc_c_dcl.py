@@ -67,13 +67,17 @@ __license__ = 'Apache 2.0'
 
 
 import ntplib
+import os
 import re
+from collections import defaultdict
+
+import numpy as np
 
 from mi.core.log import get_logger
 log = get_logger()
 
 from mi.core.common import BaseEnum
-from mi.core.exceptions import RecoverableSampleException
+from mi.core.exceptions import RecoverableSampleException, ConfigurationException
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.log import get_logging_metaclass
 from mi.dataset.dataset_parser import SimpleParser
@@ -202,6 +206,15 @@ ZPLSC_C_DATA_RULES = [
 ]
 
 
+# (frequency, values) particle names of each channel, for the echograms
+ECHOGRAM_CHANNELS = [
+    (ZplscCParticleKey.FREQ_CHAN_1, ZplscCParticleKey.VALS_CHAN_1),
+    (ZplscCParticleKey.FREQ_CHAN_2, ZplscCParticleKey.VALS_CHAN_2),
+    (ZplscCParticleKey.FREQ_CHAN_3, ZplscCParticleKey.VALS_CHAN_3),
+    (ZplscCParticleKey.FREQ_CHAN_4, ZplscCParticleKey.VALS_CHAN_4)
+]
+
+
 class DataParticleType(BaseEnum):
     ZPLSC_C_DCL_SAMPLE = 'zplsc_c_instrument'
 
@@ -238,13 +251,33 @@ class ZplscCDclParser(SimpleParser):
 
     __metaclass__ = get_logging_metaclass(log_level='trace')
 
-    def parse_file(self):
+    def __init__(self, config, stream_handle, exception_callback, output_file_path=None, renderer=None):
+        """
+        @param config: The parser configuration dictionary
+        @param stream_handle: The stream handle of the file to parse
+        @param exception_callback: The callback to use when an exception occurs
+        @param output_file_path: The location to output the echogram .png files
+        @param renderer: EchogramRenderer an echogram raster of the values of each frequency is queued to,
+            no echograms are made without a renderer
+        @throws ConfigurationException if a renderer is given without an output file path
+        """
+        if renderer is not None and not output_file_path:
+            raise ConfigurationException('An output file path is needed for the echograms of the renderer')
+
+        super(ZplscCDclParser, self).__init__(config, stream_handle, exception_callback)
+        self._output_file_path = output_file_path
+        self._renderer = renderer
+
+    def iter_records(self):
         """
         Parse the zplsc_c log file (averaged condensed data).
         Read file line by line. Values are extracted from lines containing condensed ASCII data
-        @return: dictionary of data values with the particle names as keys or None
+        and each particle is yielded as it is created.
         """
 
+        # Values and times of the bursts of each frequency, for the echograms
+        echograms = defaultdict(lambda: ([], []))
+
         # Loop over all lines in the data file and parse the data to generate particles
         for number, line in enumerate(self._stream_handle, start=1):
 
@@ -278,12 +311,14 @@ class ZplscCDclParser(SimpleParser):
                     utilities.formatted_timestamp_utc_time(
                         match.group('dcl_timestamp'), utilities.DCL_CONTROLLER_TIMESTAMP_FORMAT))
 
-                # Extract a particle and append it to the record buffer
+                # Extract a particle and hand it out
                 particle = self._extract_sample(
                     ZplscCInstrumentDataParticle, None, data_dict, time_stamp)
                 if particle is not None:
                     log.trace('Parsed particle: %s' % particle.generate_dict())
-                    self._record_buffer.append(particle)
+                    if self._renderer is not None:
+                        self.add_echogram_burst(echograms, data_dict, time_stamp)
+                    yield particle
 
                 continue
 
@@ -291,6 +326,42 @@ class ZplscCDclParser(SimpleParser):
             self._exception_callback(
                 RecoverableSampleException('Unknown data found in line %s:%s' % (number, line)))
 
+        if echograms:
+            self.queue_echograms(echograms)
+
+    @staticmethod
+    def add_echogram_burst(echograms, data_dict, time_stamp):
+        """
+        Add the values of each frequency of a burst to the echograms
+        @param echograms: dictionary of (values, times) lists by frequency
+        @param data_dict: dictionary of the values of the burst with the particle names as keys
+        @param time_stamp: time of the burst
+        """
+        for frequency_key, values_key in ECHOGRAM_CHANNELS:
+            values = data_dict[values_key]
+            if values is not None and data_dict[frequency_key] is not None:
+                # a single bin is held as a string
+                if isinstance(values, basestring):
+                    values = [values]
+                echograms[int(data_dict[frequency_key])][0].append(map(int, values))
+                echograms[int(data_dict[frequency_key])][1].append(time_stamp)
+
+    def queue_echograms(self, echograms):
+        """
+        Queue the echogram raster of the values of each frequency, the bursts with fewer bins are padded
+        @param echograms: dictionary of (values, times) lists by frequency
+        """
+        outfile = os.path.basename(getattr(self._stream_handle, 'name', 'zplsc_c')).rpartition('.')[0]
+        for frequency, (values, times) in sorted(echograms.iteritems()):
+            matrix = np.empty((len(values), max(len(burst) for burst in values)), dtype=np.float32)
+            matrix.fill(np.nan)
+            for row, burst in enumerate(values):
+                matrix[row, :len(burst)] = burst
+
+            filename = os.path.join(self._output_file_path, '%s_%dk.png' % (outfile, frequency))
+            self._renderer.submit(matrix, times, frequency, None, 'Frequency: %dk: ' % frequency, filename,
+                                  raster=True, value_range=None)
+
     @staticmethod
     def parse_line(matches):
         """
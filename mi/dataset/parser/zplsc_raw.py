@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.zplsc_raw
+@file mi/dataset/parser/zplsc_raw.py
+@brief Reader for Simrad EK60 *.raw files
+
+Release notes:
+
+Functions to read the datagrams of EK60 *.raw files, used by the zplsc_b parser and the echogram plots.
+The datagrams are found by following the length at the start of each datagram through a memory map of
+the file, and the headers of all the sample datagrams are decoded in one step with numpy.
+"""
+
+import re
+import numpy as np
+
+from struct import unpack, unpack_from
+
+from mi.core.log import get_logger
+log = get_logger()
+
+
+LENGTH_SIZE = 4
+DATAGRAM_HEADER_SIZE = 12
+CONFIG_HEADER_SIZE = 516
+CONFIG_TRANSDUCER_SIZE = 320
+
+# set global regex expressions to find all sample, annotation and NMEA sentences
+SAMPLE_REGEX = r'RAW\d{1}'
+SAMPLE_MATCHER = re.compile(SAMPLE_REGEX, re.DOTALL)
+
+ANNOTATE_REGEX = r'TAG\d{1}'
+ANNOTATE_MATCHER = re.compile(ANNOTATE_REGEX, re.DOTALL)
+
+NMEA_REGEX = r'NME\d{1}'
+NMEA_MATCHER = re.compile(NMEA_REGEX, re.DOTALL)
+
+# any datagram type, used to resynchronize after a corrupt datagram
+DATAGRAM_REGEX = r'(CON|NME|TAG|RAW)\d{1}'
+DATAGRAM_MATCHER = re.compile(DATAGRAM_REGEX, re.DOTALL)
+
+# Numpy data type object for unpacking the Sample datagram including the header from binary *.raw
+sample_dtype = np.dtype([('length1', 'i4'),                 # 4 byte int (long)
+                      # DatagramHeader
+                      ('datagram_type', 'a4'),              # 4 byte string
+                      ('low_date_time', 'i4'),              # 4 byte int (long)
+                      ('high_date_time', 'i4'),             # 4 byte int (long)
+                      # SampleDatagram
+                      ('channel_number', 'i2'),             # 2 byte int (short)
+                      ('mode', 'i2'),                       # 2 byte int (short)
+                      ('transducer_depth', 'f4'),           # 4 byte float
+                      ('frequency', 'f4'),                  # 4 byte float
+                      ('transmit_power', 'f4'),             # 4 byte float
+                      ('pulse_length', 'f4'),               # 4 byte float
+                      ('bandwidth', 'f4'),                  # 4 byte float
+                      ('sample_interval', 'f4'),            # 4 byte float
+                      ('sound_velocity', 'f4'),             # 4 byte float
+                      ('absorption_coefficient', 'f4'),     # 4 byte float
+                      ('heave', 'f4'),                      # 4 byte float
+                      ('roll', 'f4'),                       # 4 byte float
+                      ('pitch', 'f4'),                      # 4 byte float
+                      ('temperature', 'f4'),                # 4 byte float
+                      ('trawl_upper_depth_valid', 'i2'),    # 2 byte int (short)
+                      ('trawl_opening_valid', 'i2'),        # 2 byte int (short)
+                      ('trawl_upper_depth', 'f4'),          # 4 byte float
+                      ('trawl_opening', 'f4'),              # 4 byte float
+                      ('offset', 'i4'),                     # 4 byte int (long)
+                      ('count', 'i4')])                     # 4 byte int (long)
+sample_dtype = sample_dtype.newbyteorder('<')
+
+# size of the sample datagram header, from length1 to the end of the sample fields
+SAMPLE_HEADER_SIZE = sample_dtype.itemsize
+
+
+####################################################################################
+# Create functions to read the datagrams contained in the raw file. The
+# code below was developed using example Matlab code produced by Lars Nonboe
+# Andersen of Simrad and provided by Dr. Kelly Benoit-Bird and the
+# raw data file format specification in the Simrad EK60 manual, with reference
+# to code in Rick Towler's readEKraw toolbox.
+def read_datagram_header(chunk):
+    """
+    Reads the EK60 raw data file datagram header
+    @param chunk data chunk to read the datagram header from
+    @return: datagram header
+    """
+    # setup unpack structure and field names
+    field_names = ('datagram_type', 'internal_time')
+    fmt = '<4sll'
+
+    # read in the values from the byte string chunk
+    values = list(unpack(fmt, chunk))
+
+    # the internal date time structure represents the number of 100
+    # nanosecond intervals since January 1, 1601. this is known as the
+    # Windows NT Time Format.
+    internal = values[2] * (2**32) + values[1]
+
+    # create the datagram header dictionary
+    datagram_header = dict(zip(field_names, [values[0], internal]))
+    return datagram_header
+
+
+def read_config_header(chunk):
+    """
+    Reads the EK60 raw data file configuration header information
+    from the byte string passed in as a chunk
+    @param chunk data chunk to read the config header from
+    @return: configuration header
+    """
+    # setup unpack structure and field names
+    field_names = ('survey_name', 'transect_name', 'sounder_name',
+                   'version', 'transducer_count')
+    fmt = '<128s128s128s30s98sl'
+
+    # read in the values from the byte string chunk
+    values = list(unpack(fmt, chunk))
+    values.pop(4)  # drop the spare field
+
+    # strip the trailing zero byte padding from the strings
+    # for i in [0, 1, 2, 3]:
+    for i in xrange(4):
+        values[i] = values[i].strip('\x00')
+
+    # create the configuration header dictionary
+    config_header = dict(zip(field_names, values))
+    return config_header
+
+
+def read_config_transducer(chunk):
+    """
+    Reads the EK60 raw data file configuration transducer information
+    from the byte string passed in as a chunk
+    @param chunk data chunk to read the configuration transducer information from
+    @return: configuration transducer information
+    """
+
+    # setup unpack structure and field names
+    field_names = ('channel_id', 'beam_type', 'frequency', 'gain',
+                   'equiv_beam_angle', 'beam_width_alongship', 'beam_width_athwartship',
+                   'angle_sensitivity_alongship', 'angle_sensitivity_athwartship',
+                   'angle_offset_alongship', 'angle_offset_athwart', 'pos_x', 'pos_y',
+                   'pos_z', 'dir_x', 'dir_y', 'dir_z', 'pulse_length_table', 'gain_table',
+                   'sa_correction_table', 'gpt_software_version')
+    fmt = '<128sl15f5f8s5f8s5f8s16s28s'
+
+    # read in the values from the byte string chunk
+    values = list(unpack(fmt, chunk))
+
+    # convert some of the values to arrays
+    pulse_length_table = np.array(values[17:22])
+    gain_table = np.array(values[23:28])
+    sa_correction_table = np.array(values[29:34])
+
+    # strip the trailing zero byte padding from the strings
+    for i in [0, 35]:
+        values[i] = values[i].strip('\x00')
+
+    # put it back together, dropping the spare strings
+    config_transducer = dict(zip(field_names[0:17], values[0:17]))
+    config_transducer[field_names[17]] = pulse_length_table
+    config_transducer[field_names[18]] = gain_table
+    config_transducer[field_names[19]] = sa_correction_table
+    config_transducer[field_names[20]] = values[35]
+    return config_transducer
+
+
+def read_sample_data(chunk):
+    """
+    Reads the EK60 raw sample datagram from the byte string passed in as a chunk
+    @param chunk data chunk to read sample data from
+    @return: sample datagram dictionary
+    """
+    # setup unpack structure and field names
+    field_names = ('channel_number', 'mode', 'transducer_depth', 'frequency',
+                   'transmit_power', 'pulse_length', 'bandwidth',
+                   'sample_interval', 'sound_velocity', 'absorption_coefficient',
+                   'heave', 'roll', 'pitch', 'temperature', 'trawl_upper_depth_valid',
+                   'trawl_opening_valid', 'trawl_upper_depth', 'trawl_opening',
+                   'offset', 'count')
+    fmt = '<2h12f2h2f2l'
+
+    # read in the values from the byte string chunk
+    values = list(unpack(fmt, chunk[:72]))
+    sample_datagram = dict(zip(field_names, values))
+
+    # extract the mode and sample counts
+    mode = values[1]
+    count = values[-1]
+
+    # extract and uncompress the power measurements
+    if mode != 2:
+        fmt = '<%dh' % count
+        strt = 72
+        stop = strt + (count * 2)
+        power = np.array(unpack(fmt, chunk[strt:stop]))
+        power = power * 10. * np.log10(2) / 256.
+        sample_datagram['power'] = power
+
+    # extract the alongship and athwartship angle measurements
+    if mode > 1:
+        fmt = '<%db' % (count * 2)
+        strt = stop
+        stop = strt + (count * 2)
+        values = list(unpack(fmt, chunk[strt:stop]))
+        athwart = np.array(values[0::2])
+        along = np.array(values[1::2])
+
+        sample_datagram['alongship'] = along
+        sample_datagram['athwartship'] = athwart
+
+    return sample_datagram
+
+
+def walk_datagrams(data, offset=0):
+    """
+    Step through the datagrams of a raw file using the length1 at the start of each datagram. A datagram
+    is accepted when the length2 at its end matches length1, otherwise the file is searched from the next
+    byte for a datagram type to resynchronize.
+    @param data string or memory map holding the raw file
+    @param offset offset of the length1 of the first datagram
+    @return: generator of (offset of length1, datagram type) of each datagram
+    """
+    end = len(data)
+    while offset + LENGTH_SIZE + DATAGRAM_HEADER_SIZE <= end:
+        length1, = unpack_from('<l', data, offset)
+        length2_offset = offset + LENGTH_SIZE + length1
+        if length1 >= DATAGRAM_HEADER_SIZE and length2_offset + LENGTH_SIZE <= end and \
+                unpack_from('<l', data, length2_offset)[0] == length1:
+            yield offset, data[offset + LENGTH_SIZE:offset + LENGTH_SIZE + 4]
+            offset = length2_offset + LENGTH_SIZE
+            continue
+
+        # A mismatch can indicate an invalid, corrupt, or misaligned datagram or a reverse byte
+        # order binary data file.
+        log.warn("Mismatching beginning and end length values in datagram at offset %d, length1: %d. "
+                 "Possible file corruption or format incompatibility.", offset, length1)
+        match = DATAGRAM_MATCHER.search(data, offset + LENGTH_SIZE + 1)
+        if not match:
+            break
+        offset = match.start() - LENGTH_SIZE
+
+
+def sample_offsets(data, offset=0):
+    """
+    Find the sample datagrams of a raw file
+    @param data string or memory map holding the raw file
+    @param offset offset of the length1 of the first datagram
+    @return: array of the offsets of the sample datagrams which are large enough to hold a sample header
+    """
+    return np.array([position for position, datagram_type in walk_datagrams(data, offset)
+                     if SAMPLE_MATCHER.match(datagram_type) and
+                     unpack_from('<l', data, position)[0] + LENGTH_SIZE >= SAMPLE_HEADER_SIZE],
+                    dtype=np.int64)
+
+
+def read_sample_headers(data, offsets):
+    """
+    Decode the headers of sample datagrams in bulk
+    @param data string or memory map holding the raw file
+    @param offsets array of the offsets of the sample datagrams
+    @return: structured array of sample_dtype, a row for each datagram
+    """
+    if not len(offsets):
+        return np.zeros(0, dtype=sample_dtype)
+
+    data_bytes = np.frombuffer(data, dtype=np.uint8)
+    rows = data_bytes[np.asarray(offsets)[:, np.newaxis] + np.arange(SAMPLE_HEADER_SIZE)]
+    return rows.view(sample_dtype).reshape(-1)
+
+
+def read_power_data(data, offset, count):
+    """
+    Get the power data following the header of a sample datagram
+    @param data string or memory map holding the raw file
+    @param offset offset of the sample datagram
+    @param count number of power values
+    @return: array of the compressed power values, a view of data
+    @throws ValueError if the power data runs past the end of data
+    """
+    return np.frombuffer(data, dtype='<i2', count=count, offset=offset + SAMPLE_HEADER_SIZE)
+
+
+def read_power_matrix(data, offsets, counts):
+    """
+    Read the power data of sample datagrams into one matrix
+    @param data string or memory map holding the raw file
+    @param offsets array of the offsets of the sample datagrams
+    @param counts array of the number of power values of each datagram
+    @return: float32 matrix of the compressed power values with a row per datagram, rows of datagrams
+        with fewer values than the others are padded with nan
+    """
+    power = np.empty((len(offsets), max(counts) if len(counts) else 0), dtype=np.float32)
+    for row, (offset, count) in enumerate(zip(offsets, counts)):
+        power[row, :count] = read_power_data(data, offset, count)
+        power[row, count:] = np.nan
+    return power
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.zplsc_render
+@file mi/dataset/parser/zplsc_render.py
+@brief Echogram rendering for the zplsc parsers
+
+Release notes:
+
+Echograms are rendered in a pool of worker processes which is kept for all the files parsed, so the
+workers are only started, and matplotlib only imported, once. Renders are queued and run while the
+parsing goes on, and can be waited for when the results are needed. The pings of an echogram can be
+decimated to the width of the image before they are sent to a worker, and a plain raster of the power
+is written as a PNG with a numpy colormap, without matplotlib. The shared renderer used by default
+decimates to ECHOGRAM_WIDTH pixels and writes rasters, unless configured otherwise.
+"""
+
+import atexit
+import multiprocessing
+import struct
+import zlib
+
+import numpy as np
+
+from mi.core.log import get_logger
+log = get_logger()
+
+# range of the power colormap, in dB
+MIN_DB = -180
+MAX_DB = -59
+
+# pixel width the echograms of the shared renderer are decimated to, and whether it writes plain rasters
+ECHOGRAM_WIDTH = 1024
+ECHOGRAM_RASTER = True
+
+PNG_SIGNATURE = '\x89PNG\r\n\x1a\n'
+
+
+def jet_colormap(size=256):
+    """
+    Build the jet colormap used for the echogram plots
+    @param size number of colors
+    @return: array of size rgb colors
+    """
+    x = np.linspace(0, 1, size)
+    rgb = np.column_stack([np.clip(1.5 - np.abs(4 * x - offset), 0, 1) for offset in (3, 2, 1)])
+    return np.round(rgb * 255).astype(np.uint8)
+
+
+JET = jet_colormap()
+
+
+def decimate(power, times, width):
+    """
+    Keep every nth ping so an echogram has no more pings than the pixel width of its image
+    @param power matrix of values with a row per ping
+    @param times array of the ping times
+    @param width pixel width, None to keep all the pings
+    @return: (power, times) of the pings kept
+    """
+    if width is None or len(power) <= width:
+        return power, times
+    step = -(-len(power) // width)
+    return power[::step], times[::step]
+
+
+def colorize(values, value_range=(MIN_DB, MAX_DB), colormap=JET):
+    """
+    Map values to the colors of a colormap, values which are not finite are white
+    @param values matrix of values
+    @param value_range (min, max) values of the first and last colors, None for the range of the values
+    @param colormap array of rgb colors
+    @return: array of the rgb color of each value
+    """
+    values = np.asarray(values, dtype=np.float32)
+    finite = np.isfinite(values)
+    if value_range is None:
+        value_range = (values[finite].min(), values[finite].max()) if finite.any() else (0, 1)
+    min_value, max_value = value_range
+
+    scale = (len(colormap) - 1) / float(max(max_value - min_value, 1e-12))
+    indices = np.clip((np.where(finite, values, min_value) - min_value) * scale, 0, len(colormap) - 1)
+    rgb = colormap[indices.astype(np.intp)]
+    rgb[~finite] = 255
+    return rgb
+
+
+def png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + \
+        struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+
+
+def write_png(filename, rgb):
+    """
+    Write an 8 bit rgb image as a PNG
+    @param filename png file name
+    @param rgb array of shape (height, width, 3) of uint8
+    """
+    height, width = rgb.shape[:2]
+    # each scanline starts with filter type 0, none
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rgb.reshape(height, width * 3)
+
+    with open(filename, 'wb') as png_file:
+        png_file.write(PNG_SIGNATURE)
+        png_file.write(png_chunk('IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        png_file.write(png_chunk('IDAT', zlib.compress(scanlines.tostring(), 6)))
+        png_file.write(png_chunk('IEND', ''))
+
+
+def write_raster(power, filename, value_range=(MIN_DB, MAX_DB)):
+    """
+    Write the plain raster of an echogram, time along x and depth down y, with a pixel per value
+    @param power matrix of values with a row per ping
+    @param filename png file name
+    @param value_range (min, max) values of the colormap, None for the range of the values
+    """
+    write_png(filename, colorize(np.transpose(power), value_range))
+
+
+def render_echogram(power, times, frequency, sample_thickness, title, filename, raster=False,
+                    value_range=(MIN_DB, MAX_DB)):
+    """
+    Render an echogram
+    @param power matrix of values with a row per ping
+    @param times array of the ping internal times
+    @param frequency transducer frequency
+    @param sample_thickness transducer's sample thickness (in range)
+    @param title transducer title
+    @param filename png file name
+    @param raster True to write the plain raster, otherwise the matplotlib plot is saved
+    @param value_range (min, max) values of the raster colormap, None for the range of the values
+    @return: filename
+    """
+    if raster:
+        write_raster(power, filename, value_range)
+    else:
+        # matplotlib is only imported by the processes plotting
+        from mi.dataset.parser.zplsc_echogram import generate_plots
+        generate_plots(np.transpose(power), times, frequency, sample_thickness, title, filename)
+    return filename
+
+
+def render_echogram_job(args):
+    """
+    Pool worker rendering an echogram
+    @param args (args, kwargs) of render_echogram
+    """
+    args, kwargs = args
+    return render_echogram(*args, **kwargs)
+
+
+class EchogramRenderer(object):
+    """
+    Renders echograms in a pool of worker processes, which is started with the first render and kept
+    until the renderer is closed.
+    """
+
+    def __init__(self, workers=None, width=None, raster=False):
+        """
+        @param workers number of worker processes, by default the number of cpus
+        @param width pixel width the pings of the echograms are decimated to, None to keep all the pings
+        @param raster True to write plain rasters instead of matplotlib plots
+        """
+        self.workers = workers
+        self.width = width
+        self.raster = raster
+        self._pool = None
+        self._pending = []
+
+    def submit(self, power, times, frequency, sample_thickness, title, filename, raster=None,
+               value_range=(MIN_DB, MAX_DB)):
+        """
+        Queue the render of an echogram, see render_echogram
+        @param raster True to write a plain raster, False for a matplotlib plot, None for the renderer's choice
+        @return: AsyncResult of the render
+        """
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers)
+
+        power, times = decimate(power, np.asarray(times), self.width)
+        job = ((power, times, frequency, sample_thickness, title, filename),
+               {'raster': self.raster if raster is None else raster, 'value_range': value_range})
+        result = self._pool.apply_async(render_echogram_job, (job,))
+        self._pending.append((filename, result))
+        return result
+
+    def wait(self):
+        """
+        Wait for the queued renders, a render which fails is logged
+        @return: list of the file names of the echograms rendered
+        """
+        rendered = []
+        pending, self._pending = self._pending, []
+        for filename, result in pending:
+            try:
+                rendered.append(result.get())
+            except Exception, e:
+                log.error("Error: Unable to render echogram %s: %s", filename, e)
+        return rendered
+
+    def close(self):
+        """
+        Wait for the queued renders and stop the workers
+        """
+        rendered = self.wait()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        return rendered
+
+
+_shared_renderer = None
+
+
+def shared_renderer(width=ECHOGRAM_WIDTH, raster=ECHOGRAM_RASTER):
+    """
+    Get the renderer shared by all the parsers of a process
+    @param width pixel width the pings of the echograms are decimated to, None to keep all the pings
+    @param raster True to write plain rasters instead of matplotlib plots
+    """
+    global _shared_renderer
+    if _shared_renderer is None:
+        _shared_renderer = EchogramRenderer()
+        atexit.register(shutdown_shared_renderer)
+    # the settings apply to the renders submitted from now on
+    _shared_renderer.width = width
+    _shared_renderer.raster = raster
+    return _shared_renderer
+
+
+def shutdown_shared_renderer():
+    """
+    Wait for the renders queued on the shared renderer and stop its workers, a later
+    shared_renderer call starts a new one
+    @return: list of the file names of the echograms rendered
+    """
+    global _shared_renderer
+    renderer, _shared_renderer = _shared_renderer, None
+    if renderer is None:
+        return []
+    return renderer.close()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_dataset_driver
+@file mi/dataset/test/test_dataset_driver.py
+@brief Test code for passing particles from a parser to the particle data handler
+"""
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.core.unit_test import MiUnitTest
+from mi.dataset.dataset_driver import DataSetDriver, ParticleDataHandler
+from mi.dataset.dataset_parser import SimpleParser
+
+
+class FakeParticle(object):
+
+    def __init__(self, sample_type, value):
+        self._type = sample_type
+        self._value = value
+
+    def type(self):
+        return self._type
+
+    def generate(self):
+        return '{"value": %d}' % self._value
+
+
+class FailingParticle(FakeParticle):
+
+    def generate(self):
+        raise ValueError('cannot generate particle %d' % self._value)
+
+
+class FakeParser(object):
+    """
+    Parser handing out a fixed list of particles, recording the batch sizes requested
+    """
+    def __init__(self, particles):
+        self._particles = list(particles)
+        self.requested = []
+
+    def get_records(self, num_records):
+        self.requested.append(num_records)
+        records = self._particles[:num_records]
+        self._particles = self._particles[num_records:]
+        return records
+
+
+class FailingParser(SimpleParser):
+    """
+    Parser yielding its particles until it fails
+    """
+    def __init__(self, particles):
+        self._particles = particles
+        super(FailingParser, self).__init__({}, None, None)
+
+    def iter_records(self):
+        for particle in self._particles:
+            yield particle
+        raise ValueError('cannot parse the rest of the file')
+
+
+class SingleSampleHandler(object):
+    """
+    Particle data handler without the bulk method
+    """
+    def __init__(self):
+        self.calls = []
+
+    def addParticleSample(self, sample_type, sample):
+        self.calls.append((sample_type, sample))
+
+    def setParticleDataCaptureFailure(self):
+        pass
+
+
+@attr('UNIT', group='mi')
+class DataSetDriverUnitTestCase(MiUnitTest):
+
+    def setUp(self):
+        self.particles = [FakeParticle('a', 0), FakeParticle('a', 1), FakeParticle('b', 2),
+                          FakeParticle('a', 3), FakeParticle('b', 4)]
+
+    def test_bulk_handler(self):
+        """
+        Runs of samples of the same type are passed to addParticleSamples in one call
+        """
+        parser = FakeParser(self.particles)
+        handler = ParticleDataHandler()
+        calls = []
+        add_particle_samples = handler.addParticleSamples
+        handler.addParticleSamples = lambda sample_type, samples: \
+            (calls.append((sample_type, len(samples))), add_particle_samples(sample_type, samples))
+
+        DataSetDriver(parser, handler, batch_size=3).processFileStream()
+
+        self.assertEqual(parser.requested, [3, 3, 3])
+        self.assertEqual(calls, [('a', 2), ('b', 1), ('a', 1), ('b', 1)])
+        self.assertEqual(handler._samples, {'a': ['{"value": 0}', '{"value": 1}', '{"value": 3}'],
+                                            'b': ['{"value": 2}', '{"value": 4}']})
+        self.assertFalse(handler._failure)
+
+    def test_generate_failure(self):
+        """
+        The samples generated before a particle fails are delivered, then the failure is set and
+        no more records are requested
+        """
+        self.particles.insert(2, FailingParticle('a', 5))
+        parser = FakeParser(self.particles)
+        handler = ParticleDataHandler()
+
+        DataSetDriver(parser, handler, batch_size=4).processFileStream()
+
+        self.assertEqual(parser.requested, [4])
+        self.assertEqual(handler._samples, {'a': ['{"value": 0}', '{"value": 1}']})
+        self.assertTrue(handler._failure)
+
+    def test_parser_failure(self):
+        """
+        The particles parsed before the parser fails in a batch are delivered, then the failure is set
+        """
+        handler = ParticleDataHandler()
+
+        DataSetDriver(FailingParser(self.particles), handler, batch_size=1000).processFileStream()
+
+        self.assertEqual(handler._samples, {'a': ['{"value": 0}', '{"value": 1}', '{"value": 3}'],
+                                            'b': ['{"value": 2}', '{"value": 4}']})
+        self.assertTrue(handler._failure)
+
+    def test_single_sample_handler(self):
+        """
+        Handlers without addParticleSamples get one sample per call
+        """
+        parser = FakeParser(self.particles)
+        handler = SingleSampleHandler()
+
+        DataSetDriver(parser, handler, batch_size=2).processFileStream()
+
+        self.assertEqual(parser.requested, [2, 2, 2, 2])
+        self.assertEqual([sample_type for sample_type, sample in handler.calls], ['a', 'a', 'b', 'a', 'b'])
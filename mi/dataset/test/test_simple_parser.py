@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_simple_parser
+@file mi/dataset/test/test_simple_parser.py
+@brief Test code for the record handling of the SimpleParser base class
+"""
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger
+log = get_logger()
+
+from mi.dataset.dataset_parser import SimpleParser
+from mi.dataset.test.test_parser import ParserUnitTestCase
+
+
+class BufferedParser(SimpleParser):
+    """
+    Parser filling the record buffer in parse_file
+    """
+    def parse_file(self):
+        self._record_buffer.extend(range(5))
+
+
+class StreamingParser(SimpleParser):
+    """
+    Parser yielding records from iter_records, keeping track of how far it got
+    """
+    def __init__(self, *args, **kwargs):
+        super(StreamingParser, self).__init__(*args, **kwargs)
+        self.parsed = 0
+
+    def iter_records(self):
+        for record in range(5):
+            self.parsed += 1
+            yield record
+
+
+@attr('UNIT', group='mi')
+class SimpleParserUnitTestCase(ParserUnitTestCase):
+
+    def test_parse_file(self):
+        """
+        Particles filled in by parse_file are returned in order
+        """
+        parser = BufferedParser({}, None, self.exception_callback)
+
+        self.assertEqual(parser.get_records(0), [])
+        self.assertEqual(parser.get_records(2), [0, 1])
+        self.assertEqual(parser.get_records(1), [2])
+        self.assertEqual(parser.get_records(5), [3, 4])
+        self.assertEqual(parser.get_records(1), [])
+
+    def test_iter_records(self):
+        """
+        Particles from iter_records are only parsed as they are requested
+        """
+        parser = StreamingParser({}, None, self.exception_callback)
+
+        self.assertEqual(parser.get_records(2), [0, 1])
+        self.assertEqual(parser.parsed, 2)
+        self.assertEqual(parser.get_records(5), [2, 3, 4])
+        self.assertEqual(parser.get_records(1), [])
@@ -26,6 +26,8 @@ from mi.dataset.driver.moas.gl.parad.parad_m_glider_recovered_driver import pars
 from mi.dataset.driver.moas.gl.flort_m.flort_m_glider_recovered_driver import parse as flort_r
 from mi.dataset.driver.moas.gl.engineering.glider_eng_glider_recovered_driver import parse as engineering_r
 
+from mi.dataset.driver.moas.gl.glider_multi_stream_driver import parse as multi_stream
+
 
 
 mock = Mock()
@@ -81,8 +83,34 @@ def timeit():
     print 'all files parsed in %6.2f seconds' % (time.time()-overall_start)
     return p
 
+def timeit_multi_stream():
+    overall_start = time.time()
+    p = ParticleDataHandler()
+    class_names = ['CtdgvTelemeteredDataParticle', 'DostaTelemeteredDataParticle', 'ParadTelemeteredDataParticle',
+                   'FlortTelemeteredDataParticle', 'EngineeringMetadataDataParticle',
+                   'EngineeringTelemeteredDataParticle', 'EngineeringScienceTelemeteredDataParticle',
+                   'CtdgvRecoveredDataParticle', 'DostaRecoveredDataParticle', 'ParadRecoveredDataParticle',
+                   'FlortRecoveredDataParticle', 'EngineeringMetadataRecoveredDataParticle',
+                   'EngineeringRecoveredDataParticle', 'EngineeringScienceRecoveredDataParticle']
+    for f in sys.argv[1:]:
+        print f, 'multi stream',
+        start = time.time()
+        try:
+            multi_stream(cwd, f, dict((class_name, p) for class_name in class_names))
+        except Exception as e:
+            print 'exception: %s' % e
+        print '%s : %5.2f' % (f, time.time()-start)
+
+    print 'all files parsed once in %6.2f seconds' % (time.time()-overall_start)
+    return p
+
 p = timeit()
 
 for k in p._samples:
     print k, len(p._samples[k])
+
+multi_p = timeit_multi_stream()
+
+for k in multi_p._samples:
+    print k, len(multi_p._samples[k])
 open('samples.json', 'wb').write(json.dumps(p._samples))
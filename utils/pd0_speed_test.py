@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Compare decoding PD0 ensembles one at a time with AdcpPd0Record against the
+bulk AdcpPd0Ensembles decoder. A resource PD0 file is repeated to make a file
+the size of a recovered ADCP file.
+
+usage: python utils/pd0_speed_test.py [repeat count]
+"""
+
+import os
+import sys
+import time
+
+from mi.dataset.parser.pd0_parser import AdcpPd0Record, AdcpPd0Ensembles, find_ensembles
+
+PD0_FILE = os.path.join('mi', 'dataset', 'driver', 'moas', 'gl', 'adcpa', 'resource', 'NE051400.PD0')
+
+
+def time_records(data, positions):
+    """
+    Decode each ensemble from its own bytes, return the elapsed time
+    """
+    start = time.time()
+    for position in positions:
+        AdcpPd0Record(data[position:position + ord(data[position + 2]) + (ord(data[position + 3]) << 8) + 2],
+                      glider=True)
+    return time.time() - start
+
+
+def time_bulk(data, positions, batch_size=1000):
+    """
+    Decode the ensembles in batches and build each record, return the elapsed time
+    """
+    start = time.time()
+    for index in xrange(0, len(positions), batch_size):
+        ensembles = AdcpPd0Ensembles(data, positions[index:index + batch_size], glider=True)
+        for record_index in xrange(len(ensembles)):
+            ensembles.record(record_index)
+    return time.time() - start
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    data = open(PD0_FILE, 'rb').read() * repeat
+    positions = [position for position, length in find_ensembles(data)
+                 if length is not None and position + length <= len(data)]
+
+    records = time_records(data, positions)
+    bulk = time_bulk(data, positions)
+    print '%d ensembles  records %7.3fs  bulk %7.3fs  speedup %6.1fx' % (len(positions), records, bulk,
+                                                                          records / max(bulk, 1e-6))
+
+
+if __name__ == '__main__':
+    main()
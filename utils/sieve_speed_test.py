@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Compare the plain regex sieve with the incremental RegexSieve on the DCL and
+CSPP parsers. Each parser is run over the same file twice, once with the sieve
+it builds (incremental) and once with that sieve swapped for the plain
+Chunker.regex_sieve_function over the same regexes. The DCL parser is made to
+go through the chunker rather than read its lines straight from the stream.
+
+usage: python utils/sieve_speed_test.py [long record length]
+"""
+
+import os
+import sys
+import time
+from functools import partial
+from StringIO import StringIO
+
+from mi.core.instrument.chunker import Chunker, OffsetChunker, RegexSieve
+from mi.dataset.dataset_parser import DataSetDriverConfigKeys
+from mi.dataset.parser.cspp_base import METADATA_PARTICLE_CLASS_KEY, DATA_PARTICLE_CLASS_KEY, SIEVE_MATCHER
+from mi.dataset.parser.dcl_file_common import RECORD_MATCHER
+from mi.dataset.parser.metbk_a_dcl import MetbkADclParser
+from mi.dataset.parser.optaa_dj_cspp import OptaaDjCsppParser, \
+    OptaaDjCsppMetadataRecoveredDataParticle, OptaaDjCsppInstrumentRecoveredDataParticle
+
+DRIVER_PATH = os.path.join('mi', 'dataset', 'driver')
+
+METBK_FILE = os.path.join(DRIVER_PATH, 'metbk_a', 'dcl', 'resource', '20140805.metbk2.log')
+OPTAA_FILE = os.path.join(DRIVER_PATH, 'optaa_dj', 'cspp', 'resource', '11079364_ACS_ACS.txt')
+
+
+def metbk_parser(stream_handle):
+    config = {DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.metbk_a_dcl',
+              DataSetDriverConfigKeys.PARTICLE_CLASS: 'MetbkADclRecoveredInstrumentDataParticle'}
+    return MetbkADclParser(config, stream_handle, lambda state, ingested: None,
+                           lambda data: None, lambda ex: None)
+
+
+def optaa_parser(stream_handle):
+    config = {DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.optaa_dj_cspp',
+              DataSetDriverConfigKeys.PARTICLE_CLASS: None,
+              DataSetDriverConfigKeys.PARTICLE_CLASSES_DICT: {
+                  METADATA_PARTICLE_CLASS_KEY: OptaaDjCsppMetadataRecoveredDataParticle,
+                  DATA_PARTICLE_CLASS_KEY: OptaaDjCsppInstrumentRecoveredDataParticle}}
+    return OptaaDjCsppParser(config, stream_handle, lambda ex: None)
+
+
+def time_parser(build_parser, data, incremental):
+    """
+    Parse all the records in data and return the number of particles and elapsed time
+    """
+    parser = build_parser(StringIO(data))
+    # DCL parsers read whole line records straight from the stream, make them use the chunker
+    parser._line_mode = False
+    if not incremental:
+        parser._chunker.sieve = partial(Chunker.regex_sieve_function,
+                                        regex_list=parser._chunker.sieve.regex_list)
+    count = 0
+    start = time.time()
+    records = parser.get_records(1)
+    while records:
+        count += len(records)
+        records = parser.get_records(1)
+    return count, time.time() - start
+
+
+def time_sieve(sieve, data, block_size=1024):
+    """
+    Feed data into a chunker in blocks as BufferLoadingParser.get_block does and
+    drain it, return the number of chunks and elapsed time
+    """
+    chunker = OffsetChunker(sieve)
+    count = 0
+    start = time.time()
+    for index in xrange(0, len(data), block_size):
+        chunker.add_chunk(data[index:index + block_size], 0.0)
+        while chunker.get_next_data()[1] is not None:
+            count += 1
+        chunker.get_next_non_data()
+    return count, time.time() - start
+
+
+def report(label, plain, incremental):
+    print '%-40s %6d records  plain %7.3fs  incremental %7.3fs  speedup %6.1fx' % \
+        (label, plain[0], plain[1], incremental[1], plain[1] / max(incremental[1], 1e-6))
+
+
+def main():
+    long_record_length = int(sys.argv[1]) if len(sys.argv) > 1 else 65536
+
+    for label, build_parser, file_path in [('metbk_a_dcl parser', metbk_parser, METBK_FILE),
+                                           ('optaa_dj_cspp parser', optaa_parser, OPTAA_FILE)]:
+        data = open(file_path, 'rb').read()
+        report(label, time_parser(build_parser, data, False), time_parser(build_parser, data, True))
+
+    for label, matcher, file_path in [('metbk_a_dcl sieve', RECORD_MATCHER, METBK_FILE),
+                                      ('optaa_dj_cspp sieve', SIEVE_MATCHER, OPTAA_FILE)]:
+        data = open(file_path, 'rb').read()
+        # add one long record, such as a corrupted run without a line break
+        data += 'X' * long_record_length + '\n'
+        report(label + ' + long record',
+               time_sieve(partial(Chunker.regex_sieve_function, regex_list=[matcher]), data),
+               time_sieve(RegexSieve([matcher], end_marker='\n'), data))
+
+
+if __name__ == '__main__':
+    main()